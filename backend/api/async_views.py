@@ -0,0 +1,70 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.urls import URLPattern
+from rest_framework.permissions import SAFE_METHODS
+
+from backend.db.postgresql.base import mark_connections_for_check
+
+ASYNC_VIEW_NAMES = (
+    'recipe-list',
+    'recipe-detail',
+    'recipe-download-shopping-cart',
+    'recipe-download-shopping-cart-job',
+    'tag-list',
+    'tag-detail',
+    'ingredient-list',
+    'ingredient-detail',
+)
+
+
+def _run_in_thread(view, request, args, kwargs):
+    # Соединения потоков пула не обслуживаются сигналами
+    # request_started/request_finished, поэтому жизненный цикл соединения
+    # поддерживается здесь.
+    close_old_connections()
+    mark_connections_for_check()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def offload(view):
+    """
+    Превращает синхронное представление в корутину.
+
+    Чтения (GET, HEAD, OPTIONS) вместе с рендерингом ответа выполняются в
+    общем пуле потоков (``thread_sensitive=False``), поэтому запросы не ждут
+    друг друга в единственном потоке синхронных представлений, а отдача
+    ответа медленному клиенту не занимает поток. Запись идёт в этом потоке,
+    как у обычного синхронного представления.
+    """
+
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await sync_to_async(view)(request, *args, **kwargs)
+        return await sync_to_async(_run_in_thread, thread_sensitive=False)(
+            view, request, args, kwargs
+        )
+
+    return async_view
+
+
+def offload_patterns(patterns, names=ASYNC_VIEW_NAMES):
+    return [
+        URLPattern(
+            pattern.pattern,
+            offload(pattern.callback),
+            pattern.default_args,
+            pattern.name,
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in patterns
+    ]
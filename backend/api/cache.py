@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+
+from recipe.models import Ingredient, Tag
+
+from .serializers import IngredientSerializer, TagSerializer
+
+TAGS_CACHE_KEY = 'reference:tags'
+INGREDIENTS_CACHE_KEY = 'reference:ingredients'
+
+
+def _get_or_set(key, build):
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, settings.REFERENCE_CACHE_TIMEOUT)
+    return data
+
+
+def get_tags():
+    return _get_or_set(
+        TAGS_CACHE_KEY,
+        lambda: TagSerializer(Tag.objects.all(), many=True).data,
+    )
+
+
+def get_ingredients():
+    return _get_or_set(
+        INGREDIENTS_CACHE_KEY,
+        lambda: IngredientSerializer(Ingredient.objects.all(), many=True).data,
+    )
+
+
+def invalidate_tags():
+    cache.delete(TAGS_CACHE_KEY)
+
+
+def invalidate_ingredients():
+    cache.delete(INGREDIENTS_CACHE_KEY)
@@ -0,0 +1,138 @@
+"""
+Кэш карточек рецептов.
+
+Почти весь ответ TakeRecipeSerializer — название, описание, картинка,
+автор, теги и ингредиенты — одинаков для всех пользователей. Эта часть
+(карточка) хранится в кэше под ключом из id рецепта и его updated_at.
+Ответ собирается из карточек, полученных одним get_many, и флагов
+пользователя (is_favorited, is_in_shopping_cart, author.is_subscribed),
+прочитанных одним запросом. Карточки строит api/lean.py без
+сериализаторов DRF.
+
+Всё, что видно в карточке, — рецепт, его теги и ингредиенты, справочники
+тегов и ингредиентов, автор — при изменении обновляет updated_at рецепта
+(recipe/signals.py, api/signals.py). Поэтому ключ берётся из данных, а не
+из счётчиков в кэше, и сбрасывать карточки не нужно: это работает и с
+кэшем, локальным для процесса. updated_at читается раньше, чем рецепт
+строится из базы, поэтому карточка не бывает старее своего ключа.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import IntegerField, Value
+
+from recipe.models import Favourite, Recipe, ShoppingCart
+from users.models import Follow
+
+from . import lean
+
+# Увеличивается при изменении состава карточки.
+CARD_FORMAT = 1
+FAVORITE, SHOPPING_CART, SUBSCRIPTION = 1, 2, 3
+
+
+def card_key(recipe_id, updated_at):
+    return f'recipe-card:{CARD_FORMAT}:{recipe_id}:{updated_at.isoformat()}'
+
+
+def memberships(user, recipe_ids, author_ids):
+    """Избранное, корзина и подписки пользователя одним запросом."""
+    found = {FAVORITE: set(), SHOPPING_CART: set(), SUBSCRIPTION: set()}
+    if not user.is_authenticated or not recipe_ids:
+        return found
+    queries = [
+        model.objects.filter(user=user, **{f'{field}__in': ids})
+        .order_by()
+        .annotate(kind=Value(kind, output_field=IntegerField()))
+        .values_list('kind', field)
+        for model, field, ids, kind in (
+            (Favourite, 'recipe_id', recipe_ids, FAVORITE),
+            (ShoppingCart, 'recipe_id', recipe_ids, SHOPPING_CART),
+            (Follow, 'author_id', author_ids, SUBSCRIPTION),
+        )
+    ]
+    for kind, object_id in queries[0].union(*queries[1:], all=True):
+        found[kind].add(object_id)
+    return found
+
+
+def etag(recipes, found, *extra):
+    """
+    Слабый ETag ответа из карточек рецептов recipes — пар (id,
+    updated_at) — и флагов пользователя found из memberships(). Карточку
+    строить не нужно: updated_at меняется вместе с ней.
+    """
+    content = json.dumps(
+        [
+            CARD_FORMAT,
+            [
+                [recipe_id, str(updated_at)]
+                for recipe_id, updated_at in recipes
+            ],
+            {kind: sorted(ids) for kind, ids in found.items()},
+            *extra,
+        ],
+        separators=(',', ':'),
+    )
+    return f'W/"{hashlib.sha256(content.encode()).hexdigest()[:32]}"'
+
+
+def recipe_cards(request, recipe_ids, found=None, versions=None):
+    """
+    Ответы TakeRecipeSerializer для рецептов recipe_ids: словарь
+    {id: данные} в порядке recipe_ids, без удалённых рецептов. found —
+    уже прочитанные memberships() этих рецептов, versions — их updated_at
+    {id: updated_at}, если уже прочитаны.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return {}
+    if versions is None:
+        versions = dict(
+            Recipe.objects.filter(id__in=recipe_ids)
+            .order_by()
+            .values_list('id', 'updated_at')
+        )
+    keys = {
+        recipe_id: card_key(recipe_id, versions[recipe_id])
+        for recipe_id in recipe_ids
+        if recipe_id in versions
+    }
+    cached = cache.get_many(keys.values())
+    cards = {
+        recipe_id: cached[key]
+        for recipe_id, key in keys.items()
+        if key in cached
+    }
+    missing = [recipe_id for recipe_id in keys if recipe_id not in cards]
+    if missing:
+        built = lean.recipe_cards(missing)
+        cache.set_many(
+            {keys[recipe_id]: card for recipe_id, card in built.items()},
+            settings.RECIPE_CARD_CACHE_TIMEOUT,
+        )
+        cards.update(built)
+    if found is None:
+        found = memberships(
+            request.user,
+            list(cards),
+            list({card['author']['id'] for card in cards.values()}),
+        )
+    result = {}
+    for recipe_id in recipe_ids:
+        card = cards.get(recipe_id)
+        if card is None:
+            continue
+        data = dict(card)
+        data['author'] = dict(
+            card['author'],
+            is_subscribed=card['author']['id'] in found[SUBSCRIPTION],
+        )
+        if card['image'] is not None:
+            data['image'] = request.build_absolute_uri(card['image'])
+        data['is_favorited'] = recipe_id in found[FAVORITE]
+        data['is_in_shopping_cart'] = recipe_id in found[SHOPPING_CART]
+        result[recipe_id] = data
+    return result
@@ -0,0 +1,148 @@
+"""
+Фоновое построение документов (список покупок в PDF).
+
+Запрос собирает агрегированный список покупок и считает его хэш. Если
+документ с таким хэшем уже построен, файл отдаётся сразу, иначе в очередь
+DocumentJob ставится задание, а клиент получает 202 и адрес для опроса.
+Команда render_documents забирает задания из очереди и строит документы в
+пуле процессов, так что reportlab не занимает воркеры gunicorn. Одинаковые
+списки покупок — повторные нажатия или одинаковые корзины разных
+пользователей — строятся один раз.
+"""
+import hashlib
+import json
+import traceback
+from concurrent.futures import as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DocumentJob
+from .utils import shopping_cart_rows
+
+# Увеличивается при изменении вида документа: старые файлы не подойдут.
+DOCUMENT_VERSION = 1
+SHOPPING_CART_FILE_NAME = 'shopping_cart.pdf'
+
+
+def document_key(rows):
+    content = json.dumps(
+        [DOCUMENT_VERSION, rows], ensure_ascii=False, separators=(',', ':')
+    )
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def shopping_cart_job(user):
+    """Задание на список покупок пользователя: готовое или в очереди."""
+    rows = shopping_cart_rows(user)
+    key = document_key(rows)
+    job, _ = DocumentJob.objects.defer('payload').get_or_create(
+        key=key, defaults={'payload': rows}
+    )
+    if job.status == DocumentJob.FAILED:
+        # Пользователь просит документ снова — пробуем ещё раз.
+        DocumentJob.objects.filter(
+            pk=job.pk, status=DocumentJob.FAILED
+        ).update(status=DocumentJob.PENDING, attempts=0, error='')
+        job.status = DocumentJob.PENDING
+    return job
+
+
+def requeue(job):
+    """Возвращает в очередь задание, файл которого пропал."""
+    DocumentJob.objects.filter(pk=job.pk, status=DocumentJob.DONE).update(
+        status=DocumentJob.PENDING, attempts=0
+    )
+    job.status = DocumentJob.PENDING
+
+
+def claim(limit):
+    """Забирает из очереди до limit заданий."""
+    now = timezone.now()
+    # Задания упавшего воркера возвращаются в очередь по таймауту.
+    stuck = DocumentJob.objects.filter(
+        status=DocumentJob.RUNNING,
+        started_at__lt=now - timedelta(seconds=settings.DOCUMENT_JOB_TIMEOUT),
+    )
+    stuck.filter(attempts__gte=settings.DOCUMENT_JOB_MAX_ATTEMPTS).update(
+        status=DocumentJob.FAILED,
+        error='Превышено время построения.',
+        finished_at=now,
+    )
+    stuck.update(status=DocumentJob.PENDING)
+    with transaction.atomic():
+        # В PostgreSQL несколько воркеров не заберут одно задание.
+        job_ids = list(
+            DocumentJob.objects.select_for_update(skip_locked=True)
+            .filter(status=DocumentJob.PENDING)
+            .order_by('id')
+            .values_list('id', flat=True)[:limit]
+        )
+        DocumentJob.objects.filter(id__in=job_ids).update(
+            status=DocumentJob.RUNNING,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+    return list(DocumentJob.objects.filter(id__in=job_ids).order_by('id'))
+
+
+def complete(job, content):
+    job.file.save(SHOPPING_CART_FILE_NAME, ContentFile(content), save=False)
+    job.status = DocumentJob.DONE
+    job.error = ''
+    job.finished_at = timezone.now()
+    job.save(update_fields=('file', 'status', 'error', 'finished_at'))
+
+
+def fail(job, error):
+    job.status = (
+        DocumentJob.FAILED
+        if job.attempts >= settings.DOCUMENT_JOB_MAX_ATTEMPTS
+        else DocumentJob.PENDING
+    )
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=('status', 'error', 'finished_at'))
+
+
+def run(executor, limit):
+    """
+    Строит документы заданий из очереди в executor и возвращает число
+    обработанных заданий.
+    """
+    # reportlab нужен только здесь; веб-воркеры его не загружают.
+    from .pdf import render_shopping_cart_pdf
+
+    jobs = claim(limit)
+    futures = {
+        executor.submit(render_shopping_cart_pdf, job.payload): job
+        for job in jobs
+    }
+    for future in as_completed(futures):
+        job = futures[future]
+        try:
+            content = future.result()
+        except Exception:
+            fail(job, traceback.format_exc())
+        else:
+            complete(job, content)
+    return len(jobs)
+
+
+def expire():
+    """
+    Удаляет задания старше DOCUMENT_CACHE_TIMEOUT; их файлы потом удаляет
+    cleanup_media.
+    """
+    deadline = timezone.now() - timedelta(
+        seconds=settings.DOCUMENT_CACHE_TIMEOUT
+    )
+    deleted, _ = DocumentJob.objects.filter(
+        status__in=(DocumentJob.DONE, DocumentJob.FAILED),
+        finished_at__lt=deadline,
+    ).delete()
+    return deleted
@@ -1,6 +1,8 @@
 import django_filters
 
 from recipe.models import Ingredient, Recipe
+from recipe.rankings import ORDERING_CHOICES, order_by_ranking
+from recipe.search import search_recipes
 
 
 class RecipeFilter(django_filters.FilterSet):
@@ -13,6 +15,10 @@ class RecipeFilter(django_filters.FilterSet):
         field_name='is_favorited',
         method='is_favorited_filter',
     )
+    search = django_filters.CharFilter(method='search_filter')
+    ordering = django_filters.ChoiceFilter(
+        choices=ORDERING_CHOICES, method='ordering_filter'
+    )
 
     def is_in_shopping_cart_filter(self, queryset, name, value):
         return queryset.filter(shopping_cart__user=self.request.user)
@@ -20,9 +26,22 @@ class RecipeFilter(django_filters.FilterSet):
     def is_favorited_filter(self, queryset, name, value):
         return queryset.filter(favorites__user=self.request.user)
 
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def ordering_filter(self, queryset, name, value):
+        return order_by_ranking(queryset, value)
+
     class Meta:
         model = Recipe
-        fields = ('author', 'tags', 'is_in_shopping_cart', 'is_favorited')
+        fields = (
+            'author',
+            'tags',
+            'is_in_shopping_cart',
+            'is_favorited',
+            'search',
+            'ordering',
+        )
 
 
 class IngredientFilter(django_filters.FilterSet):
@@ -0,0 +1,191 @@
+"""
+Массовый импорт рецептов из JSON Lines.
+
+Каждая строка — рецепт в формате POST /api/recipes/ и, при необходимости,
+id автора в поле author. Строки обрабатываются пачками по
+RECIPE_IMPORT_CHUNK_SIZE: авторы, теги и ингредиенты пачки проверяются
+тремя запросами, затем рецепты, их теги и ингредиенты записываются в
+одной транзакции тремя bulk_create. Ошибочная
+строка не прерывает импорт: она попадает в отчёт с номером и ошибками в
+формате DRF.
+"""
+import json
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from rest_framework.fields import Field
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from recipe import timeline
+from recipe.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from recipe.signals import send_recipes_changed
+from users.models import User
+
+from .serializers import RecipeImportSerializer
+
+DOES_NOT_EXIST = PrimaryKeyRelatedField.default_error_messages[
+    'does_not_exist'
+]
+REQUIRED = Field.default_error_messages['required']
+
+
+def _does_not_exist(pk):
+    return [DOES_NOT_EXIST.format(pk_value=pk)]
+
+
+def _validate(line, author):
+    """Проверенные данные строки и ошибки; одно из двух — None."""
+    try:
+        data = json.loads(line)
+    except ValueError as error:
+        return None, {
+            api_settings.NON_FIELD_ERRORS_KEY: [f'Некорректный JSON: {error}']
+        }
+    serializer = RecipeImportSerializer(data=data)
+    if not serializer.is_valid():
+        return None, serializer.errors
+    data = serializer.validated_data
+    if 'author' not in data:
+        if author is None:
+            return None, {'author': [str(REQUIRED)]}
+        data['author'] = author.pk
+    return data, None
+
+
+def _resolve(rows):
+    """Ошибки ссылок на несуществующих авторов, теги и ингредиенты."""
+    tag_ids = set(
+        Tag.objects.filter(
+            id__in={pk for _, data in rows for pk in data['tags']}
+        ).values_list('id', flat=True)
+    )
+    author_ids = set(
+        User.objects.filter(
+            id__in={data['author'] for _, data in rows}
+        ).values_list('id', flat=True)
+    )
+    ingredient_ids = set(
+        Ingredient.objects.filter(
+            id__in={
+                ingredient['id']
+                for _, data in rows
+                for ingredient in data['ingredients']
+            }
+        ).values_list('id', flat=True)
+    )
+    for number, data in rows:
+        errors = {}
+        if data['author'] not in author_ids:
+            errors['author'] = _does_not_exist(data['author'])
+        missing_tags = [pk for pk in data['tags'] if pk not in tag_ids]
+        if missing_tags:
+            # Как PrimaryKeyRelatedField(many=True): только первый тег.
+            errors['tags'] = _does_not_exist(missing_tags[0])
+        ingredient_errors = [
+            {}
+            if ingredient['id'] in ingredient_ids
+            else {'id': _does_not_exist(ingredient['id'])}
+            for ingredient in data['ingredients']
+        ]
+        if any(ingredient_errors):
+            errors['ingredients'] = ingredient_errors
+        yield number, data, errors
+
+
+def _insert_recipes(recipes):
+    Recipe.objects.bulk_create(recipes)
+    if recipes[0].pk is not None:
+        return
+    # SQLite не возвращает id из bulk_create. Транзакция уже держит
+    # блокировку записи, поэтому id новых рецептов идут подряд и
+    # заканчиваются наибольшим.
+    last = Recipe.objects.aggregate(last=Max('id'))['last']
+    for recipe, pk in zip(recipes, range(last - len(recipes) + 1, last + 1)):
+        recipe.pk = pk
+
+
+def _write(rows):
+    recipes = [
+        Recipe(
+            author_id=data['author'],
+            name=data['name'],
+            text=data['text'],
+            cooking_time=data['cooking_time'],
+        )
+        for _, data in rows
+    ]
+    # Картинки сохраняются до транзакции; если она не удастся, файлы без
+    # рецептов удалит cleanup_media.
+    for recipe, (_, data) in zip(recipes, rows):
+        image = data.get('image')
+        if image:
+            recipe.image.save(image.name, image, save=False)
+    with transaction.atomic():
+        _insert_recipes(recipes)
+        Recipe.tags.through.objects.bulk_create(
+            [
+                Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+                for recipe, (_, data) in zip(recipes, rows)
+                for tag_id in data['tags']
+            ]
+        )
+        IngredientInRecipe.objects.bulk_create(
+            [
+                IngredientInRecipe(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredient['id'],
+                    amount=ingredient['amount'],
+                )
+                for recipe, (_, data) in zip(recipes, rows)
+                for ingredient in data['ingredients']
+            ]
+        )
+        recipe_ids = [recipe.pk for recipe in recipes]
+        # bulk_create не отправляет post_save: ленты подписчиков
+        # заполняются одним запросом на пачку.
+        timeline.fan_out_many(recipe_ids)
+        send_recipes_changed(recipe_ids)
+    return recipe_ids
+
+
+def _import_chunk(chunk, author, report):
+    rows = []
+    failed = []
+    for number, line in chunk:
+        data, errors = _validate(line, author)
+        if errors:
+            failed.append({'line': number, 'errors': errors})
+        else:
+            rows.append((number, data))
+    valid = []
+    for number, data, errors in _resolve(rows):
+        if errors:
+            failed.append({'line': number, 'errors': errors})
+        else:
+            valid.append((number, data))
+    if valid:
+        report['created'].extend(_write(valid))
+    report['errors'].extend(sorted(failed, key=lambda error: error['line']))
+
+
+def import_recipes(lines, author=None, chunk_size=None):
+    """
+    Импортирует рецепты из строк JSON Lines (str или bytes) и возвращает
+    отчёт {'created': [id рецептов], 'errors': [{'line', 'errors'}]}.
+    author — автор рецептов, у которых поле author не задано.
+    """
+    chunk_size = chunk_size or settings.RECIPE_IMPORT_CHUNK_SIZE
+    report = {'created': [], 'errors': []}
+    chunk = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        chunk.append((number, line))
+        if len(chunk) == chunk_size:
+            _import_chunk(chunk, author, report)
+            chunk = []
+    if chunk:
+        _import_chunk(chunk, author, report)
+    return report
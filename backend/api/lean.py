@@ -0,0 +1,164 @@
+"""
+Ответы списков без сериализаторов DRF.
+
+Словари собираются прямо из строк values_list(); схема ответа та же, что
+у RecipeCardSerializer и FollowListSerializer. Совпадение с
+TakeRecipeSerializer проверяет api/tests/test_lean.py.
+"""
+from django.db import connection
+
+from recipe.models import IngredientInRecipe, Recipe
+
+IMAGE_STORAGE = Recipe._meta.get_field('image').storage
+
+
+def image_url(name):
+    return IMAGE_STORAGE.url(name) if name else None
+
+
+def recipe_cards(recipe_ids):
+    """Карточки рецептов {id: данные}, как у RecipeCardSerializer."""
+    # Теги читаются вместе со связями, а не из кэша справочника: кэш
+    # процесса не знает о тегах, созданных и изменённых в других воркерах.
+    recipe_tags = {}
+    for recipe_id, *tag in (
+        Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+        .order_by('tag_id')
+        .values_list(
+            'recipe_id', 'tag_id', 'tag__name', 'tag__color', 'tag__slug'
+        )
+    ):
+        recipe_tags.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'name', 'color', 'slug'), tag))
+        )
+    ingredients = {}
+    for recipe_id, *ingredient in IngredientInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list(
+        'recipe_id',
+        'ingredient_id',
+        'ingredient__measurement_unit',
+        'ingredient__name',
+        'amount',
+    ):
+        ingredients.setdefault(recipe_id, []).append(
+            dict(zip(('id', 'measurement_unit', 'name', 'amount'), ingredient))
+        )
+    cards = {}
+    for (
+        recipe_id,
+        name,
+        text,
+        image,
+        cooking_time,
+        author_id,
+        username,
+        email,
+        first_name,
+        last_name,
+    ) in (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .order_by()
+        .values_list(
+            'id',
+            'name',
+            'text',
+            'image',
+            'cooking_time',
+            'author_id',
+            'author__username',
+            'author__email',
+            'author__first_name',
+            'author__last_name',
+        )
+    ):
+        cards[recipe_id] = {
+            'id': recipe_id,
+            'name': name,
+            'author': {
+                'id': author_id,
+                'username': username,
+                'email': email,
+                'first_name': first_name,
+                'last_name': last_name,
+            },
+            'text': text,
+            'image': image_url(image),
+            'cooking_time': cooking_time,
+            'ingredients': ingredients.get(recipe_id, []),
+            'tags': recipe_tags.get(recipe_id, []),
+        }
+    return cards
+
+
+def _recipes_by_author(author_ids, limit):
+    """Как serializers.recipes_by_author, но строками values_list()."""
+    if not author_ids:
+        return {}
+    queryset = Recipe.objects.order_by('-id').values_list(
+        'author_id', 'id', 'name', 'image', 'cooking_time'
+    )
+    if limit and connection.features.supports_slicing_ordering_in_compound:
+        first, *others = [
+            queryset.filter(author_id=author_id)[:limit]
+            for author_id in author_ids
+        ]
+        rows = first.union(*others, all=True) if others else first
+    else:
+        rows = queryset.filter(author_id__in=author_ids)
+    grouped = {author_id: [] for author_id in author_ids}
+    for author_id, recipe_id, name, image, cooking_time in sorted(
+        rows, key=lambda row: -row[1]
+    ):
+        grouped[author_id].append(
+            {
+                'id': recipe_id,
+                'name': name,
+                'image': image_url(image),
+                'cooking_time': cooking_time,
+            }
+        )
+    if limit:
+        grouped = {
+            author_id: recipes[:limit]
+            for author_id, recipes in grouped.items()
+        }
+    return grouped
+
+
+SUBSCRIPTION_FIELDS = (
+    'author_id',
+    'author__username',
+    'author__email',
+    'author__first_name',
+    'author__last_name',
+    'recipes_count',
+)
+
+
+def subscriptions(rows, limit=None):
+    """
+    Ответ FollowListSerializer для строк подписок со столбцами
+    SUBSCRIPTION_FIELDS.
+    """
+    author_recipes = _recipes_by_author([row[0] for row in rows], limit)
+    return [
+        {
+            'id': author_id,
+            'username': username,
+            'email': email,
+            'first_name': first_name,
+            'last_name': last_name,
+            'is_subscribed': True,
+            'recipes': author_recipes[author_id],
+            'recipes_count': recipes_count,
+        }
+        for (
+            author_id,
+            username,
+            email,
+            first_name,
+            last_name,
+            recipes_count,
+        ) in rows
+    ]
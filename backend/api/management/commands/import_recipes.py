@@ -0,0 +1,56 @@
+import json
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.imports import import_recipes
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует рецепты из файла JSON Lines (- — стандартный ввод). '
+        'Строки с ошибками пропускаются и выводятся в stderr.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument(
+            '--author',
+            help='Имя автора рецептов, у которых поле author не задано.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=settings.RECIPE_IMPORT_CHUNK_SIZE,
+            help='Сколько строк записывать одной транзакцией.',
+        )
+
+    def handle(self, *args, **options):
+        author = None
+        if options['author']:
+            try:
+                author = User.objects.get(username=options['author'])
+            except User.DoesNotExist:
+                raise CommandError(
+                    f'Пользователь {options["author"]} не найден.'
+                )
+        started = time.monotonic()
+        if options['path'] == '-':
+            report = import_recipes(
+                sys.stdin.buffer, author, options['chunk_size']
+            )
+        else:
+            with open(options['path'], 'rb') as file:
+                report = import_recipes(file, author, options['chunk_size'])
+        elapsed = time.monotonic() - started
+        for error in report['errors']:
+            self.stderr.write(json.dumps(error, ensure_ascii=False))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Импортировано рецептов: {len(report["created"])}, строк с '
+                f'ошибками: {len(report["errors"])} за {elapsed:.1f} с.'
+            )
+        )
@@ -0,0 +1,93 @@
+import signal
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import documents
+from api.pdf import register_font
+from api.warmup import warm_up_documents
+from recipe import rankings
+
+EXPIRE_INTERVAL = 60
+
+
+class Command(BaseCommand):
+    help = (
+        'Строит документы из очереди DocumentJob (список покупок в PDF) в '
+        'пуле процессов и раз в RANKING_REFRESH_INTERVAL секунд '
+        'пересчитывает рейтинги рецептов. Работает, пока не остановят; с '
+        '--once обрабатывает очередь и завершается.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.DOCUMENT_WORKER_PROCESSES,
+            help='Число процессов, строящих документы.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза между проверками пустой очереди, в секундах.',
+        )
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        processes = options['processes']
+        warm_up_documents()
+        rendered = 0
+        expired_at = 0.0
+        ranked_at = 0.0
+        executor = self.executor(processes)
+        try:
+            while not self.stopping:
+                if time.monotonic() - expired_at > EXPIRE_INTERVAL:
+                    documents.expire()
+                    expired_at = time.monotonic()
+                if self.rankings_due(ranked_at):
+                    rankings.refresh()
+                    ranked_at = time.monotonic()
+                try:
+                    count = documents.run(executor, processes)
+                except BrokenProcessPool:
+                    # Процесс пула упал; его задания вернутся в очередь по
+                    # DOCUMENT_JOB_TIMEOUT.
+                    executor.shutdown(cancel_futures=True)
+                    executor = self.executor(processes)
+                    continue
+                rendered += count
+                if count:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        finally:
+            executor.shutdown(cancel_futures=True)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано заданий: {rendered}.')
+        )
+
+    @staticmethod
+    def rankings_due(ranked_at):
+        interval = settings.RANKING_REFRESH_INTERVAL
+        return interval > 0 and time.monotonic() - ranked_at > interval
+
+    @staticmethod
+    def executor(processes):
+        # Процессы не пользуются базой: соединения закрываются, чтобы не
+        # достаться им при fork.
+        connections.close_all()
+        # Шрифт уже зарегистрирован в родителе; initializer нужен, если
+        # процессы запускаются без fork.
+        return ProcessPoolExecutor(processes, initializer=register_font)
+
+    def stop(self, signum, frame):
+        self.stopping = True
@@ -0,0 +1,94 @@
+import json
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from backend.db import slow
+
+SORT_KEYS = {
+    'total': 'total_ms',
+    'count': 'count',
+    'p95': 'p95_ms',
+    'max': 'max_ms',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сводка журнала медленных SQL-запросов по отпечаткам: число, '
+        'суммарное время, перцентили, представления и места вызова.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--log',
+            default=settings.SLOW_QUERY_LOG,
+            help='Файл журнала; по умолчанию SLOW_QUERY_LOG.',
+        )
+        parser.add_argument(
+            '--hours',
+            type=float,
+            help='Учитывать только записи за последние часы.',
+        )
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='total', help='Порядок.'
+        )
+        parser.add_argument('--top', type=int, default=20)
+        parser.add_argument(
+            '--plans', action='store_true', help='Показать планы запросов.'
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести сводку в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['log']:
+            raise CommandError(
+                'Журнал не задан: укажите --log или SLOW_QUERY_LOG.'
+            )
+        since = None
+        if options['hours'] is not None:
+            since = (
+                timezone.now() - timedelta(hours=options['hours'])
+            ).isoformat()
+        summary = sorted(
+            slow.summarize(slow.read(options['log']), since),
+            key=lambda group: group[SORT_KEYS[options['sort']]],
+            reverse=True,
+        )[: options['top']]
+        if options['json']:
+            self.stdout.write(
+                json.dumps(summary, indent=2, ensure_ascii=False)
+            )
+            return
+        if not summary:
+            self.stdout.write('Медленных запросов нет.')
+            return
+        for group in summary:
+            self.stdout.write(
+                self.style.WARNING(
+                    f'{group["fingerprint"]}  {group["count"]} раз, '
+                    f'всего {group["total_ms"]:.0f} мс, '
+                    f'p50 {group["p50_ms"]:.0f} / p95 {group["p95_ms"]:.0f} / '
+                    f'p99 {group["p99_ms"]:.0f} / max {group["max_ms"]:.0f} мс'
+                )
+            )
+            self.stdout.write(f'  {group["sql"][:300]}')
+            for title, name in (
+                ('представления', 'views'),
+                ('сериализаторы', 'serializers'),
+                ('места вызова', 'call_sites'),
+            ):
+                if group[name]:
+                    counts = ', '.join(
+                        f'{key} ({count})'
+                        for key, count in group[name].items()
+                    )
+                    self.stdout.write(f'  {title}: {counts}')
+            if options['plans'] and group['plan']:
+                self.stdout.write('  план:')
+                for line in group['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+            self.stdout.write('')
@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from backend.startup import profile
+
+MB = 1024 * 1024
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает время импорта и память django.setup() и загрузки '
+        'URLconf по фазам и пакетам. Замер идёт в отдельном процессе.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=20,
+            help='Сколько самых медленных пакетов показать.',
+        )
+        parser.add_argument(
+            '--no-memory',
+            action='store_true',
+            help='Не замерять память по пакетам (это самая долгая часть).',
+        )
+        parser.add_argument(
+            '--json', action='store_true', help='Вывести отчёт в JSON.'
+        )
+
+    def handle(self, *args, **options):
+        report = profile(memory=not options['no_memory'])
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for phase in report['phases']:
+            self.stdout.write(
+                f'{phase["name"]:<20} {phase["seconds"] * 1000:8.1f} мс '
+                f'{phase["rss"] / MB:8.1f} МБ'
+            )
+        self.stdout.write(
+            f'{"Всего":<20} {report["seconds"] * 1000:8.1f} мс '
+            f'{report["rss"] / MB:8.1f} МБ RSS\n'
+        )
+        packages = sorted(
+            report['packages'].items(),
+            key=lambda item: item[1]['seconds'],
+            reverse=True,
+        )
+        self.stdout.write(f'{"Пакет":<20} {"импорт":>11} {"память":>11}')
+        for name, package in packages[: options['top']]:
+            self.stdout.write(
+                f'{name:<20} {package["seconds"] * 1000:8.1f} мс '
+                f'{package["memory"] / MB:8.1f} МБ'
+            )
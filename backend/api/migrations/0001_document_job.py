@@ -0,0 +1,90 @@
+# Generated by Django 3.2 on 2026-10-19 11:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentJob',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'key',
+                    models.CharField(
+                        max_length=64,
+                        unique=True,
+                        verbose_name='Хэш содержимого',
+                    ),
+                ),
+                ('payload', models.JSONField(verbose_name='Данные документа')),
+                (
+                    'status',
+                    models.CharField(
+                        choices=[
+                            ('pending', 'В очереди'),
+                            ('running', 'Строится'),
+                            ('done', 'Готов'),
+                            ('failed', 'Ошибка'),
+                        ],
+                        default='pending',
+                        max_length=16,
+                        verbose_name='Состояние',
+                    ),
+                ),
+                (
+                    'attempts',
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name='Попыток'
+                    ),
+                ),
+                (
+                    'file',
+                    models.FileField(
+                        blank=True, upload_to='documents/', verbose_name='Файл'
+                    ),
+                ),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                (
+                    'created_at',
+                    models.DateTimeField(
+                        auto_now_add=True, verbose_name='Создано'
+                    ),
+                ),
+                (
+                    'started_at',
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name='Начато'
+                    ),
+                ),
+                (
+                    'finished_at',
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name='Завершено'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Построение документа',
+                'verbose_name_plural': 'Построение документов',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='documentjob',
+            index=models.Index(
+                fields=['status', 'id'], name='document_job_status_idx'
+            ),
+        ),
+    ]
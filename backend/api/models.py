@@ -0,0 +1,45 @@
+from django.db import models
+
+
+class DocumentJob(models.Model):
+    """
+    Задание на построение документа; см. api/documents.py.
+
+    Ключ — хэш содержимого документа, поэтому одинаковые списки покупок
+    строятся один раз и отдаются из готового файла.
+    """
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Строится'),
+        (DONE, 'Готов'),
+        (FAILED, 'Ошибка'),
+    )
+
+    key = models.CharField('Хэш содержимого', max_length=64, unique=True)
+    payload = models.JSONField('Данные документа')
+    status = models.CharField(
+        'Состояние', max_length=16, choices=STATUS_CHOICES, default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    file = models.FileField('Файл', upload_to='documents/', blank=True)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создано', auto_now_add=True)
+    started_at = models.DateTimeField('Начато', null=True, blank=True)
+    finished_at = models.DateTimeField('Завершено', null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Построение документа'
+        verbose_name_plural = 'Построение документов'
+        indexes = [
+            models.Index(
+                fields=['status', 'id'], name='document_job_status_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.key[:12]}: {self.status}'
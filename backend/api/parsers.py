@@ -0,0 +1,48 @@
+import io
+import re
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser, JSONParser
+
+from .renderers import FastJSONRenderer, orjson
+
+# orjson превращает целые больше 64 бит во float, а json — нет.
+LONG_NUMBER = re.compile(rb'\d{19,}')
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSONParser на orjson.
+
+    Тело в UTF-8 разбирается orjson. Если orjson не установлен, кодировка
+    другая, в теле есть очень длинные числа или orjson не смог разобрать
+    тело, работает стандартный JSONParser: он же формирует текст ошибки,
+    поэтому ответы на некорректный JSON не меняются.
+    """
+
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or not self.strict or encoding.lower() != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        if not LONG_NUMBER.search(body):
+            try:
+                return orjson.loads(body)
+            except orjson.JSONDecodeError:
+                pass
+        return super().parse(io.BytesIO(body), media_type, parser_context)
+
+
+class JSONLinesParser(BaseParser):
+    """
+    Тело в формате JSON Lines. Возвращает список строк: каждая разбирается
+    отдельно, чтобы ошибка в одной не мешала остальным.
+    """
+
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return stream.read().splitlines()
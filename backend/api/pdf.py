@@ -0,0 +1,48 @@
+"""
+Построение PDF. Модуль импортирует reportlab, поэтому загружается только
+процессами воркера документов (render_documents), а не веб-воркерами.
+"""
+from io import BytesIO
+from pathlib import Path
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+FONT_NAME = 'arialmt'
+FONT_PATH = Path(__file__).resolve().parent / 'front' / 'arialmt.ttf'
+
+
+def register_font():
+    if FONT_NAME not in pdfmetrics.getRegisteredFontNames():
+        pdfmetrics.registerFont(TTFont(FONT_NAME, FONT_PATH))
+
+
+def render_shopping_cart_pdf(rows):
+    """PDF списка покупок; выполняется в процессах воркера документов."""
+    buffer = BytesIO()
+
+    register_font()
+
+    p = canvas.Canvas(buffer, pagesize=letter)
+    p.setFont(FONT_NAME, 12)
+
+    title = 'Корзина покупок'
+    title_font = FONT_NAME
+    title_size = 24
+    p.setFont(title_font, title_size)
+    title_width = p.stringWidth(title, title_font, title_size)
+    title_x = (letter[0] - title_width) / 2
+    title_y = 750
+    p.drawString(title_x, title_y, title)
+
+    y = 700
+    for name, measurement_unit, amount in rows:
+        y -= 20
+        p.drawString(100, y, f'{name} - {amount} {measurement_unit}')
+
+    p.showPage()
+    p.save()
+
+    return buffer.getvalue()
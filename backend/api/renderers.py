@@ -0,0 +1,58 @@
+import time
+
+from rest_framework.renderers import JSONRenderer
+
+from backend import metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson с тем же результатом байт в байт.
+
+    orjson включается только в режиме по умолчанию (компактный вывод,
+    UNICODE_JSON, STRICT_JSON, без отступов). Типы, которых orjson не знает
+    или кодирует иначе (datetime, Decimal, ленивые строки), уходят в
+    JSONEncoder из DRF. Если orjson не установлен или не справился (большие
+    целые, нестроковые ключи), работает стандартный JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        started = time.perf_counter()
+        try:
+            return self.encode(data, accepted_media_type, renderer_context)
+        finally:
+            metrics.record_render(time.perf_counter() - started)
+
+    def encode(self, data, accepted_media_type, renderer_context):
+        if not self.use_orjson(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # Как и DRF, экранируем U+2028 и U+2029 ради совместимости с JS.
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029'
+        )
+
+    def use_orjson(self, accepted_media_type, renderer_context):
+        return (
+            orjson is not None
+            and self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.get_indent(accepted_media_type, renderer_context or {})
+            is None
+        )
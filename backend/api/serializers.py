@@ -1,10 +1,14 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import transaction
+from django.db import connection, transaction
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 
+from recipe.indexes.ingredients import MATCH_LIMIT, MAX_MATCH_LIMIT
+from recipe.indexes.similar import MAX_SIMILAR_LIMIT, SIMILAR_LIMIT
 from recipe.models import Ingredient, IngredientInRecipe, Recipe, Tag
+from recipe.signals import send_recipes_changed
+from recipe.timeline import FEED_LIMIT, MAX_FEED_LIMIT
 from users.models import Follow, User
 
 
@@ -52,9 +56,24 @@ class UserSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         return (
             request.user.is_authenticated
-            and request.user.follower.filter(author=obj).exists()
+            and obj.id in self.subscribed_author_ids(request.user)
         )
 
+    def subscribed_author_ids(self, user):
+        # Подписки читаются один раз на весь ответ, а не на каждого автора.
+        author_ids = self.context.get('subscribed_author_ids')
+        if author_ids is None:
+            author_ids = set(user.follower.values_list('author_id', flat=True))
+            self.context['subscribed_author_ids'] = author_ids
+        return author_ids
+
+
+class RecipeAuthorSerializer(UserSerializer):
+    """Автор в карточке рецепта: без флага подписки."""
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields[:-1]
+
 
 class IngredientTakeRecipeSerializer(serializers.ModelSerializer):
     id = serializers.ReadOnlyField(source='ingredient.id')
@@ -69,8 +88,35 @@ class IngredientTakeRecipeSerializer(serializers.ModelSerializer):
         read_only = ('id', 'measurement_unit', 'name')
 
 
+class BatchPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField без запроса на каждый id: объект берётся из
+    словаря, который корневой сериализатор собирает одним запросом IN по
+    всем id этой модели в теле запроса (метод references). Ошибки те же,
+    что у PrimaryKeyRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        references = getattr(self.root, 'references', None)
+        if references is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        try:
+            if isinstance(data, bool):
+                raise TypeError
+            pk = self.queryset.model._meta.pk.get_prep_value(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        requested, found = references(self.queryset)
+        if pk not in requested:
+            # id не нашёлся в теле запроса там, где его ищет references.
+            return super().to_internal_value(data)
+        if pk not in found:
+            self.fail('does_not_exist', pk_value=data)
+        return found[pk]
+
+
 class IngredientInCreateRecipeSerializer(serializers.Serializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = BatchPrimaryKeyRelatedField(queryset=Ingredient.objects.all())
     amount = serializers.IntegerField(validators=[MinValueValidator(1)])
 
     class Meta:
@@ -106,6 +152,8 @@ class TakeRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, recipe):
+        if hasattr(recipe, 'is_favorited'):
+            return recipe.is_favorited
         request = self.context.get('request')
 
         return (
@@ -114,6 +162,8 @@ class TakeRecipeSerializer(serializers.ModelSerializer):
         )
 
     def get_is_in_shopping_cart(self, recipe):
+        if hasattr(recipe, 'is_in_shopping_cart'):
+            return recipe.is_in_shopping_cart
         request = self.context.get('request')
         return (
             request.user.is_authenticated
@@ -121,8 +171,20 @@ class TakeRecipeSerializer(serializers.ModelSerializer):
         )
 
 
+class RecipeCardSerializer(TakeRecipeSerializer):
+    """
+    Общая для всех пользователей часть TakeRecipeSerializer; картинка —
+    относительным адресом. См. api/cards.py.
+    """
+
+    author = RecipeAuthorSerializer()
+
+    class Meta(TakeRecipeSerializer.Meta):
+        fields = TakeRecipeSerializer.Meta.fields[:-2]
+
+
 class CreateRecipeSerializer(serializers.ModelSerializer):
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = BatchPrimaryKeyRelatedField(
         queryset=Tag.objects.all(),
         many=True,
     )
@@ -150,6 +212,44 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             'tags',
         )
 
+    def referenced_ids(self, model):
+        """id объектов model в теле запроса."""
+        values = None
+        if model is Tag:
+            values = self.initial_data.get('tags')
+        elif model is Ingredient:
+            ingredients = self.initial_data.get('ingredients')
+            values = [
+                ingredient.get('id')
+                for ingredient in (
+                    ingredients if isinstance(ingredients, list) else []
+                )
+                if isinstance(ingredient, dict)
+            ]
+        return values if isinstance(values, list) else []
+
+    def references(self, queryset):
+        """
+        id объектов модели queryset из тела запроса и словарь найденных
+        объектов {id: объект}; читается одним запросом на модель.
+        """
+        model = queryset.model
+        if not hasattr(self, '_references'):
+            self._references = {}
+        if model not in self._references:
+            requested = set()
+            for value in self.referenced_ids(model):
+                try:
+                    if not isinstance(value, bool):
+                        requested.add(model._meta.pk.get_prep_value(value))
+                except (TypeError, ValueError):
+                    pass
+            self._references[model] = (
+                requested,
+                queryset.in_bulk(requested) if requested else {},
+            )
+        return self._references[model]
+
     @staticmethod
     def create_ingredients_in_recipe(recipe, ingredients):
         IngredientInRecipe.objects.bulk_create(
@@ -172,6 +272,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         CreateRecipeSerializer.create_ingredients_in_recipe(
             recipe, ingredients_data
         )
+        send_recipes_changed([recipe.pk])
         return recipe
 
     @transaction.atomic
@@ -186,6 +287,7 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
             recipe, ingredients
         )
         super().update(recipe, validated_data)
+        send_recipes_changed([recipe.pk])
         return recipe
 
     def validate(self, attrs):
@@ -219,6 +321,59 @@ class CreateRecipeSerializer(serializers.ModelSerializer):
         ).data
 
 
+class RecipeImportIngredientSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    amount = serializers.IntegerField(validators=[MinValueValidator(1)])
+
+
+class RecipeImportSerializer(CreateRecipeSerializer):
+    """
+    Строка импорта рецептов; см. api/imports.py. Автор, теги и ингредиенты
+    заданы id, их наличие в базе проверяется сразу для всей пачки.
+    """
+
+    author = serializers.IntegerField(required=False)
+    tags = serializers.ListField(child=serializers.IntegerField())
+    ingredients = RecipeImportIngredientSerializer(many=True)
+    image = Base64ImageField(required=False)
+
+
+class RecipeMatchQuerySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=100,
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_MATCH_LIMIT, default=MATCH_LIMIT
+    )
+
+    def to_internal_value(self, data):
+        # ingredients=1,2,3 и ingredients=1&ingredients=2 равнозначны.
+        values = {'limit': data.get('limit', MATCH_LIMIT)}
+        if 'ingredients' in data:
+            values['ingredients'] = [
+                value
+                for item in data.getlist('ingredients')
+                for value in item.split(',')
+                if value
+            ]
+        return super().to_internal_value(values)
+
+
+class RecipeSimilarQuerySerializer(serializers.Serializer):
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_SIMILAR_LIMIT, default=SIMILAR_LIMIT
+    )
+
+
+class RecipeFeedQuerySerializer(serializers.Serializer):
+    before = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=MAX_FEED_LIMIT, default=FEED_LIMIT
+    )
+
+
 class RecipeSubscribeSerializer(serializers.ModelSerializer):
     image = Base64ImageField()
 
@@ -233,6 +388,35 @@ class RecipeSubscribeSerializer(serializers.ModelSerializer):
         read_only_fields = fields
 
 
+def recipes_by_author(author_ids, limit=None):
+    """
+    Рецепты нескольких авторов одним запросом, не больше ``limit`` на
+    автора.
+    """
+    if not author_ids:
+        return {}
+    queryset = Recipe.objects.only(
+        'id', 'name', 'image', 'cooking_time', 'author_id'
+    )
+    if limit and connection.features.supports_slicing_ordering_in_compound:
+        first, *others = [
+            queryset.filter(author_id=author_id)[:limit]
+            for author_id in author_ids
+        ]
+        recipes = first.union(*others, all=True) if others else first
+    else:
+        recipes = queryset.filter(author_id__in=author_ids)
+    grouped = {author_id: [] for author_id in author_ids}
+    for recipe in sorted(recipes, key=lambda recipe: -recipe.id):
+        grouped[recipe.author_id].append(recipe)
+    if limit:
+        grouped = {
+            author_id: recipes[:limit]
+            for author_id, recipes in grouped.items()
+        }
+    return grouped
+
+
 class FollowListSerializer(UserSerializer):
     id = serializers.ReadOnlyField(source='author.id')
     email = serializers.ReadOnlyField(source='author.email')
@@ -241,7 +425,7 @@ class FollowListSerializer(UserSerializer):
     last_name = serializers.ReadOnlyField(source='author.last_name')
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.ReadOnlyField(source='author.recipes.count')
+    recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Follow
@@ -257,15 +441,25 @@ class FollowListSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.filter(user=obj.user, author=obj.author).exists()
+        # Сериализуется сама подписка, поэтому она существует, если уже
+        # сохранена в базе.
+        return obj.pk is not None
 
     def get_recipes(self, obj):
         request = self.context.get('request')
         limit = request.GET.get('recipes_limit')
-        queryset = Recipe.objects.filter(author=obj.author)
-        if limit:
-            queryset = queryset[: int(limit)]
-        return RecipeSubscribeSerializer(queryset, many=True).data
+        limit = int(limit) if limit else None
+        author_recipes = self.context.get('author_recipes')
+        if author_recipes is None or obj.author_id not in author_recipes:
+            author_recipes = recipes_by_author([obj.author_id], limit)
+        return RecipeSubscribeSerializer(
+            author_recipes[obj.author_id], many=True
+        ).data
+
+    def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
+        return obj.author.recipes.count()
 
 
 class AddInFavouriteSerializer(serializers.ModelSerializer):
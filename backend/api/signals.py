@@ -0,0 +1,32 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from recipe.models import Ingredient, Recipe, Tag
+from recipe.signals import touch
+from users.models import User
+
+from .cache import invalidate_ingredients, invalidate_tags
+from .serializers import RecipeAuthorSerializer
+
+# Поля автора, которые попадают в карточку рецепта.
+AUTHOR_FIELDS = frozenset(RecipeAuthorSerializer.Meta.fields) - {'id'}
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def tag_changed(sender, **kwargs):
+    invalidate_tags()
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def ingredient_changed(sender, **kwargs):
+    invalidate_ingredients()
+
+
+# Поля автора видны в карточках его рецептов (api/cards.py).
+@receiver(post_save, sender=User)
+def author_saved(sender, instance, created, using, update_fields, **kwargs):
+    if created or (
+        update_fields is not None and not AUTHOR_FIELDS & set(update_fields)
+    ):
+        return
+    touch(Recipe.objects.using(using).filter(author_id=instance.pk))
@@ -0,0 +1,139 @@
+"""
+Ответы api/lean.py и api/cards.py совпадают с сериализаторами DRF.
+"""
+import json
+import tempfile
+
+from django.db.models import Count, Prefetch
+from django.test import RequestFactory, TestCase, override_settings
+
+from api import lean
+from api.cache import get_tags
+from api.cards import recipe_cards
+from api.serializers import (
+    FollowListSerializer,
+    TakeRecipeSerializer,
+    recipes_by_author,
+)
+from benchmarks.seed import seed
+from recipe.models import (
+    Favourite,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from users.models import Follow, User
+
+RECIPES_LIMIT = 2
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False)
+
+
+@override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(), RECIPE_INDEX_DIR=tempfile.mkdtemp()
+)
+class LeanResponsesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seed(
+            users=5,
+            recipes=12,
+            favorites_per_user=4,
+            carts_per_user=3,
+            follows_per_user=3,
+            ingredients_per_recipe=4,
+            tags_per_recipe=2,
+        )
+        cls.user = User.objects.get(pk=1)
+        cls.recipe_ids = list(
+            Recipe.objects.order_by('-id').values_list('id', flat=True)
+        )
+
+    def request(self, path='/api/recipes/', **params):
+        request = RequestFactory().get(path, params)
+        request.user = self.user
+        return request
+
+    def serialized_recipes(self, request):
+        recipes = (
+            Recipe.objects.filter(id__in=self.recipe_ids)
+            .select_related('author')
+            .prefetch_related(
+                'tags',
+                Prefetch(
+                    'ingredients_for_recipes',
+                    queryset=IngredientInRecipe.objects.select_related(
+                        'ingredient'
+                    ),
+                ),
+            )
+        )
+        return TakeRecipeSerializer(
+            recipes, many=True, context={'request': request}
+        ).data
+
+    def test_recipe_cards_match_take_recipe_serializer(self):
+        request = self.request()
+        cards = recipe_cards(request, self.recipe_ids)
+        self.assertTrue(
+            Favourite.objects.filter(
+                user=self.user, recipe_id__in=self.recipe_ids
+            ).exists()
+        )
+        self.assertTrue(
+            ShoppingCart.objects.filter(
+                user=self.user, recipe_id__in=self.recipe_ids
+            ).exists()
+        )
+        self.assertEqual(
+            _dumps(list(cards.values())),
+            _dumps(self.serialized_recipes(request)),
+        )
+
+    def test_tags_changed_in_another_worker(self):
+        # Кэш справочника прогрет, а тег создан и другой переименован без
+        # сигналов, как в другом воркере с кэшем, локальным для процесса.
+        get_tags()
+        Tag.objects.bulk_create(
+            [Tag(id=100, name='новый', color='#123456', slug='new')]
+        )
+        Tag.objects.filter(pk=1).update(name='переименованный')
+        recipe_id = self.recipe_ids[0]
+        Recipe.tags.through.objects.create(recipe_id=recipe_id, tag_id=100)
+        Recipe.tags.through.objects.get_or_create(
+            recipe_id=recipe_id, tag_id=1
+        )
+        tags = lean.recipe_cards([recipe_id])[recipe_id]['tags']
+        self.assertEqual(
+            {tag['id']: tag['name'] for tag in tags if tag['id'] in (1, 100)},
+            {1: 'переименованный', 100: 'новый'},
+        )
+
+    def test_subscriptions_match_follow_list_serializer(self):
+        request = self.request(
+            '/api/users/subscriptions/', recipes_limit=RECIPES_LIMIT
+        )
+        follows = Follow.objects.filter(user=self.user).order_by('author_id')
+        self.assertTrue(follows.exists())
+        rows = follows.annotate(
+            recipes_count=Count('author__recipes')
+        ).values_list(*lean.SUBSCRIPTION_FIELDS)
+        serialized = FollowListSerializer(
+            follows.select_related('author').annotate(
+                recipes_count=Count('author__recipes')
+            ),
+            many=True,
+            context={
+                'request': request,
+                'author_recipes': recipes_by_author(
+                    [follow.author_id for follow in follows], RECIPES_LIMIT
+                ),
+            },
+        ).data
+        self.assertEqual(
+            _dumps(lean.subscriptions(rows, RECIPES_LIMIT)),
+            _dumps(serialized),
+        )
@@ -0,0 +1,72 @@
+"""
+Бюджеты SQL-запросов горячих эндпоинтов.
+
+Те же сценарии и объёмы данных, что у ``python -m benchmarks budgets``.
+Число запросов сверяется с бюджетом точно и на обоих объёмах, поэтому
+N+1 (рост числа запросов вместе с размером страницы) роняет тесты.
+"""
+import tempfile
+
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+
+from benchmarks.budgets import BUDGETS, SIZES
+from benchmarks.runner import _request
+from benchmarks.scenarios import SCENARIOS, BenchContext
+from benchmarks.seed import seed
+
+# Горячие эндпоинты: те, что нагружаются в HTTP-бенчмарке.
+HOT_SCENARIOS = [item for item in SCENARIOS if item.http]
+# Файлы индексов и картинок не попадают в рабочие каталоги, а один клиент
+# делает много запросов подряд.
+isolated = override_settings(
+    MEDIA_ROOT=tempfile.mkdtemp(),
+    RECIPE_INDEX_DIR=tempfile.mkdtemp(),
+    THROTTLE_BUCKET_CAPACITY=10**9,
+)
+
+
+class QueryBudgetMixin:
+    volumes = None
+
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        seed(**cls.volumes)
+
+    def setUp(self):
+        cache.clear()
+        self.ctx = BenchContext()
+        self.client = Client()
+
+    def test_hot_endpoints(self):
+        for item in HOT_SCENARIOS:
+            with self.subTest(item.name):
+                # Первый запрос прогревает кэши справочников и карточек,
+                # как в бенчмарке; бюджет относится ко второму.
+                for attempt in range(2):
+                    # Журнал изменений рецептов пишется после фиксации
+                    # транзакции, а тест её не фиксирует.
+                    with self.captureOnCommitCallbacks(execute=True):
+                        call = item.prepare(self.ctx)
+                    if attempt:
+                        with self.assertNumQueries(BUDGETS[item.name]):
+                            response = _request(
+                                self.client, self.ctx, item, call
+                            )
+                    else:
+                        response = _request(self.client, self.ctx, item, call)
+                    if call.cleanup:
+                        with self.captureOnCommitCallbacks(execute=True):
+                            call.cleanup()
+                    self.assertLess(response.status_code, 400)
+
+
+@isolated
+class SmallDataQueryBudgetTests(QueryBudgetMixin, TestCase):
+    volumes = SIZES[0]
+
+
+@isolated
+class LargeDataQueryBudgetTests(QueryBudgetMixin, TestCase):
+    volumes = SIZES[1]
@@ -0,0 +1,145 @@
+"""
+Ограничение частоты запросов с учётом их стоимости.
+
+У каждого клиента есть ведро на THROTTLE_BUCKET_CAPACITY жетонов, которое
+пополняется со скоростью THROTTLE_REFILL_RATE жетонов в секунду. Ведро
+выбирается после аутентификации: у пользователя — по его id, у анонимного
+запроса — по IP клиента (REST_FRAMEWORK['NUM_PROXIES'] и X-Forwarded-For
+от nginx), поэтому подделанные заголовки не дают нового ведра. Запрос забирает столько жетонов,
+сколько стоит: THROTTLE_COSTS по методу и имени маршрута плюс жетон за
+каждые THROTTLE_BYTES_PER_TOKEN байт тела. Построение PDF и загрузка
+картинок расходуют лимит быстрее, чем чтение списков. Неверные токены
+ограничивает ThrottledTokenAuthentication.
+
+Ведро хранится в общем кэше одним числом — временем, когда оно снова
+станет полным (GCRA). Отказ запоминается и в памяти процесса: пока клиент
+ждёт, его запросы отклоняются без обращения к кэшу. В кэше нет атомарного
+сравнения с заменой, поэтому одновременные запросы одного клиента в разных
+воркерах могут немного превысить лимит.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed, Throttled
+from rest_framework.throttling import BaseThrottle
+
+from backend import metrics
+
+# Сколько отказов держать в памяти процесса до чистки устаревших.
+MAX_BLOCKED = 10000
+
+# Ключ ведра: время, до которого отклоняется даже запрос за один жетон.
+_blocked = {}
+_blocked_lock = threading.Lock()
+
+
+def _block(key, until, now):
+    with _blocked_lock:
+        if len(_blocked) >= MAX_BLOCKED:
+            for stale in [
+                stale for stale, moment in _blocked.items() if moment <= now
+            ]:
+                del _blocked[stale]
+        _blocked[key] = until
+
+
+def take(key, cost):
+    """
+    Забирает cost жетонов из ведра key. Возвращает None или сколько
+    секунд ждать, если жетонов не хватает.
+    """
+    now = time.time()
+    blocked_until = _blocked.get(key)
+    if blocked_until is not None and blocked_until > now:
+        return blocked_until - now
+    interval = 1 / settings.THROTTLE_REFILL_RATE
+    capacity = settings.THROTTLE_BUCKET_CAPACITY
+    cost = min(cost, capacity)
+    # full_at — когда ведро снова будет полным.
+    full_at = max(cache.get(key) or now, now)
+    overflow = full_at + (cost - capacity) * interval - now
+    if overflow > 0:
+        _block(key, full_at + (1 - capacity) * interval, now)
+        return overflow
+    full_at += cost * interval
+    cache.set(key, full_at, math.ceil(full_at - now))
+    return None
+
+
+def exhausted(key):
+    """Сколько секунд ждать до жетона в ведре key или None; не расходует."""
+    now = time.time()
+    blocked_until = _blocked.get(key)
+    if blocked_until is not None and blocked_until > now:
+        return blocked_until - now
+    interval = 1 / settings.THROTTLE_REFILL_RATE
+    full_at = cache.get(key) or now
+    wait = full_at + (1 - settings.THROTTLE_BUCKET_CAPACITY) * interval - now
+    return wait if wait > 0 else None
+
+
+def _count_throttled(request):
+    match = request.resolver_match
+    metrics.THROTTLED.labels(
+        match.view_name if match else '<unresolved>'
+    ).inc()
+
+
+class CostThrottle(BaseThrottle):
+    """
+    Ведро жетонов на пользователя после успешной аутентификации, без неё —
+    на IP клиента.
+    """
+
+    def get_cost(self, request):
+        match = request.resolver_match
+        name = f'{request.method} {match.url_name if match else None}'
+        cost = settings.THROTTLE_COSTS.get(name, 1)
+        try:
+            size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            size = 0
+        return cost + size // settings.THROTTLE_BYTES_PER_TOKEN
+
+    def get_cache_key(self, request):
+        if request.user.is_authenticated:
+            return f'throttle:user:{request.user.pk}'
+        return f'throttle:ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        wait = take(self.get_cache_key(request), self.get_cost(request))
+        if wait is None:
+            return True
+        self.retry_after = wait
+        _count_throttled(request)
+        return False
+
+    def wait(self):
+        return self.retry_after
+
+
+class ThrottledTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication, в которой неверные токены расходуют отдельное
+    ведро IP клиента. Пока оно пусто, токены с этого адреса не ищутся в
+    базе, а запрос получает 429: перебор токенов не даёт ни нового ведра,
+    ни бесплатных запросов к базе.
+    """
+
+    def authenticate(self, request):
+        if not request.META.get('HTTP_AUTHORIZATION'):
+            return None
+        key = f'throttle:auth-failures:{BaseThrottle().get_ident(request)}'
+        wait = exhausted(key)
+        if wait is not None:
+            _count_throttled(request)
+            raise Throttled(wait)
+        try:
+            return super().authenticate(request)
+        except AuthenticationFailed:
+            take(key, 1)
+            raise
@@ -1,7 +1,15 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from api.views import IngredientViewSet, RecipeViewSet, TagViewSet, UserViewSet
+from api.async_views import offload_patterns
+from api.views import (
+    DatabaseStatsView,
+    IngredientViewSet,
+    RecipeViewSet,
+    TagViewSet,
+    UserViewSet,
+)
 
 app_name = 'api'
 
@@ -11,7 +19,12 @@ router.register('ingredients', IngredientViewSet)
 router.register('recipes', RecipeViewSet)
 router.register('users', UserViewSet)
 
+router_urls = router.urls
+if settings.ASYNC_VIEWS:
+    router_urls = offload_patterns(router_urls)
+
 urlpatterns = [
-    path('', include(router.urls)),
+    path('', include(router_urls)),
     path('auth/', include('djoser.urls.authtoken')),
+    path('stats/db/', DatabaseStatsView.as_view(), name='stats-db'),
 ]
@@ -1,20 +1,45 @@
+from django.db.models import Count, Exists, OuterRef, Prefetch
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import filters, generics, permissions, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import (
     AllowAny,
+    IsAdminUser,
     IsAuthenticated,
     IsAuthenticatedOrReadOnly,
 )
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
 
-from recipe.models import Favourite, Ingredient, Recipe, ShoppingCart, Tag
+from backend.db.stats import connection_stats
+from recipe import rankings, timeline
+from recipe.indexes.ingredients import ingredient_index
+from recipe.indexes.similar import similar_index
+from recipe.models import (
+    Favourite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from recipe.search import highlight, search_snippets
 from users.models import Follow, User
 
+from . import documents, imports, lean
+from .cache import get_ingredients, get_tags
+from .cards import etag, memberships, recipe_cards
 from .filters import IngredientFilter, RecipeFilter
+from .models import DocumentJob
 from .pagination import CustomPagination
+from .parsers import JSONLinesParser
 from .permissions import IsOwnerOrReadOnly
 from .serializers import (
     AddInFavouriteSerializer,
@@ -22,11 +47,13 @@ from .serializers import (
     FollowingSerializer,
     FollowListSerializer,
     IngredientSerializer,
+    RecipeFeedQuerySerializer,
+    RecipeMatchQuerySerializer,
+    RecipeSimilarQuerySerializer,
     TagSerializer,
     TakeRecipeSerializer,
     UserSerializer,
 )
-from .utils import generate_shopping_cart_pdf
 
 
 class TagViewSet(viewsets.ModelViewSet):
@@ -35,6 +62,11 @@ class TagViewSet(viewsets.ModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
 
+    def list(self, request, *args, **kwargs):
+        response = Response(get_tags())
+        response.cache_compressed = True
+        return response
+
 
 class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     permission_classes = (AllowAny,)
@@ -46,6 +78,13 @@ class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
 
+    def list(self, request, *args, **kwargs):
+        if request.query_params:
+            return super().list(request, *args, **kwargs)
+        response = Response(get_ingredients())
+        response.cache_compressed = True
+        return response
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
@@ -55,6 +94,121 @@ class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = CreateRecipeSerializer
 
+    def get_queryset(self):
+        queryset = Recipe.objects.select_related('author').prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_for_recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+        user = self.request.user
+        if user.is_authenticated:
+            queryset = queryset.annotate(
+                is_favorited=Exists(
+                    Favourite.objects.filter(user=user, recipe=OuterRef('pk'))
+                ),
+                is_in_shopping_cart=Exists(
+                    ShoppingCart.objects.filter(
+                        user=user, recipe=OuterRef('pk')
+                    )
+                ),
+            )
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(Recipe.objects.all())
+        page = self.paginate_queryset(
+            queryset.values_list('id', 'author_id', 'updated_at')
+        )
+        recipe_ids = [row[0] for row in page]
+        found = memberships(
+            request.user, recipe_ids, list({row[1] for row in page})
+        )
+
+        def build():
+            recipes = recipe_cards(
+                request, recipe_ids, found, {row[0]: row[2] for row in page}
+            )
+            # При поиске у рецепта есть фрагмент описания с найденными
+            # словами.
+            snippets = search_snippets(
+                recipe_ids,
+                request.query_params.get('search', ''),
+                queryset.db,
+            )
+            data = []
+            for recipe_id in recipe_ids:
+                if recipe_id not in recipes:
+                    continue
+                item = recipes[recipe_id]
+                if snippets.get(recipe_id) is not None:
+                    item['search_snippet'] = highlight(snippets[recipe_id])
+                data.append(item)
+            response = self.get_paginated_response(data)
+            # Анонимные страницы одинаковы для всех, их сжатые варианты
+            # кэшируются.
+            response.cache_compressed = not request.user.is_authenticated
+            return response
+
+        return self.conditional_response(
+            request,
+            etag(
+                [(row[0], row[2]) for row in page],
+                found,
+                self.paginator.page.paginator.count,
+            ),
+            None,
+            build,
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        recipe = generics.get_object_or_404(
+            self.filter_queryset(
+                Recipe.objects.only('id', 'author_id', 'updated_at')
+            ),
+            pk=kwargs['pk'],
+        )
+        self.check_object_permissions(request, recipe)
+        found = memberships(request.user, [recipe.pk], [recipe.author_id])
+
+        def build():
+            recipes = recipe_cards(
+                request, [recipe.pk], found, {recipe.pk: recipe.updated_at}
+            )
+            if recipe.pk not in recipes:
+                raise Http404
+            return Response(recipes[recipe.pk])
+
+        return self.conditional_response(
+            request,
+            etag([(recipe.pk, recipe.updated_at)], found),
+            # Флаги пользователя меняются без updated_at, поэтому
+            # If-Modified-Since годится только для анонимных ответов.
+            None if request.user.is_authenticated else recipe.updated_at,
+            build,
+        )
+
+    def conditional_response(self, request, tag, last_modified, build):
+        """
+        Ответ build() с ETag и Last-Modified или 304 без вызова build(),
+        если у клиента та же версия (If-None-Match, If-Modified-Since).
+        """
+        timestamp = (
+            None if last_modified is None else int(last_modified.timestamp())
+        )
+        response = get_conditional_response(
+            request, etag=tag, last_modified=timestamp
+        )
+        if response is None:
+            response = build()
+        response['ETag'] = tag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
     def get_serializer_class(self):
         if self.request.method in ['POST', 'PATCH', 'PUT']:
             return CreateRecipeSerializer
@@ -90,6 +244,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if model.objects.filter(recipe=recipe, user=request.user).exists():
             return Response(status=status.HTTP_400_BAD_REQUEST)
         instance = model.objects.create(user=request.user, recipe=recipe)
+        rankings.record(recipe.pk, model, 1)
         serializer = AddInFavouriteSerializer(
             instance, context={'request': request}
         )
@@ -99,16 +254,140 @@ class RecipeViewSet(viewsets.ModelViewSet):
         recipe = get_object_or_404(Recipe, id=pk)
         if model.objects.filter(user=request.user, recipe=recipe).exists():
             model.objects.filter(user=request.user, recipe=recipe).delete()
+            rankings.record(recipe.pk, model, -1)
             return Response(status=status.HTTP_204_NO_CONTENT)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @action(
+        detail=False, methods=['GET'], permission_classes=[IsAuthenticated]
+    )
+    def feed(self, request):
+        """
+        Новые рецепты авторов из подписок. Следующая страница — по ссылке
+        next (параметр before), а не по номеру страницы.
+        """
+        query = RecipeFeedQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        limit = query.validated_data['limit']
+        recipe_ids = timeline.feed(
+            request.user, query.validated_data.get('before'), limit
+        )
+        data = list(recipe_cards(request, recipe_ids).values())
+        next_url = None
+        if len(recipe_ids) == limit:
+            next_url = replace_query_param(
+                request.build_absolute_uri(), 'before', recipe_ids[-1]
+            )
+        return Response({'next': next_url, 'results': data})
+
+    @action(detail=False, methods=['GET'], permission_classes=[AllowAny])
+    def match(self, request):
+        """Рецепты, которые можно приготовить из указанных ингредиентов."""
+        query = RecipeMatchQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        matches = ingredient_index.match(
+            query.validated_data['ingredients'],
+            query.validated_data['limit'],
+        )
+        recipes = recipe_cards(request, [match.recipe_id for match in matches])
+        data = []
+        for match in matches:
+            # Рецепт мог быть удалён после построения индекса.
+            if match.recipe_id not in recipes:
+                continue
+            item = recipes[match.recipe_id]
+            item['matched_ingredients'] = match.matched
+            item['missing_ingredients'] = match.missing
+            data.append(item)
+        return Response(data)
+
+    @action(detail=True, methods=['GET'], permission_classes=[AllowAny])
+    def similar(self, request, pk=None):
+        """Рецепты с похожим набором ингредиентов и тегов."""
+        recipe = generics.get_object_or_404(Recipe.objects.only('id'), pk=pk)
+        query = RecipeSimilarQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        similar = similar_index.similar(
+            recipe.pk, query.validated_data['limit']
+        )
+        recipes = recipe_cards(request, [item.recipe_id for item in similar])
+        data = []
+        for found in similar:
+            if found.recipe_id not in recipes:
+                continue
+            item = recipes[found.recipe_id]
+            item['similarity'] = round(found.similarity, 3)
+            data.append(item)
+        return Response(data)
+
+    @action(
+        detail=False,
+        methods=['POST'],
+        url_path='import',
+        url_name='import',
+        permission_classes=[IsAdminUser],
+        parser_classes=[JSONLinesParser],
+    )
+    def import_recipes(self, request):
+        """
+        Массовый импорт рецептов в формате JSON Lines; автор по умолчанию —
+        администратор, отправивший запрос. См. api/imports.py.
+        """
+        lines = request.data if isinstance(request.data, list) else []
+        return Response(imports.import_recipes(lines, author=request.user))
+
     @action(
         detail=False, methods=['GET'], permission_classes=[IsAuthenticated]
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        response = generate_shopping_cart_pdf(user)
-        return response
+        """
+        Список покупок в PDF. Если документ ещё не построен, ответ 202 с
+        адресом, по которому его забирать.
+        """
+        return self.document_response(
+            request, documents.shopping_cart_job(request.user)
+        )
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=[IsAuthenticated],
+        url_path=r'download_shopping_cart/(?P<key>[0-9a-f]{64})',
+        url_name='download-shopping-cart-job',
+    )
+    def download_shopping_cart_job(self, request, key):
+        job = generics.get_object_or_404(
+            DocumentJob.objects.defer('payload'), key=key
+        )
+        return self.document_response(request, job)
+
+    def document_response(self, request, job):
+        if job.status == DocumentJob.DONE:
+            try:
+                return FileResponse(
+                    job.file.open('rb'),
+                    as_attachment=True,
+                    filename=documents.SHOPPING_CART_FILE_NAME,
+                    content_type='application/pdf',
+                )
+            except FileNotFoundError:
+                documents.requeue(job)
+        if job.status == DocumentJob.FAILED:
+            return Response(
+                {
+                    'status': job.status,
+                    'errors': 'Не удалось построить документ',
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        url = request.build_absolute_uri(
+            reverse('api:recipe-download-shopping-cart-job', args=[job.key])
+        )
+        return Response(
+            {'status': job.status, 'url': url},
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': url, 'Retry-After': '1'},
+        )
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -120,12 +399,17 @@ class UserViewSet(DjoserUserViewSet):
     @action(detail=False, permission_classes=(IsAuthenticated,))
     def subscriptions(self, request):
         user = request.user
-        authors = Follow.objects.filter(user=user)
+        authors = (
+            Follow.objects.filter(user=user)
+            .annotate(recipes_count=Count('author__recipes'))
+            .order_by('author_id')
+            .values_list(*lean.SUBSCRIPTION_FIELDS)
+        )
         pages = self.paginate_queryset(authors)
-        serializer = self.additional_serializer(
-            pages, many=True, context={'request': request}
+        limit = request.GET.get('recipes_limit')
+        return self.get_paginated_response(
+            lean.subscriptions(pages, int(limit) if limit else None)
         )
-        return self.get_paginated_response(serializer.data)
 
     @action(methods=['POST', 'DELETE'], detail=True)
     def subscribe(self, request, **kwargs):
@@ -160,3 +444,10 @@ class UserViewSet(DjoserUserViewSet):
     def me(self, request):
         serializer = self.get_serializer(request.user)
         return Response(serializer.data)
+
+
+class DatabaseStatsView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response(connection_stats.snapshot())
@@ -0,0 +1,37 @@
+import logging
+
+from django.db import DatabaseError, connections
+
+from recipe.indexes.ingredients import ingredient_index
+from recipe.indexes.similar import similar_index
+
+from .cache import get_ingredients, get_tags
+
+logger = logging.getLogger(__name__)
+
+
+def warm_up():
+    """Прогревает то, за что иначе заплатил бы первый запрос воркера."""
+    try:
+        get_tags()
+        get_ingredients()
+        ingredient_index.get()
+        similar_index.get()
+    except DatabaseError:
+        # База может быть ещё не готова, например до применения миграций.
+        logger.warning(
+            'Не удалось прогреть кэш справочников и индексы.', exc_info=True
+        )
+    finally:
+        connections.close_all()
+
+
+def warm_up_documents():
+    """
+    Прогрев воркера документов: регистрирует шрифт PDF до запуска пула,
+    и процессы пула получают его при fork уже разобранным. Веб-воркерам
+    reportlab не нужен, поэтому warm_up() этого не делает.
+    """
+    from .pdf import register_font
+
+    register_font()
@@ -0,0 +1,12 @@
+"""
+URL админки. Модуль импортируется при первом обращении к /admin/ или
+reverse('admin:...'): только тогда загружаются admin.py приложений, а с ними
+import_export, tablib и openpyxl. Веб-воркеры, которые обслуживают только
+API, их не импортируют.
+"""
+from django.contrib import admin
+
+admin.autodiscover()
+
+app_name = 'admin'
+urlpatterns = admin.site.get_urls()
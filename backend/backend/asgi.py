@@ -0,0 +1,19 @@
+"""
+ASGI config for backend project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+# Под ASGI читающие эндпоинты выполняются в пуле потоков, а не в
+# единственном потоке, который Django отводит синхронным представлениям.
+os.environ.setdefault('ASYNC_VIEWS', 'True')
+
+application = get_asgi_application()
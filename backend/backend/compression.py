@@ -0,0 +1,79 @@
+"""
+Сжатие ответов: выбор кодировки по Accept-Encoding, gzip и brotli.
+
+Сжатые варианты «горячих» ответов (справочники, анонимные страницы
+рецептов) хранятся в кэше под ключом из хэша тела, поэтому одно и то же
+тело сжимается один раз — с более высокой степенью сжатия.
+"""
+import gzip
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_PREFIX = 'compressed'
+
+
+def _gzip(body, level):
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _brotli(body, quality):
+    return brotli.compress(body, quality=quality)
+
+
+# Кодировка: (функция, уровень на лету, уровень для кэшируемых ответов).
+# Порядок задаёт предпочтение сервера при равных q.
+ENCODERS = {}
+if brotli is not None:
+    ENCODERS['br'] = (
+        _brotli,
+        settings.BROTLI_QUALITY,
+        settings.BROTLI_CACHED_QUALITY,
+    )
+ENCODERS['gzip'] = (_gzip, settings.GZIP_LEVEL, settings.GZIP_CACHED_LEVEL)
+
+
+def negotiate(accept_encoding):
+    """Лучшая из поддерживаемых кодировок или None."""
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip().replace(' ', '')
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name:
+            weights[name] = quality
+    best, best_quality = None, 0.0
+    for encoding in ENCODERS:
+        quality = weights.get(encoding, weights.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body, encoding):
+    function, level, _ = ENCODERS[encoding]
+    return function(body, level)
+
+
+def compress_cached(body, encoding):
+    """Сжатое тело из кэша; при промахе сжимает и кладёт в кэш."""
+    digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+    key = f'{CACHE_PREFIX}:{encoding}:{digest}'
+    compressed = cache.get(key)
+    if compressed is None:
+        function, _, level = ENCODERS[encoding]
+        compressed = function(body, level)
+        cache.set(key, compressed, settings.COMPRESSION_CACHE_TIMEOUT)
+    return compressed
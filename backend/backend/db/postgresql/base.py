@@ -0,0 +1,49 @@
+import time
+
+from django.core.signals import request_started
+from django.db import connections
+from django.db.backends.postgresql import base
+
+from backend.db.stats import connection_stats
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Постоянные соединения с проверкой перед первым использованием в запросе.
+
+    Проверка (``SELECT 1``) выполняется лениво: только если запрос
+    действительно обращается к БД и только если включен
+    ``CONN_HEALTH_CHECKS``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_check_pending = False
+
+    def get_new_connection(self, conn_params):
+        started = time.monotonic()
+        connection = super().get_new_connection(conn_params)
+        connection_stats.opened(self.alias, time.monotonic() - started)
+        return connection
+
+    def ensure_connection(self):
+        if self.request_check_pending:
+            self.request_check_pending = False
+            if self.connection is not None and not self.in_atomic_block:
+                if (
+                    self.settings_dict.get('CONN_HEALTH_CHECKS')
+                    and not self.is_usable()
+                ):
+                    self.close()
+                else:
+                    connection_stats.reused(self.alias)
+        super().ensure_connection()
+
+
+def mark_connections_for_check(**kwargs):
+    for connection in connections.all():
+        if isinstance(connection, DatabaseWrapper):
+            connection.request_check_pending = True
+
+
+request_started.connect(mark_connections_for_check)
@@ -0,0 +1,141 @@
+"""
+Чтение с реплик.
+
+Репликами считаются базы с TEST['MIRROR'] == 'default'. ReplicaMiddleware
+выбирает для безопасного запроса (GET, HEAD, OPTIONS) одну реплику, и
+ReplicaRouter направляет на неё чтения этого запроса. Запись всегда идёт в
+основную базу; после неё до конца запроса и ещё DB_REPLICA_STICKY_SECONDS
+секунд клиент читает с основной базы, пока реплика догоняет её
+(read-your-writes). Клиент узнаётся по заголовку Authorization или cookie
+сессии; отметка о записи хранится в кэше, поэтому при нескольких воркерах
+нужен общий кэш.
+
+Вне запросов (команды, воркеры), внутри транзакций, а также для токенов и
+сессий используется основная база. Реплика, которая отстала больше чем на
+DB_REPLICA_MAX_LAG секунд или недоступна, не выбирается; отставание
+проверяется не чаще раза в DB_REPLICA_LAG_CHECK_INTERVAL секунд в каждом
+процессе.
+"""
+import contextvars
+import hashlib
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger('backend.db')
+
+# Только что созданные токен или сессия могут ещё не дойти до реплики.
+PRIMARY_APPS = frozenset(('authtoken', 'sessions'))
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+LAG_SQL = {
+    'postgresql': (
+        'SELECT CASE WHEN NOT pg_is_in_recovery() '
+        'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+        'ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) '
+        'END'
+    ),
+}
+
+
+class RoutingState:
+    """Реплика для чтений текущего запроса и была ли в нём запись."""
+
+    def __init__(self, alias=None):
+        self.alias = alias
+        self.wrote = False
+
+
+current = contextvars.ContextVar('db_routing', default=None)
+# alias реплики: (время проверки, годится ли).
+_lag_checks = {}
+
+
+def replica_aliases():
+    return [
+        alias
+        for alias, database in settings.DATABASES.items()
+        if database.get('TEST', {}).get('MIRROR') == DEFAULT_DB_ALIAS
+    ]
+
+
+def _lag_allowed(alias):
+    connection = connections[alias]
+    sql = LAG_SQL.get(connection.vendor)
+    if sql is None:
+        return True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            lag = float(cursor.fetchone()[0] or 0)
+    except DatabaseError:
+        logger.warning('Реплика %s недоступна', alias, exc_info=True)
+        return False
+    if lag > settings.DB_REPLICA_MAX_LAG:
+        logger.warning('Реплика %s отстаёт на %.1f с', alias, lag)
+        return False
+    return True
+
+
+def healthy(alias):
+    if not settings.DB_REPLICA_MAX_LAG:
+        return True
+    now = time.monotonic()
+    checked_at, allowed = _lag_checks.get(alias, (None, True))
+    if (
+        checked_at is None
+        or now - checked_at >= settings.DB_REPLICA_LAG_CHECK_INTERVAL
+    ):
+        allowed = _lag_allowed(alias)
+        _lag_checks[alias] = (now, allowed)
+    return allowed
+
+
+def choose_replica(aliases):
+    """Случайная реплика из годных или None, если годных нет."""
+    aliases = [alias for alias in aliases if healthy(alias)]
+    return random.choice(aliases) if aliases else None
+
+
+def sticky_key(request):
+    """Ключ отметки о записи клиента или None для анонимного клиента."""
+    credentials = request.META.get('HTTP_AUTHORIZATION') or (
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    )
+    if not credentials:
+        return None
+    digest = hashlib.sha256(credentials.encode()).hexdigest()
+    return f'db:primary:{digest}'
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = current.get()
+        if (
+            state is None
+            or state.alias is None
+            or model._meta.app_label in PRIMARY_APPS
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return state.alias
+
+    def db_for_write(self, model, **hints):
+        state = current.get()
+        if state is not None:
+            # Запрос читает то, что записал, уже с основной базы.
+            state.alias = None
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии основной базы.
+        databases = {DEFAULT_DB_ALIAS, *replica_aliases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return False if db in replica_aliases() else None
@@ -0,0 +1,248 @@
+"""
+Журнал медленных SQL-запросов.
+
+Включается переменной SLOW_QUERY_LOG (путь к файлу): SlowQueryMiddleware
+ставит на каждое соединение обёртку execute_wrapper, и запросы дольше
+SLOW_QUERY_THRESHOLD_MS пишутся в файл строками JSON: отпечаток SQL без
+значений, представление, сериализатор и место вызова в коде проекта,
+длительность. Для запросов дольше SLOW_QUERY_EXPLAIN_THRESHOLD_MS к записи
+добавляется план (EXPLAIN без ANALYZE) — не чаще раза в
+SLOW_QUERY_EXPLAIN_INTERVAL секунд на отпечаток в каждом процессе. Значения
+параметров в журнал не попадают.
+
+Файл поворачивается по размеру (SLOW_QUERY_LOG_MAX_BYTES,
+SLOW_QUERY_LOG_BACKUPS); сводку по нему строит команда slow_queries.
+"""
+import hashlib
+import json
+import logging
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from rest_framework.serializers import BaseSerializer
+from rest_framework.views import APIView
+
+logger = logging.getLogger('backend.db.slow')
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent.parent
+# Обёртки вокруг всего запроса: место вызова в них ничего не говорит.
+IGNORED = (
+    str(Path(__file__).resolve().parent),
+    str(PROJECT_DIR / 'backend' / 'middleware.py'),
+)
+# Сколько отпечатков помнить для выборки планов до чистки устаревших.
+MAX_EXPLAINED = 10000
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\s+'), ' '),
+    # IN (?, ?, ?) и строки VALUES — одной группой, сколько бы их ни было.
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+'), '(...)'),
+)
+
+# Отпечаток: когда для него последний раз снимался план.
+_explained = {}
+_explained_lock = threading.Lock()
+_local = threading.local()
+
+
+def fingerprint(sql):
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def _relative(path):
+    try:
+        return Path(path).relative_to(PROJECT_DIR)
+    except ValueError:
+        return None
+
+
+def _origin():
+    """Представление, сериализатор и место вызова по стеку."""
+    view = serializer = call_site = None
+    frame = sys._getframe(1)
+    while frame is not None and view is None:
+        filename = frame.f_code.co_filename
+        if call_site is None and not filename.startswith(IGNORED):
+            path = _relative(filename)
+            if path is not None and 'site-packages' not in path.parts:
+                call_site = f'{path}:{frame.f_lineno} ({frame.f_code.co_name})'
+        owner = frame.f_locals.get('self')
+        if serializer is None and isinstance(owner, BaseSerializer):
+            serializer = type(owner).__name__
+        elif isinstance(owner, APIView):
+            request = getattr(owner, 'request', None)
+            match = getattr(request, 'resolver_match', None)
+            view = match.view_name if match else type(owner).__name__
+        frame = frame.f_back
+    return view, serializer, call_site
+
+
+def _should_explain(key, sql, many, duration):
+    if (
+        many
+        or duration * 1000 < settings.SLOW_QUERY_EXPLAIN_THRESHOLD_MS
+        or sql.lstrip()[:6].upper() != 'SELECT'
+    ):
+        return False
+    now = time.monotonic()
+    with _explained_lock:
+        explained_at = _explained.get(key)
+        if (
+            explained_at is not None
+            and now - explained_at < settings.SLOW_QUERY_EXPLAIN_INTERVAL
+        ):
+            return False
+        if len(_explained) >= MAX_EXPLAINED:
+            _explained.clear()
+        _explained[key] = now
+    return True
+
+
+def _explain(connection, sql, params):
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        # Точка сохранения: ошибка EXPLAIN не прервёт транзакцию запроса.
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(f'{prefix} {sql}', params)
+                rows = cursor.fetchall()
+    except DatabaseError as error:
+        return f'<EXPLAIN не выполнен: {error}>'
+    # В SQLite описание шага — последний столбец, в PostgreSQL — единственный.
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def record_slow_query(execute, sql, params, many, context):
+    if getattr(_local, 'explaining', False):
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = time.perf_counter() - started
+        if duration * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+            _record(sql, params, many, context['connection'], duration)
+
+
+def _record(sql, params, many, connection, duration):
+    normalized = fingerprint(sql)
+    key = hashlib.sha1(normalized.encode()).hexdigest()[:16]
+    view, serializer, call_site = _origin()
+    entry = {
+        'time': timezone.now().isoformat(),
+        'fingerprint': key,
+        'sql': normalized,
+        'alias': connection.alias,
+        'duration_ms': round(duration * 1000, 2),
+        'view': view,
+        'serializer': serializer,
+        'call_site': call_site,
+    }
+    if _should_explain(key, sql, many, duration):
+        _local.explaining = True
+        try:
+            entry['plan'] = _explain(connection, sql, params)
+        finally:
+            _local.explaining = False
+    logger.info(json.dumps(entry, ensure_ascii=False))
+
+
+def install(sender, connection, **kwargs):
+    if record_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_slow_query)
+
+
+def read(path):
+    """Записи журнала и его повёрнутых копий, от старых к новым."""
+    path = Path(path)
+    files = sorted(
+        (
+            file
+            for file in path.parent.glob(f'{path.name}.*')
+            if file.suffix[1:].isdigit()
+        ),
+        key=lambda file: int(file.suffix[1:]),
+        reverse=True,
+    )
+    for file in [*files, path]:
+        if not file.exists():
+            continue
+        with open(file, encoding='utf-8') as lines:
+            for line in lines:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Строка, обрезанная при падении процесса.
+                    continue
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(entries, since=None):
+    """
+    Сводка по отпечаткам: число запросов, сумма, перцентили и максимум
+    длительности, где они выполнялись и последний снятый план.
+    """
+    groups = {}
+    for entry in entries:
+        if since is not None and entry['time'] < since:
+            continue
+        group = groups.setdefault(
+            entry['fingerprint'],
+            {
+                'fingerprint': entry['fingerprint'],
+                'sql': entry['sql'],
+                'durations': [],
+                'views': Counter(),
+                'serializers': Counter(),
+                'call_sites': Counter(),
+                'plan': None,
+                'last_seen': None,
+            },
+        )
+        group['durations'].append(entry['duration_ms'])
+        for name, key in (
+            ('views', 'view'),
+            ('serializers', 'serializer'),
+            ('call_sites', 'call_site'),
+        ):
+            if entry.get(key):
+                group[name][entry[key]] += 1
+        if entry.get('plan'):
+            group['plan'] = entry['plan']
+        group['last_seen'] = entry['time']
+    summary = []
+    for group in groups.values():
+        durations = group.pop('durations')
+        summary.append(
+            {
+                **group,
+                'count': len(durations),
+                'total_ms': round(sum(durations), 2),
+                'p50_ms': percentile(durations, 0.50),
+                'p95_ms': percentile(durations, 0.95),
+                'p99_ms': percentile(durations, 0.99),
+                'max_ms': max(durations),
+                'views': dict(group['views'].most_common()),
+                'serializers': dict(group['serializers'].most_common()),
+                'call_sites': dict(group['call_sites'].most_common()),
+            }
+        )
+    return summary
@@ -0,0 +1,46 @@
+import os
+
+from backend import metrics
+
+# Счётчик Prometheus и поле в ответе /api/stats/db/.
+FIELDS = {
+    'foodgram_db_connections_opened_total': 'opened',
+    'foodgram_db_connections_reused_total': 'reused',
+    'foodgram_db_connect_seconds_total': 'connect_seconds',
+}
+
+
+class ConnectionStats:
+    """
+    Счётчики соединений с БД. Хранятся в метриках Prometheus, поэтому при
+    PROMETHEUS_MULTIPROC_DIR суммируются по всем воркерам.
+    """
+
+    def opened(self, alias, connect_seconds):
+        metrics.DB_CONNECTIONS_OPENED.labels(alias).inc()
+        metrics.DB_CONNECT_DURATION.labels(alias).inc(connect_seconds)
+
+    def reused(self, alias):
+        metrics.DB_CONNECTIONS_REUSED.labels(alias).inc()
+
+    def snapshot(self):
+        databases = {}
+        for family in metrics.registry().collect():
+            for sample in family.samples:
+                field = FIELDS.get(sample.name)
+                if field is None:
+                    continue
+                counters = databases.setdefault(
+                    sample.labels['alias'],
+                    {'opened': 0, 'reused': 0, 'connect_seconds': 0.0},
+                )
+                counters[field] += sample.value
+        for counters in databases.values():
+            counters['opened'] = int(counters['opened'])
+            counters['reused'] = int(counters['reused'])
+        if metrics.is_multiprocess():
+            return {'scope': 'all_workers', 'databases': databases}
+        return {'scope': 'worker', 'pid': os.getpid(), 'databases': databases}
+
+
+connection_stats = ConnectionStats()
@@ -0,0 +1,39 @@
+"""
+Обработчики логов. Подключаются из LOGGING до загрузки приложений, поэтому
+не импортируют ничего, кроме стандартной библиотеки.
+"""
+import fcntl
+import os
+from logging.handlers import RotatingFileHandler
+
+
+class SharedRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler для нескольких процессов, пишущих в один файл:
+    запись и поворот идут под блокировкой файла path.lock, размер берётся
+    у файла на диске, а процесс, чей файл повернул другой, открывает новый.
+    """
+
+    def emit(self, record):
+        with open(f'{self.baseFilename}.lock', 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.stream is not None and self._rotated():
+                self.stream.close()
+                self.stream = None
+            super().emit(record)
+
+    def _rotated(self):
+        try:
+            current = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        return os.fstat(self.stream.fileno()).st_ino != current.st_ino
+
+    def shouldRollover(self, record):
+        if self.maxBytes <= 0:
+            return False
+        try:
+            size = os.stat(self.baseFilename).st_size
+        except FileNotFoundError:
+            return False
+        return size + len(self.format(record)) + 1 > self.maxBytes
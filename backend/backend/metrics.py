@@ -0,0 +1,146 @@
+"""
+Метрики производительности в формате Prometheus.
+
+Если задана переменная окружения ``PROMETHEUS_MULTIPROC_DIR``, значения
+пишутся в файлы в этом каталоге и на ``/metrics`` суммируются по всем
+воркерам gunicorn.
+"""
+import os
+import time
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+REQUESTS = Counter(
+    'foodgram_http_requests_total',
+    'Количество обработанных запросов.',
+    ('view', 'method', 'status'),
+)
+REQUEST_DURATION = Histogram(
+    'foodgram_http_request_duration_seconds',
+    'Полное время обработки запроса.',
+    ('view',),
+)
+DB_QUERIES = Histogram(
+    'foodgram_db_queries_per_request',
+    'Количество SQL-запросов на один HTTP-запрос.',
+    ('view',),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float('inf')),
+)
+DB_DURATION = Histogram(
+    'foodgram_db_duration_seconds',
+    'Суммарное время SQL-запросов на один HTTP-запрос.',
+    ('view',),
+)
+RENDER_DURATION = Histogram(
+    'foodgram_render_duration_seconds',
+    'Время рендеринга ответа в JSON.',
+    ('view',),
+)
+APP_DURATION = Histogram(
+    'foodgram_app_duration_seconds',
+    'Время обработки запроса без SQL и рендеринга: код представлений, '
+    'сериализаторы, middleware.',
+    ('view',),
+)
+RESPONSE_SIZE = Histogram(
+    'foodgram_http_response_size_bytes',
+    'Размер тела ответа.',
+    ('view',),
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, float('inf')),
+)
+THROTTLED = Counter(
+    'foodgram_throttled_requests_total',
+    'Запросы, отклонённые ограничением частоты.',
+    ('view',),
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'foodgram_db_connections_opened_total',
+    'Количество открытых соединений с БД.',
+    ('alias',),
+)
+DB_CONNECTIONS_REUSED = Counter(
+    'foodgram_db_connections_reused_total',
+    'Количество запросов, переиспользовавших открытое соединение с БД.',
+    ('alias',),
+)
+DB_CONNECT_DURATION = Counter(
+    'foodgram_db_connect_seconds_total',
+    'Суммарное время установки новых соединений с БД.',
+    ('alias',),
+)
+
+
+class RequestMetrics:
+    __slots__ = ('started', 'db_queries', 'db_duration', 'render_duration')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_duration = 0.0
+        self.render_duration = 0.0
+
+    @property
+    def duration(self):
+        return time.perf_counter() - self.started
+
+
+current_request = ContextVar('current_request_metrics', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_request.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_duration += time.perf_counter() - started
+
+
+def record_render(duration):
+    metrics = current_request.get()
+    if metrics is not None:
+        metrics.render_duration += duration
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    # Обёртка ставится на соединение навсегда и сама находит метрики
+    # текущего запроса через contextvar, поэтому работает и для
+    # представлений, выполняемых в пуле потоков под ASGI.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+def is_multiprocess():
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def registry():
+    """Реестр со значениями всех воркеров или только текущего процесса."""
+    if not is_multiprocess():
+        return REGISTRY
+    collector_registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collector_registry)
+    return collector_registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(registry()), content_type=CONTENT_TYPE_LATEST
+    )
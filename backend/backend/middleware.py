@@ -0,0 +1,281 @@
+import logging
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject, empty
+
+from backend import compression, metrics
+from backend.db import router, slow
+
+logger = logging.getLogger('backend.performance')
+
+
+class HybridMiddleware:
+    """
+    Middleware, работающее и под WSGI, и под ASGI. Под ASGI Django не
+    переводит его в единственный поток синхронного кода: вызов идёт через
+    __acall__, а блокирующая работа подклассов — в общий пул потоков.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+def resolved_user(request):
+    """
+    Пользователь запроса, если он уже известен; ленивый request.user без
+    аутентификации не вычисляется, чтобы не делать лишних запросов к БД.
+    """
+    user = getattr(request, 'user', None)
+    if isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return None
+    return user
+
+
+class PerformanceMiddleware(HybridMiddleware):
+    """
+    Собирает для каждого запроса имя представления, число и время
+    SQL-запросов, время рендеринга ответа (его замеряет FastJSONRenderer),
+    остальное время обработки и размер ответа.
+
+    Сотрудникам (``is_staff``) значения возвращаются в заголовке
+    ``Server-Timing``.
+    """
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request.set(request_metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        return self.record(request, response, request_metrics)
+
+    async def __acall__(self, request):
+        request_metrics = metrics.RequestMetrics()
+        token = metrics.current_request.set(request_metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_request.reset(token)
+        return self.record(request, response, request_metrics)
+
+    def record(self, request, response, request_metrics):
+        duration = request_metrics.duration
+        db_duration = request_metrics.db_duration
+        render_duration = request_metrics.render_duration
+        app_duration = max(duration - db_duration - render_duration, 0.0)
+        view = self._view_name(request)
+        size = self._response_size(response)
+
+        metrics.REQUESTS.labels(
+            view, request.method, response.status_code
+        ).inc()
+        metrics.REQUEST_DURATION.labels(view).observe(duration)
+        metrics.DB_QUERIES.labels(view).observe(request_metrics.db_queries)
+        metrics.DB_DURATION.labels(view).observe(db_duration)
+        metrics.RENDER_DURATION.labels(view).observe(render_duration)
+        metrics.APP_DURATION.labels(view).observe(app_duration)
+        if size is not None:
+            metrics.RESPONSE_SIZE.labels(view).observe(size)
+
+        if duration * 1000 >= settings.SLOW_REQUEST_THRESHOLD_MS:
+            logger.warning(
+                'Медленный запрос %s %s: %.1f мс, SQL: %d за %.1f мс',
+                request.method,
+                view,
+                duration * 1000,
+                request_metrics.db_queries,
+                db_duration * 1000,
+            )
+
+        user = resolved_user(request)
+        if user is not None and user.is_staff:
+            response['Server-Timing'] = (
+                f'db;dur={db_duration * 1000:.1f};'
+                f'desc="{request_metrics.db_queries} queries", '
+                f'render;dur={render_duration * 1000:.1f}, '
+                f'app;dur={app_duration * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+    @staticmethod
+    def _view_name(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return '<unresolved>'
+        return match.view_name
+
+    @staticmethod
+    def _response_size(response):
+        if response.streaming:
+            length = response.get('Content-Length')
+            return int(length) if length else None
+        return len(response.content)
+
+
+class CompressionMiddleware(HybridMiddleware):
+    """
+    Сжимает ответы gzip или brotli по заголовку Accept-Encoding.
+
+    Ответ с атрибутом ``cache_compressed`` (его выставляют представления
+    справочников и анонимных страниц рецептов) берётся из кэша сжатых
+    вариантов вместо повторного сжатия.
+    """
+
+    compressible_types = (
+        'application/json',
+        'application/javascript',
+        'application/xml',
+        'image/svg+xml',
+        'text/',
+    )
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        response = self.get_response(request)
+        encoding = self.encoding(request, response)
+        if encoding is None:
+            return response
+        return self.compress(response, encoding)
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        encoding = self.encoding(request, response)
+        if encoding is None:
+            return response
+        # Сжатие занимает процессор, поэтому выполняется в пуле потоков, а не
+        # в цикле событий.
+        return await sync_to_async(self.compress, thread_sensitive=False)(
+            response, encoding
+        )
+
+    def encoding(self, request, response):
+        """Кодировка, которой нужно сжать ответ, или None."""
+        if (
+            response.streaming
+            or response.has_header('Content-Encoding')
+            or len(response.content) < settings.COMPRESSION_MIN_SIZE
+            or not response.get('Content-Type', '').startswith(
+                self.compressible_types
+            )
+        ):
+            return None
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return compression.negotiate(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+
+    @staticmethod
+    def compress(response, encoding):
+        if getattr(response, 'cache_compressed', False):
+            content = compression.compress_cached(response.content, encoding)
+        else:
+            content = compression.compress(response.content, encoding)
+        if len(content) >= len(response.content):
+            return response
+
+        response.content = content
+        response['Content-Length'] = str(len(content))
+        response['Content-Encoding'] = encoding
+        # Сжатое тело не совпадает с исходным байт в байт.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class ReplicaMiddleware(HybridMiddleware):
+    """
+    Отправляет чтения безопасных запросов на реплику, а клиента, который
+    недавно что-то записал, — на основную базу; см. backend/db/router.py.
+    Без реплик в DATABASES не подключается.
+    """
+
+    def __init__(self, get_response):
+        self.replicas = router.replica_aliases()
+        if not self.replicas:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        key = router.sticky_key(request)
+        safe = request.method in router.SAFE_METHODS
+        state = router.RoutingState(self.choose(key, safe))
+        token = router.current.set(state)
+        try:
+            return self.get_response(request)
+        finally:
+            router.current.reset(token)
+            self.remember_write(key, safe, state)
+
+    async def __acall__(self, request):
+        key = router.sticky_key(request)
+        safe = request.method in router.SAFE_METHODS
+        # Кэш и проверка отставания реплик блокируют — в пуле потоков.
+        alias = await sync_to_async(self.choose, thread_sensitive=False)(
+            key, safe
+        )
+        state = router.RoutingState(alias)
+        token = router.current.set(state)
+        try:
+            return await self.get_response(request)
+        finally:
+            router.current.reset(token)
+            if key and (state.wrote or not safe):
+                await sync_to_async(
+                    self.remember_write, thread_sensitive=False
+                )(key, safe, state)
+
+    def choose(self, key, safe):
+        if safe and not (key and cache.get(key)):
+            return router.choose_replica(self.replicas)
+        return None
+
+    @staticmethod
+    def remember_write(key, safe, state):
+        if key and (state.wrote or not safe):
+            cache.set(key, True, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+class SlowQueryMiddleware(HybridMiddleware):
+    """
+    Включает журнал медленных SQL-запросов (см. backend/db/slow.py). Без
+    SLOW_QUERY_LOG не подключается.
+    """
+
+    def __init__(self, get_response):
+        if not settings.SLOW_QUERY_LOG:
+            raise MiddlewareNotUsed
+        connection_created.connect(slow.install)
+        for connection in connections.all():
+            slow.install(None, connection)
+        super().__init__(get_response)
@@ -22,7 +22,8 @@ ALLOWED_HOSTS = [
 AUTH_USER_MODEL = 'users.User'
 
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    # Без autodiscover при запуске, см. backend/admin_urls.py.
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,6 +41,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'backend.middleware.PerformanceMiddleware',
+    'backend.middleware.CompressionMiddleware',
+    'backend.middleware.ReplicaMiddleware',
+    'backend.middleware.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -69,17 +74,59 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'backend.wsgi.application'
 
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Выполнять читающие эндпоинты асинхронно. Включается автоматически
+# при запуске через backend.asgi.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'False').lower() == 'true'
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'backend.db.postgresql',
         'NAME': os.getenv('POSTGRES_DB', 'django'),
         'USER': os.getenv('POSTGRES_USER', 'django'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', 5432),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': (
+            os.getenv('DB_CONN_HEALTH_CHECKS', 'True').lower() == 'true'
+        ),
+        # При работе через pgbouncer в режиме transaction серверные
+        # курсоры использовать нельзя.
+        'DISABLE_SERVER_SIDE_CURSORS': (
+            os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'False').lower()
+            == 'true'
+        ),
+        'OPTIONS': {
+            'connect_timeout': int(os.getenv('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+# Реплики для чтения: DB_REPLICA_HOSTS=replica1,replica2:5433. Остальные
+# параметры соединения — как у основной базы; см. backend/db/router.py.
+for number, address in enumerate(
+    filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{number}'] = dict(
+        DATABASES['default'],
+        HOST=host,
+        PORT=port or DATABASES['default']['PORT'],
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_ROUTERS = ['backend.db.router.ReplicaRouter']
+# Сколько секунд после записи клиент читает с основной базы.
+DB_REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', 10))
+# Реплика, отставшая больше чем на столько секунд, не используется;
+# 0 — не проверять отставание.
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', 5))
+DB_REPLICA_LAG_CHECK_INTERVAL = float(
+    os.getenv('DB_REPLICA_LAG_CHECK_INTERVAL', 5)
+)
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -112,20 +159,185 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'collected_static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Имена файлов — хэш содержимого; см. backend/storage.py и cleanup_media.
+DEFAULT_FILE_STORAGE = 'backend.storage.HashedMediaStorage'
+# Моложе этого возраста (в секундах) cleanup_media файлы не удаляет: рецепт
+# с только что загруженной картинкой может быть ещё не сохранён.
+MEDIA_CLEANUP_MIN_AGE = int(os.getenv('MEDIA_CLEANUP_MIN_AGE', 60 * 60))
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Список покупок строит фоновая команда render_documents; см.
+# api/documents.py. Готовые документы хранятся DOCUMENT_CACHE_TIMEOUT секунд,
+# задание, которое строится дольше DOCUMENT_JOB_TIMEOUT, считается упавшим.
+DOCUMENT_CACHE_TIMEOUT = int(os.getenv('DOCUMENT_CACHE_TIMEOUT', 24 * 60 * 60))
+DOCUMENT_JOB_TIMEOUT = int(os.getenv('DOCUMENT_JOB_TIMEOUT', 300))
+DOCUMENT_JOB_MAX_ATTEMPTS = int(os.getenv('DOCUMENT_JOB_MAX_ATTEMPTS', 3))
+DOCUMENT_WORKER_PROCESSES = int(os.getenv('DOCUMENT_WORKER_PROCESSES', 2))
+
+# По умолчанию кэш локален для процесса. При нескольких воркерах его можно
+# сделать общим, например CACHE_BACKEND=
+# django.core.cache.backends.filebased.FileBasedCache.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Время жизни кэша справочников (теги, ингредиенты) в секундах.
+REFERENCE_CACHE_TIMEOUT = int(os.getenv('REFERENCE_CACHE_TIMEOUT', 300))
+# Карточки рецептов (общая для всех часть ответа); см. api/cards.py.
+RECIPE_CARD_CACHE_TIMEOUT = int(os.getenv('RECIPE_CARD_CACHE_TIMEOUT', 300))
+# Сколько строк импорта рецептов записывать одной транзакцией.
+RECIPE_IMPORT_CHUNK_SIZE = int(os.getenv('RECIPE_IMPORT_CHUNK_SIZE', 500))
+
+# Индексы рецептов в памяти (подбор по ингредиентам, похожие) сверяются с
+# журналом изменений в кэше и, кроме того, перестраиваются в фоновом потоке
+# не реже раза в столько секунд: при кэше, локальном для процесса, другие
+# воркеры журнал не видят.
+RECIPE_INDEX_MAX_AGE = int(os.getenv('RECIPE_INDEX_MAX_AGE', 300))
+# Каталог, куда rebuild_similar_recipes сохраняет индекс похожих рецептов.
+RECIPE_INDEX_DIR = os.getenv(
+    'RECIPE_INDEX_DIR', os.path.join(BASE_DIR, 'indexes')
+)
+
+# Лента подписок: сколько последних рецептов хранится в ленте пользователя
+# и начиная с какого числа подписчиков рецепты автора не раскладываются по
+# лентам, а подмешиваются при чтении.
+FEED_TIMELINE_LENGTH = int(os.getenv('FEED_TIMELINE_LENGTH', 500))
+FEED_FANOUT_MAX_FOLLOWERS = int(os.getenv('FEED_FANOUT_MAX_FOLLOWERS', 1000))
+
+# Рейтинги рецептов: вклад активности в оценку trending уменьшается вдвое
+# за столько дней, а активность старше окна не учитывается и удаляется.
+RANKING_HALF_LIFE_DAYS = float(os.getenv('RANKING_HALF_LIFE_DAYS', 3))
+RANKING_WINDOW_DAYS = int(os.getenv('RANKING_WINDOW_DAYS', 28))
+# Как часто воркер документов пересчитывает рейтинги, в секундах; 0 — не
+# пересчитывать (тогда нужна команда refresh_rankings по расписанию).
+RANKING_REFRESH_INTERVAL = int(os.getenv('RANKING_REFRESH_INTERVAL', 300))
+
+# Ответы меньше порога (в байтах) не сжимаются.
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))
+# Степень сжатия на лету и для вариантов, которые сжимаются один раз и
+# хранятся в кэше. Brotli 10–11 сжимает большие ответы в 10–20 раз дольше
+# уровня 9 (см. python -m benchmarks compression).
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+GZIP_CACHED_LEVEL = int(os.getenv('GZIP_CACHED_LEVEL', 9))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+BROTLI_CACHED_QUALITY = int(os.getenv('BROTLI_CACHED_QUALITY', 9))
+# Время жизни заранее сжатых вариантов справочников и анонимных страниц.
+COMPRESSION_CACHE_TIMEOUT = int(os.getenv('COMPRESSION_CACHE_TIMEOUT', 3600))
+
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.throttling.ThrottledTokenAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': ['api.throttling.CostThrottle'],
+    # Сколько прокси перед backend дописывают адрес в X-Forwarded-For:
+    # клиентом считается адрес, записанный последним из них (nginx).
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', 1)),
     'PAGE_SIZE': 6,
 }
 
+# Ограничение частоты запросов: ведро жетонов на клиента; см.
+# api/throttling.py.
+THROTTLE_BUCKET_CAPACITY = int(os.getenv('THROTTLE_BUCKET_CAPACITY', 120))
+THROTTLE_REFILL_RATE = float(os.getenv('THROTTLE_REFILL_RATE', 2))
+# Жетон за каждые столько байт тела запроса (картинки в base64).
+THROTTLE_BYTES_PER_TOKEN = int(
+    os.getenv('THROTTLE_BYTES_PER_TOKEN', 256 * 1024)
+)
+THROTTLE_DOCUMENT_COST = int(os.getenv('THROTTLE_DOCUMENT_COST', 20))
+THROTTLE_UPLOAD_COST = int(os.getenv('THROTTLE_UPLOAD_COST', 5))
+THROTTLE_IMPORT_COST = int(os.getenv('THROTTLE_IMPORT_COST', 50))
+# Стоимость запроса в жетонах по методу и имени маршрута; остальные — 1.
+THROTTLE_COSTS = {
+    'GET recipe-download-shopping-cart': THROTTLE_DOCUMENT_COST,
+    'POST recipe-list': THROTTLE_UPLOAD_COST,
+    'PUT recipe-detail': THROTTLE_UPLOAD_COST,
+    'PATCH recipe-detail': THROTTLE_UPLOAD_COST,
+    'POST recipe-import': THROTTLE_IMPORT_COST,
+}
+
+# Запросы дольше этого порога (в миллисекундах) попадают в лог.
+SLOW_REQUEST_THRESHOLD_MS = int(os.getenv('SLOW_REQUEST_THRESHOLD_MS', 500))
+
+# Журнал медленных SQL-запросов (путь к файлу); пустое значение — выключен.
+SLOW_QUERY_LOG = os.getenv('SLOW_QUERY_LOG', '')
+SLOW_QUERY_THRESHOLD_MS = int(os.getenv('SLOW_QUERY_THRESHOLD_MS', 100))
+# Для запросов дольше этого порога в журнал пишется EXPLAIN, не чаще раза в
+# SLOW_QUERY_EXPLAIN_INTERVAL секунд на отпечаток.
+SLOW_QUERY_EXPLAIN_THRESHOLD_MS = int(
+    os.getenv('SLOW_QUERY_EXPLAIN_THRESHOLD_MS', 500)
+)
+SLOW_QUERY_EXPLAIN_INTERVAL = int(
+    os.getenv('SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+)
+SLOW_QUERY_LOG_MAX_BYTES = int(
+    os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024)
+)
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'default': {
+            'format': '%(asctime)s [%(process)d] %(levelname)s %(name)s: '
+            '%(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'default',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+    },
+    'loggers': {
+        'django': {
+            'handlers': ['console'],
+            'level': os.getenv('DJANGO_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
+
+if SLOW_QUERY_LOG:
+    LOGGING['formatters']['message'] = {'format': '%(message)s'}
+    LOGGING['handlers']['slow_queries'] = {
+        'class': 'backend.log_handlers.SharedRotatingFileHandler',
+        'formatter': 'message',
+        'filename': SLOW_QUERY_LOG,
+        'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+        'backupCount': SLOW_QUERY_LOG_BACKUPS,
+        'encoding': 'utf-8',
+        'delay': True,
+    }
+    LOGGING['loggers']['backend.db.slow'] = {
+        'handlers': ['slow_queries'],
+        'level': 'INFO',
+        'propagate': False,
+    }
+
 DJOSER = {
     'HIDE_USERS': False,
     'PERMISSIONS': {
@@ -0,0 +1,118 @@
+"""
+Профиль запуска приложения: время импорта и память django.setup() и
+загрузки URLconf — то, что делает каждый воркер до первого запроса.
+
+Замер идёт в отдельном интерпретаторе, чтобы модули текущего процесса не
+влияли на результат: один запуск с -X importtime даёт время по пакетам и
+фазам, второй под tracemalloc — память, выделенную при импорте каждого
+пакета.
+"""
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+
+# Выполняется в дочернем интерпретаторе; печатает JSON последней строкой.
+PROBE = '''
+import json, os, sys, time, tracemalloc
+
+def rss():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+phases = [('python', time.perf_counter(), rss())]
+import django
+django.setup()
+phases.append(('django.setup()', time.perf_counter(), rss()))
+from django.urls import get_resolver
+get_resolver().url_patterns
+phases.append(('URLconf', time.perf_counter(), rss()))
+report = {
+    'phases': [
+        {
+            'name': name,
+            'seconds': moment - previous[1],
+            'rss': memory - previous[2],
+        }
+        for previous, (name, moment, memory) in zip(phases, phases[1:])
+    ],
+    'rss': phases[-1][2],
+    'modules': sorted(sys.modules),
+}
+if tracemalloc.is_tracing():
+    packages = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, '__file__', None)
+        if path:
+            packages[path] = name.partition('.')[0]
+    memory = {}
+    snapshot = tracemalloc.take_snapshot()
+    for stat in snapshot.statistics('traceback'):
+        # Код модуля выделяется в importlib: считаем его за ближайшим
+        # настоящим модулем в стеке.
+        package = next(
+            (
+                packages[frame.filename]
+                for frame in reversed(stat.traceback)
+                if frame.filename in packages
+            ),
+            '<other>',
+        )
+        memory[package] = memory.get(package, 0) + stat.size
+    report['memory'] = memory
+print(json.dumps(report))
+'''
+
+
+def _probe(*options):
+    result = subprocess.run(
+        [sys.executable, *options, '-c', PROBE],
+        capture_output=True,
+        text=True,
+        cwd=settings.BASE_DIR,
+        env={**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE},
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr)
+    return json.loads(result.stdout.splitlines()[-1]), result.stderr
+
+
+def _import_times(importtime):
+    """Собственное время импорта модулей по пакетам верхнего уровня."""
+    times = Counter()
+    for line in importtime.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, _, name = line[len('import time:') :].split('|')
+        if own.strip().isdigit():
+            times[name.strip().partition('.')[0]] += int(own) / 10**6
+    return times
+
+
+def profile(memory=True):
+    """
+    Профиль запуска: фазы (время и прирост RSS), пакеты (время импорта и,
+    если memory, выделенная память), итоговый RSS и список загруженных
+    модулей. Замер памяти по пакетам идёт под tracemalloc и занимает
+    десятки секунд.
+    """
+    report, importtime = _probe('-X', 'importtime')
+    times = _import_times(importtime)
+    allocated = _probe('-X', 'tracemalloc=25')[0]['memory'] if memory else {}
+    packages = {
+        package: {
+            'seconds': times.get(package, 0.0),
+            'memory': allocated.get(package, 0),
+        }
+        for package in {*times, *allocated}
+    }
+    return {
+        'phases': report['phases'],
+        'seconds': sum(phase['seconds'] for phase in report['phases']),
+        'rss': report['rss'],
+        'packages': packages,
+        'modules': report['modules'],
+    }
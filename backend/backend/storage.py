@@ -0,0 +1,72 @@
+"""
+Хранилище медиафайлов с именами по хэшу содержимого.
+
+Файл сохраняется как <каталог upload_to>/<2 символа>/<sha256>.<расширение>:
+одинаковые загрузки ложатся в один файл, а содержимое по имени никогда не
+меняется, поэтому nginx отдаёт такие файлы с Cache-Control: immutable.
+Файлы, на которые больше не ссылается ни один рецепт, удаляет команда
+cleanup_media: при замене картинки старый файл может быть нужен другим
+рецептам.
+"""
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class HashedMediaStorage(FileSystemStorage):
+    def hashed_name(self, name, content):
+        directory, file_name = posixpath.split(name.replace('\\', '/'))
+        extension = posixpath.splitext(file_name)[1].lower()
+        digest = content_hash(content)
+        return posixpath.join(directory, digest[:2], f'{digest}{extension}')
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = self.hashed_name(name, content)
+        if max_length is not None and len(name) > max_length:
+            # Имя по хэшу не укоротить — обычное сохранение с проверкой.
+            return super().save(name, content, max_length)
+        if self.exists(name):
+            # Свежая дата защищает файл от cleanup_media, пока рецепт,
+            # который на него сошлётся, ещё не сохранён.
+            try:
+                os.utime(self.path(name))
+                return name
+            except FileNotFoundError:
+                pass
+        return self._save(name, content)
+
+    def _save(self, name, content):
+        if not HASHED_NAME.search(name):
+            return super()._save(name, content)
+        path = self.path(name)
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        # Параллельные загрузки одного файла пишут во временные файлы и
+        # подменяют друг друга атомарно — содержимое у них одинаковое.
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as file:
+            for chunk in content.chunks():
+                file.write(chunk)
+        os.chmod(file.name, self.file_permissions_mode or 0o644)
+        os.replace(file.name, path)
+        return name
@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from benchmarks import startup
+
+
+class StartupTests(SimpleTestCase):
+    """Пороги запуска воркера из benchmarks/startup.py."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Замер в отдельном интерпретаторе, без памяти по пакетам.
+        cls.report, cls.failures = startup.check()
+
+    def test_within_thresholds(self):
+        self.assertEqual(self.failures, [])
+        self.assertLessEqual(self.report['seconds'], startup.MAX_SECONDS)
+        self.assertLessEqual(self.report['rss'], startup.MAX_RSS)
+
+    def test_admin_and_documents_packages_are_not_imported(self):
+        modules = set(self.report['modules'])
+        self.assertIn('django.urls', modules)
+        # import_export подключён в INSTALLED_APPS, но его admin с
+        # tablib и форматами и reportlab грузятся только по запросу.
+        for package in (*startup.LAZY_PACKAGES, 'backend.admin_urls'):
+            with self.subTest(package):
+                self.assertNotIn(package, modules)
@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from django.urls.resolvers import RoutePattern
+
+from backend.urls import LazyURLResolver
+
+lazy_admin = LazyURLResolver(
+    RoutePattern('admin/'),
+    'backend.admin_urls',
+    app_name='admin',
+    namespace='admin',
+)
+
+urlpatterns = [
+    lazy_admin,
+    path('api/', include('api.urls', namespace='api')),
+]
+
+
+class URLConfTests(SimpleTestCase):
+    """reverse() и resolve() через корневой URLconf с LazyURLResolver."""
+
+    def test_reverse(self):
+        for name, args, url in (
+            ('admin:index', [], '/admin/'),
+            ('admin:recipe_recipe_changelist', [], '/admin/recipe/recipe/'),
+            (
+                'admin:recipe_recipe_change',
+                [7],
+                '/admin/recipe/recipe/7/change/',
+            ),
+            ('api:recipe-list', [], '/api/recipes/'),
+            ('api:recipe-detail', [7], '/api/recipes/7/'),
+            ('metrics', [], '/metrics'),
+        ):
+            with self.subTest(name):
+                self.assertEqual(reverse(name, args=args), url)
+
+    def test_resolve(self):
+        for url, view_name, kwargs in (
+            ('/admin/', 'admin:index', {}),
+            (
+                '/admin/recipe/recipe/7/change/',
+                'admin:recipe_recipe_change',
+                {'object_id': '7'},
+            ),
+            ('/api/recipes/7/', 'api:recipe-detail', {'pk': '7'}),
+            ('/api/tags/', 'api:tag-list', {}),
+        ):
+            with self.subTest(url):
+                match = resolve(url)
+                self.assertEqual(match.view_name, view_name)
+                self.assertEqual(match.kwargs, kwargs)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class LazyURLResolverTests(SimpleTestCase):
+    def test_urlconf_is_loaded_on_first_use(self):
+        self.assertEqual(reverse('api:tag-list'), '/api/tags/')
+        self.assertEqual(resolve('/api/tags/').view_name, 'api:tag-list')
+        self.assertNotIn('urlconf_module', lazy_admin.__dict__)
+
+        self.assertEqual(reverse('admin:index'), '/admin/')
+        self.assertIn('urlconf_module', lazy_admin.__dict__)
+        self.assertEqual(
+            resolve('/admin/recipe/recipe/').view_name,
+            'admin:recipe_recipe_changelist',
+        )
@@ -1,7 +1,35 @@
-from django.contrib import admin
-from django.urls import include, path
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+
+from backend.metrics import metrics_view
+
+
+class LazyURLResolver(URLResolver):
+    """
+    URLResolver, который импортирует urlconf при первом обращении к своим
+    адресам, а не при reverse() имён из других пространств.
+    """
+
+    def _populate(self):
+        # Корневой resolver заполняет вложенные на первом reverse(); пока
+        # urlconf не загружен, его адреса нужны только через
+        # _reverse_with_prefix, который загрузит его сам.
+        if 'urlconf_module' in self.__dict__:
+            super()._populate()
+
+    def _reverse_with_prefix(self, *args, **kwargs):
+        self.urlconf_module
+        return super()._reverse_with_prefix(*args, **kwargs)
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
+    # Админка загружается при первом обращении, см. backend/admin_urls.py.
+    LazyURLResolver(
+        RoutePattern('admin/'),
+        'backend.admin_urls',
+        app_name='admin',
+        namespace='admin',
+    ),
     path('api/', include('api.urls', namespace='api')),
+    path('metrics', metrics_view, name='metrics'),
 ]
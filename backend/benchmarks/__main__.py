@@ -0,0 +1,232 @@
+"""
+Бенчмарки API.
+
+    python -m benchmarks seed --users 200 --recipes 1000
+    python -m benchmarks run --output bench.json [--http]
+    python -m benchmarks compare base.json bench.json --threshold 0.2
+    python -m benchmarks budgets
+    python -m benchmarks json
+    python -m benchmarks compression
+    python -m benchmarks feed
+    python -m benchmarks serializers
+    python -m benchmarks startup
+
+По умолчанию используются настройки benchmarks.settings (отдельная база
+SQLite); другие можно задать через DJANGO_SETTINGS_MODULE.
+"""
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+import django
+
+
+def _setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+    django.setup()
+
+
+def _write(report, output):
+    text = json.dumps(report, indent=2, ensure_ascii=False, sort_keys=True)
+    if output:
+        Path(output).write_text(text + '\n', encoding='utf-8')
+    print(text)
+
+
+def seed_command(args):
+    from django.conf import settings
+
+    from .seed import DEFAULT_VOLUMES, prepare_database
+
+    os.makedirs(settings.BENCH_DIR, exist_ok=True)
+    volumes = {name: getattr(args, name) for name in DEFAULT_VOLUMES}
+    volumes = prepare_database(args.seed, **volumes)
+    Path(settings.BENCH_DIR, 'volumes.json').write_text(json.dumps(volumes))
+    print(json.dumps(volumes, indent=2))
+
+
+def run_command(args):
+    from django.conf import settings
+
+    from .runner import metadata, run_client, run_http
+    from .scenarios import missing_operations
+
+    missing = missing_operations()
+    if missing:
+        sys.exit(f'Нет сценариев для эндпоинтов: {missing}')
+    volumes_file = Path(settings.BENCH_DIR, 'volumes.json')
+    volumes = (
+        json.loads(volumes_file.read_text()) if volumes_file.exists() else None
+    )
+    report = {
+        'meta': metadata(volumes),
+        'client': run_client(args.iterations, args.warmup, args.scenario),
+    }
+    if args.http:
+        report['http'] = run_http(
+            args.duration, args.concurrency, args.workers, names=args.scenario
+        )
+    _write(report, args.output)
+
+
+def compare_command(args):
+    from .compare import compare
+
+    old = json.loads(Path(args.base).read_text(encoding='utf-8'))
+    new = json.loads(Path(args.current).read_text(encoding='utf-8'))
+    regressions = compare(old, new, args.threshold, args.min_delta_ms)
+    for line in regressions:
+        print(line)
+    sys.exit(1 if regressions else 0)
+
+
+def budgets_command(args):
+    from .budgets import check
+
+    failures = check(args.scenario)
+    for failure in failures:
+        print(failure, end='\n\n')
+    if failures:
+        sys.exit(f'Бюджет SQL-запросов превышен: {len(failures)}')
+    print('Бюджеты SQL-запросов соблюдены.')
+
+
+def json_command(args):
+    from .json_codecs import run
+
+    report = run(args.iterations)
+    _write(report, args.output)
+    mismatched = [
+        name
+        for name, result in report['payloads'].items()
+        if not (result['identical'] and result['round_trip'])
+    ]
+    if mismatched:
+        sys.exit(
+            f'Вывод отличается от стандартного JSONRenderer: {mismatched}'
+        )
+
+
+def compression_command(args):
+    from .compression import run
+
+    _write(run(args.iterations), args.output)
+
+
+def feed_command(args):
+    from .feed import run
+
+    report = run(args.iterations)
+    _write(report, args.output)
+    if not all(result['identical'] for result in report.values()):
+        sys.exit('Лента отличается от прямого запроса к подпискам.')
+
+
+def serializers_command(args):
+    from .serializers import run
+
+    report = run(args.iterations)
+    _write(report, args.output)
+    mismatched = [
+        name for name, result in report.items() if not result['identical']
+    ]
+    if mismatched:
+        sys.exit(f'Ответ отличается от сериализаторов DRF: {mismatched}')
+
+
+def startup_command(args):
+    from .startup import check
+
+    report, failures = check()
+    _write(
+        {name: report[name] for name in ('phases', 'seconds', 'rss')},
+        args.output,
+    )
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit('Порог запуска превышен.')
+
+
+def main():
+    _setup()
+    from .seed import DEFAULT_VOLUMES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help='Заполнить базу данными.')
+    seed.add_argument('--seed', type=int, default=0)
+    for name, value in DEFAULT_VOLUMES.items():
+        seed.add_argument(
+            f'--{name.replace("_", "-")}', type=int, default=value
+        )
+    seed.set_defaults(handler=seed_command)
+
+    run = commands.add_parser('run', help='Запустить замеры.')
+    run.add_argument('--iterations', type=int, default=50)
+    run.add_argument('--warmup', type=int, default=5)
+    run.add_argument('--scenario', action='append', help='Имя сценария.')
+    run.add_argument('--http', action='store_true')
+    run.add_argument('--duration', type=float, default=5.0)
+    run.add_argument('--concurrency', type=int, default=8)
+    run.add_argument('--workers', type=int, default=1)
+    run.add_argument('--output')
+    run.set_defaults(handler=run_command)
+
+    compare = commands.add_parser('compare', help='Сравнить два отчёта.')
+    compare.add_argument('base')
+    compare.add_argument('current')
+    compare.add_argument('--threshold', type=float, default=0.2)
+    compare.add_argument('--min-delta-ms', type=float, default=1.0)
+    compare.set_defaults(handler=compare_command)
+
+    budgets = commands.add_parser(
+        'budgets', help='Проверить бюджеты SQL-запросов.'
+    )
+    budgets.add_argument('--scenario', action='append', help='Имя сценария.')
+    budgets.set_defaults(handler=budgets_command)
+
+    json_ = commands.add_parser(
+        'json', help='Сравнить JSON-рендереры и парсеры.'
+    )
+    json_.add_argument('--iterations', type=int, default=200)
+    json_.add_argument('--output')
+    json_.set_defaults(handler=json_command)
+
+    compression = commands.add_parser(
+        'compression', help='Сравнить уровни сжатия ответов.'
+    )
+    compression.add_argument('--iterations', type=int, default=20)
+    compression.add_argument('--output')
+    compression.set_defaults(handler=compression_command)
+
+    feed = commands.add_parser(
+        'feed', help='Сравнить ленту подписок с прямым запросом.'
+    )
+    feed.add_argument('--iterations', type=int, default=50)
+    feed.add_argument('--output')
+    feed.set_defaults(handler=feed_command)
+
+    serializers = commands.add_parser(
+        'serializers',
+        help='Сравнить сериализаторы DRF со сборкой из values().',
+    )
+    serializers.add_argument('--iterations', type=int, default=20)
+    serializers.add_argument('--output')
+    serializers.set_defaults(handler=serializers_command)
+
+    startup = commands.add_parser(
+        'startup', help='Проверить время и память запуска воркера.'
+    )
+    startup.add_argument('--output')
+    startup.set_defaults(handler=startup_command)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == '__main__':
+    main()
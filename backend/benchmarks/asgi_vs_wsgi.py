@@ -0,0 +1,69 @@
+"""
+Сравнение пропускной способности WSGI- и ASGI-развёртывания.
+
+Поднимает gunicorn с синхронным воркером (backend.wsgi) и gunicorn с
+воркером uvicorn (backend.asgi) с одинаковым числом воркеров и гоняет
+по обоим одинаковую нагрузку. Настройки Django и БД берутся из окружения.
+
+    python -m benchmarks.asgi_vs_wsgi --workers 1 --concurrency 1 8 32
+"""
+import argparse
+import json
+from pathlib import Path
+
+from benchmarks import loadgen
+from benchmarks.server import SERVERS, start_server
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/tags/',
+    '/api/ingredients/',
+)
+
+
+def compare(paths, concurrency_levels, duration, workers, port=8765):
+    results = {}
+    for kind in SERVERS:
+        process = start_server(kind, port, workers)
+        try:
+            results[kind] = {
+                path: {
+                    str(concurrency): loadgen.run(
+                        f'http://127.0.0.1:{port}{path}',
+                        concurrency,
+                        duration,
+                    )
+                    for concurrency in concurrency_levels
+                }
+                for path in paths
+            }
+        finally:
+            process.terminate()
+            process.wait()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--path', action='append', dest='paths')
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 8, 32]
+    )
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', help='Файл для сохранения результатов.')
+    args = parser.parse_args()
+    results = compare(
+        args.paths or DEFAULT_PATHS,
+        args.concurrency,
+        args.duration,
+        args.workers,
+    )
+    report = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(report, encoding='utf-8')
+    print(report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""
+Бюджеты SQL-запросов для всех сценариев.
+
+Каждый сценарий выполняется на двух объёмах данных. Проверка не проходит,
+если число запросов превышает бюджет или растёт вместе с объёмом данных
+(то есть с размером страницы), что обычно означает N+1.
+"""
+from django.db import connection
+from django.test import Client
+
+from .query_budget import QueryRecorder
+from .runner import _request
+from .scenarios import SCENARIOS, BenchContext
+from .seed import prepare_database
+
+BUDGETS = {
+    'GET /api/users/': 2,
+    'POST /api/users/': 4,
+    'GET /api/users/{id}/': 3,
+    'GET /api/users/me/': 2,
+    'GET /api/users/subscriptions/': 4,
+    'POST /api/users/{id}/subscribe/': 11,
+    'DELETE /api/users/{id}/subscribe/': 7,
+    'POST /api/users/set_password/': 4,
+    'POST /api/auth/token/login/': 5,
+    'POST /api/auth/token/logout/': 3,
+    'GET /api/tags/': 0,
+    'GET /api/tags/{id}/': 1,
+    'GET /api/ingredients/': 0,
+    'GET /api/ingredients/?name=': 1,
+    'GET /api/ingredients/{id}/': 1,
+    'GET /api/recipes/ (anonymous)': 3,
+    'GET /api/recipes/': 5,
+    'GET /api/recipes/ (not modified)': 5,
+    'GET /api/recipes/ (cold cards)': 8,
+    'GET /api/recipes/?is_favorited=1': 5,
+    'GET /api/recipes/?ordering=popular': 5,
+    'GET /api/recipes/?ordering=trending': 5,
+    'GET /api/recipes/?search=': 6,
+    'GET /api/recipes/feed/': 4,
+    'GET /api/recipes/feed/?before=': 4,
+    'GET /api/recipes/match/': 3,
+    'POST /api/recipes/': 20,
+    'POST /api/recipes/import/': 11,
+    'GET /api/recipes/{id}/ (anonymous)': 2,
+    'GET /api/recipes/{id}/': 4,
+    'GET /api/recipes/{id}/ (not modified)': 4,
+    'GET /api/recipes/{id}/similar/': 9,
+    'PATCH /api/recipes/{id}/': 23,
+    'DELETE /api/recipes/{id}/': 14,
+    'GET /api/recipes/download_shopping_cart/': 3,
+    'GET /api/recipes/download_shopping_cart/ (queued)': 5,
+    'GET /api/recipes/download_shopping_cart/{key}/': 2,
+    'POST /api/recipes/{id}/favorite/': 5,
+    'DELETE /api/recipes/{id}/favorite/': 6,
+    'POST /api/recipes/{id}/shopping_cart/': 5,
+    'DELETE /api/recipes/{id}/shopping_cart/': 6,
+}
+
+SIZES = (
+    {
+        'users': 4,
+        'recipes': 3,
+        'favorites_per_user': 1,
+        'carts_per_user': 1,
+        'follows_per_user': 2,
+        'ingredients_per_recipe': 2,
+        'tags_per_recipe': 1,
+    },
+    {
+        'users': 40,
+        'recipes': 200,
+        'favorites_per_user': 20,
+        'carts_per_user': 10,
+        'follows_per_user': 12,
+        'ingredients_per_recipe': 10,
+        'tags_per_recipe': 3,
+    },
+)
+
+
+def measure(names=None):
+    """Число запросов каждого сценария на каждом объёме данных."""
+    runs = []
+    for volumes in SIZES:
+        prepare_database(**volumes)
+        ctx = BenchContext()
+        client = Client()
+        recorders = {}
+        for item in SCENARIOS:
+            if names and item.name not in names:
+                continue
+            for attempt in range(2):
+                call = item.prepare(ctx)
+                recorder = QueryRecorder()
+                with connection.execute_wrapper(recorder):
+                    _request(client, ctx, item, call)
+                if call.cleanup:
+                    call.cleanup()
+            recorders[item.name] = recorder
+        runs.append(recorders)
+    return runs
+
+
+def check(names=None):
+    """Возвращает список нарушений бюджета."""
+    small, large = measure(names)
+    failures = []
+    for name, recorder in large.items():
+        budget = BUDGETS.get(name)
+        problems = []
+        if budget is None:
+            problems.append('бюджет не задан')
+        elif len(recorder) > budget:
+            problems.append(f'{len(recorder)} запросов при бюджете {budget}')
+        if len(recorder) > len(small[name]):
+            problems.append(
+                f'число запросов растёт с объёмом данных: '
+                f'{len(small[name])} -> {len(recorder)}'
+            )
+        if problems:
+            failures.append(
+                f'{name}: {"; ".join(problems)}\n{recorder.report()}'
+            )
+    return failures
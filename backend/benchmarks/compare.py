@@ -0,0 +1,34 @@
+METRICS = ('p50_ms', 'p95_ms', 'p99_ms', 'queries_mean')
+
+
+def compare(old, new, threshold=0.2, min_delta_ms=1.0):
+    """
+    Сравнивает два отчёта и возвращает список регрессий.
+
+    Регрессией считается рост времени больше чем на ``threshold`` (доля)
+    и не меньше чем на ``min_delta_ms``, а также любой рост числа
+    запросов к БД.
+    """
+    regressions = []
+    for section in ('client', 'http'):
+        before = old.get(section, {})
+        after = new.get(section, {})
+        for name, result in after.items():
+            if name not in before:
+                continue
+            for metric in METRICS:
+                if metric not in result or before[name].get(metric) is None:
+                    continue
+                previous = before[name][metric]
+                current = result[metric]
+                if metric == 'queries_mean':
+                    limit = previous
+                else:
+                    limit = max(
+                        previous * (1 + threshold), previous + min_delta_ms
+                    )
+                if current > limit:
+                    regressions.append(
+                        f'{section}: {name}: {metric} {previous} -> {current}'
+                    )
+    return regressions
@@ -0,0 +1,59 @@
+"""
+Размер и цена сжатия ответов API: gzip и brotli на разных уровнях, а также
+отдача заранее сжатого варианта из кэша.
+"""
+import gzip
+
+from django.test import Client
+
+from backend import compression
+
+from .json_codecs import _best_ms
+
+PAYLOADS = {
+    'tag-list': '/api/tags/',
+    'ingredient-list': '/api/ingredients/',
+    'recipe-list': '/api/recipes/',
+    'recipe-list-100': '/api/recipes/?limit=100',
+}
+
+LEVELS = {'gzip': (1, 6, 9)}
+if compression.brotli is not None:
+    LEVELS['br'] = (1, 5, 11)
+
+DECOMPRESSORS = {'gzip': gzip.decompress}
+if compression.brotli is not None:
+    DECOMPRESSORS['br'] = compression.brotli.decompress
+
+
+def run(iterations=20):
+    client = Client()
+    results = {}
+    for name, url in PAYLOADS.items():
+        body = client.get(url, HTTP_ACCEPT_ENCODING='identity').content
+        variants = {}
+        for encoding, levels in LEVELS.items():
+            function = compression.ENCODERS[encoding][0]
+            for level in levels:
+                compressed = function(body, level)
+                variants[f'{encoding}-{level}'] = {
+                    'bytes': len(compressed),
+                    'ratio': round(len(body) / len(compressed), 2),
+                    'compress_ms': _best_ms(
+                        lambda: function(body, level), iterations
+                    ),
+                    'decompress_ms': _best_ms(
+                        lambda: DECOMPRESSORS[encoding](compressed),
+                        iterations,
+                    ),
+                }
+            compression.compress_cached(body, encoding)
+            variants[f'{encoding}-cached'] = {
+                'bytes': len(compression.compress_cached(body, encoding)),
+                'compress_ms': _best_ms(
+                    lambda: compression.compress_cached(body, encoding),
+                    iterations,
+                ),
+            }
+        results[name] = {'bytes': len(body), 'variants': variants}
+    return results
@@ -0,0 +1,102 @@
+"""
+Лента подписок: прямой запрос Recipe JOIN Follow против лент TimelineEntry
+при разном числе подписок читателя.
+
+Данные создаются в транзакции, которая в конце откатывается. У каждого
+читателя свои авторы плюс один общий автор с числом подписчиков больше
+FEED_FANOUT_MAX_FOLLOWERS: его рецепты подмешиваются при чтении.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from recipe import timeline
+from recipe.models import Recipe
+from users.models import Follow, User
+
+from .json_codecs import _best_ms
+from .seed import BATCH_SIZE
+
+FOLLOWS = (10, 100, 1000, 5000)
+RECIPES_PER_AUTHOR = 20
+
+
+def _naive(reader, limit):
+    return list(
+        Recipe.objects.filter(author__following__user=reader)
+        .order_by('-id')
+        .values_list('id', flat=True)[:limit]
+    )
+
+
+def _create_users(prefix, count):
+    User.objects.bulk_create(
+        [
+            User(
+                username=f'{prefix}{number}',
+                email=f'{prefix}{number}@example.com',
+                first_name='Лента',
+                last_name='Бенчмарк',
+            )
+            for number in range(count)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    # bulk_create в SQLite не возвращает id.
+    return list(
+        User.objects.filter(username__startswith=prefix).order_by('id')
+    )
+
+
+def _prepare():
+    authors = _create_users('feed-author-', sum(FOLLOWS) + 1)
+    popular, authors = authors[0], authors[1:]
+    readers = _create_users('feed-reader-', len(FOLLOWS))
+    fans = _create_users('feed-fan-', settings.FEED_FANOUT_MAX_FOLLOWERS)
+    # Рецепты авторов вперемешку, как если бы их публиковали по очереди.
+    Recipe.objects.bulk_create(
+        [
+            Recipe(
+                name=f'Лента {number}',
+                author=author,
+                text='Текст',
+                image='recipes/benchmark.png',
+                cooking_time=10,
+            )
+            for number in range(RECIPES_PER_AUTHOR)
+            for author in [popular] + authors
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    follows = [Follow(user=fan, author=popular) for fan in fans]
+    start = 0
+    for reader, count in zip(readers, FOLLOWS):
+        follows.append(Follow(user=reader, author=popular))
+        follows.extend(
+            Follow(user=reader, author=author)
+            for author in authors[start : start + count]
+        )
+        start += count
+    Follow.objects.bulk_create(follows, batch_size=BATCH_SIZE)
+    timeline.rebuild()
+    return readers
+
+
+def run(iterations=50, limit=6):
+    results = {}
+    with transaction.atomic():
+        readers = _prepare()
+        for reader, count in zip(readers, FOLLOWS):
+            results[count] = {
+                'naive_ms': _best_ms(
+                    lambda: _naive(reader, limit), iterations
+                ),
+                'feed_ms': _best_ms(
+                    lambda: timeline.feed(reader, limit=limit), iterations
+                ),
+                'identical': timeline.feed(reader, limit=limit)
+                == _naive(reader, limit),
+            }
+        transaction.set_rollback(True)
+    cache.delete(timeline.POPULAR_AUTHORS_KEY)
+    return results
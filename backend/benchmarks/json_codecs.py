@@ -0,0 +1,68 @@
+"""
+Сравнение стандартных JSONRenderer/JSONParser из DRF с FastJSONRenderer и
+FastJSONParser на реальных ответах API: вывод должен совпадать байт в байт.
+"""
+import io
+import time
+
+from django.test import Client
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+
+from .scenarios import BenchContext
+
+PAYLOADS = {
+    'recipe-list': '/api/recipes/',
+    'recipe-list-100': '/api/recipes/?limit=100',
+    'ingredient-list': '/api/ingredients/',
+}
+
+
+def _best_ms(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return round(min(timings) * 1000, 4)
+
+
+def _compare(stock, fast, iterations):
+    stock_ms = _best_ms(stock, iterations)
+    fast_ms = _best_ms(fast, iterations)
+    return {
+        'stdlib_ms': stock_ms,
+        'fast_ms': fast_ms,
+        'speedup': round(stock_ms / fast_ms, 2) if fast_ms else None,
+    }
+
+
+def run(iterations=200):
+    ctx = BenchContext()
+    client = Client()
+    results = {'orjson': orjson is not None, 'payloads': {}}
+    for name, url in PAYLOADS.items():
+        data = client.get(url, HTTP_AUTHORIZATION=f'Token {ctx.token}').data
+        stock_bytes = JSONRenderer().render(data)
+        fast_bytes = FastJSONRenderer().render(data)
+        parsed = FastJSONParser().parse(io.BytesIO(stock_bytes))
+        results['payloads'][name] = {
+            'bytes': len(stock_bytes),
+            'identical': stock_bytes == fast_bytes,
+            'round_trip': parsed
+            == JSONParser().parse(io.BytesIO(stock_bytes)),
+            'render': _compare(
+                lambda: JSONRenderer().render(data),
+                lambda: FastJSONRenderer().render(data),
+                iterations,
+            ),
+            'parse': _compare(
+                lambda: JSONParser().parse(io.BytesIO(stock_bytes)),
+                lambda: FastJSONParser().parse(io.BytesIO(stock_bytes)),
+                iterations,
+            ),
+        }
+    return results
@@ -0,0 +1,113 @@
+"""
+Простой генератор нагрузки по HTTP.
+
+Каждый клиент держит собственное keep-alive соединение и выполняет
+запросы по кругу, пока не истечёт заданное время.
+
+    python -m benchmarks.loadgen http://127.0.0.1:8000/api/recipes/ \\
+        --concurrency 32 --duration 10
+"""
+import argparse
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+def summarize(latencies, errors, elapsed):
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'p50_ms': _ms(percentile(latencies, 0.50)),
+        'p95_ms': _ms(percentile(latencies, 0.95)),
+        'p99_ms': _ms(percentile(latencies, 0.99)),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def _client(url, headers, deadline, latencies, errors, lock):
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    connection_class = (
+        http.client.HTTPSConnection
+        if parts.scheme == 'https'
+        else http.client.HTTPConnection
+    )
+    connection = connection_class(parts.netloc, timeout=30)
+    local_latencies = []
+    local_errors = 0
+    while time.monotonic() < deadline:
+        started = time.monotonic()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            if response.status >= 400:
+                local_errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            local_errors += 1
+            connection.close()
+            continue
+        local_latencies.append(time.monotonic() - started)
+    connection.close()
+    with lock:
+        latencies.extend(local_latencies)
+        errors[0] += local_errors
+
+
+def run(url, concurrency=16, duration=10.0, headers=None):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    threads = [
+        threading.Thread(
+            target=_client,
+            args=(url, headers or {}, deadline, latencies, errors, lock),
+        )
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.monotonic() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('url')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument(
+        '--header',
+        action='append',
+        default=[],
+        help='Заголовок вида "Authorization: Token ...".',
+    )
+    args = parser.parse_args()
+    headers = dict(
+        (name.strip(), value.strip())
+        for name, value in (header.split(':', 1) for header in args.header)
+    )
+    result = run(args.url, args.concurrency, args.duration, headers)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
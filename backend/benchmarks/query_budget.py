@@ -0,0 +1,113 @@
+"""
+Ограничение числа SQL-запросов.
+
+    with query_budget(5):
+        client.get('/api/recipes/')
+
+    @query_budget(3)
+    def check():
+        ...
+
+При превышении бюджета выбрасывается ``QueryBudgetExceeded`` со списком
+запросов, сгруппированных по месту вызова в коде проекта.
+"""
+import traceback
+from collections import defaultdict
+from contextlib import ContextDecorator
+from pathlib import Path
+
+import django.db
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+# Обёртки вокруг всего запроса: место вызова в них ничего не говорит.
+IGNORED = (
+    Path(__file__).resolve().parent,
+    PROJECT_DIR / 'backend' / 'middleware.py',
+    PROJECT_DIR / 'backend' / 'db',
+)
+DJANGO_DB_DIR = Path(django.db.__file__).resolve().parent
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def _is_under(path, directory):
+    return path == directory or directory in path.parents
+
+
+def _describe(frame, path):
+    if _is_under(path, PROJECT_DIR):
+        location = path.relative_to(PROJECT_DIR)
+    else:
+        location = str(path).rpartition('site-packages/')[2]
+    return f'{location}:{frame.lineno} ({frame.name})'
+
+
+def call_site():
+    """
+    Место вызова запроса: ближайший кадр за пределами django.db, а если
+    он в библиотеке (DRF, django-filter), — ещё и ближайший кадр проекта.
+    """
+    sites = []
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        path = Path(frame.filename).resolve()
+        if _is_under(path, DJANGO_DB_DIR) or any(
+            _is_under(path, ignored) for ignored in IGNORED
+        ):
+            continue
+        sites.append(_describe(frame, path))
+        if _is_under(path, PROJECT_DIR):
+            break
+    if not sites:
+        return '<неизвестно>'
+    return ' <- '.join(sites[:1] + sites[-1:] if len(sites) > 1 else sites)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries.append((call_site(), sql))
+        return execute(sql, params, many, context)
+
+    def __len__(self):
+        return len(self.queries)
+
+    def report(self, limit=3):
+        grouped = defaultdict(list)
+        for site, sql in self.queries:
+            grouped[site].append(sql)
+        lines = []
+        for site, statements in sorted(
+            grouped.items(), key=lambda item: -len(item[1])
+        ):
+            lines.append(f'  {len(statements)} × {site}')
+            lines.extend(
+                f'      {statement[:300]}' for statement in statements[:limit]
+            )
+        return '\n'.join(lines)
+
+
+class query_budget(ContextDecorator):
+    def __init__(self, budget, using=DEFAULT_DB_ALIAS, label=''):
+        self.budget = budget
+        self.using = using
+        self.label = label
+
+    def __enter__(self):
+        self.recorder = QueryRecorder()
+        self._wrapper = connections[self.using].execute_wrapper(self.recorder)
+        self._wrapper.__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self._wrapper.__exit__(exc_type, exc_value, tb)
+        if exc_type is None and len(self.recorder) > self.budget:
+            raise QueryBudgetExceeded(
+                f'{self.label}: {len(self.recorder)} SQL-запросов при '
+                f'бюджете {self.budget}:\n{self.recorder.report()}'
+            )
+        return False
@@ -0,0 +1,142 @@
+import json
+import os
+import platform
+import resource
+import subprocess
+import time
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from . import loadgen
+from .loadgen import percentile
+from .scenarios import SCENARIOS, BenchContext
+from .server import start_server
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as file:
+            resident_pages = int(file.read().split()[1])
+        return round(resident_pages * os.sysconf('SC_PAGE_SIZE') / 2**20, 1)
+    except OSError:
+        # На macOS ru_maxrss в байтах, на Linux — в килобайтах.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        divisor = 2**20 if platform.system() == 'Darwin' else 2**10
+        return round(peak / divisor, 1)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+
+def _request(client, ctx, item, call):
+    headers = {}
+    token = call.token or (None if item.anonymous else ctx.token)
+    if token:
+        headers['HTTP_AUTHORIZATION'] = f'Token {token}'
+    for name, value in (call.headers or {}).items():
+        headers[f'HTTP_{name.upper().replace("-", "_")}'] = value
+    data = call.data
+    if data is None:
+        data = ''
+    elif not isinstance(data, str):
+        data = json.dumps(data)
+    return client.generic(
+        item.method,
+        call.url,
+        data,
+        content_type=call.content_type,
+        **headers,
+    )
+
+
+def run_client(iterations=50, warmup=5, names=None):
+    """Прогоняет сценарии через тестовый клиент Django."""
+    client = Client()
+    ctx = BenchContext()
+    results = {}
+    for item in SCENARIOS:
+        if names and item.name not in names:
+            continue
+        latencies = []
+        queries = []
+        statuses = set()
+        for iteration in range(warmup + iterations):
+            call = item.prepare(ctx)
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = _request(client, ctx, item, call)
+                elapsed = time.perf_counter() - started
+            if call.cleanup:
+                call.cleanup()
+            if iteration < warmup:
+                continue
+            statuses.add(response.status_code)
+            latencies.append(elapsed)
+            queries.append(len(captured.captured_queries))
+        results[item.name] = {
+            'method': item.method,
+            'path': item.path,
+            'status': sorted(statuses),
+            'p50_ms': _ms(percentile(latencies, 0.50)),
+            'p95_ms': _ms(percentile(latencies, 0.95)),
+            'p99_ms': _ms(percentile(latencies, 0.99)),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+            'queries_max': max(queries),
+            'rss_mb': current_rss_mb(),
+        }
+    return results
+
+
+def run_http(duration=5.0, concurrency=8, workers=1, port=8765, names=None):
+    """Прогоняет читающие сценарии через gunicorn и генератор нагрузки."""
+    ctx = BenchContext()
+    process = start_server(
+        'wsgi',
+        port,
+        workers,
+        env={'DJANGO_SETTINGS_MODULE': os.environ['DJANGO_SETTINGS_MODULE']},
+    )
+    results = {}
+    try:
+        for item in SCENARIOS:
+            if not item.http or (names and item.name not in names):
+                continue
+            call = item.prepare(ctx)
+            headers = {}
+            if not item.anonymous:
+                headers['Authorization'] = f'Token {ctx.token}'
+            headers.update(call.headers or {})
+            results[item.name] = loadgen.run(
+                f'http://127.0.0.1:{port}{call.url}',
+                concurrency,
+                duration,
+                headers,
+            )
+    finally:
+        process.terminate()
+        process.wait()
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata(volumes):
+    return {
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'database': connection.vendor,
+        'volumes': volumes,
+    }
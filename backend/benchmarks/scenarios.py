@@ -0,0 +1,498 @@
+"""
+Сценарии запросов ко всем эндпоинтам из docs/openapi-schema.yml.
+
+Каждый сценарий готовит данные вне замера (``prepare``) и при
+необходимости убирает за собой (``cleanup``), чтобы повторные прогоны
+работали с одним и тем же состоянием базы.
+"""
+import base64
+import itertools
+import json
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, NamedTuple, Optional
+
+import yaml
+from django.core.cache import cache
+from django.test import Client
+from PIL import Image
+from rest_framework.authtoken.models import Token
+
+from api import cards, documents
+from api.models import DocumentJob
+from recipe import timeline
+from recipe.models import (
+    Favourite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from recipe.signals import send_recipes_changed
+from users.models import Follow, User
+
+from .seed import PASSWORD
+
+SCHEMA_PATH = (
+    Path(__file__).resolve().parent.parent.parent
+    / 'docs'
+    / 'openapi-schema.yml'
+)
+
+SCENARIOS = []
+# Строк в сценарии импорта; последняя с ошибкой.
+IMPORT_LINES = 20
+
+
+class Call(NamedTuple):
+    url: str
+    data: Optional[dict] = None
+    cleanup: Optional[Callable] = None
+    token: Optional[str] = None
+    # Строка data уходит телом запроса как есть.
+    content_type: str = 'application/json'
+    headers: Optional[dict] = None
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    path: str
+    anonymous: bool
+    http: bool
+    prepare: Callable
+
+
+def scenario(method, path, name=None, anonymous=False, http=False):
+    def decorator(prepare):
+        SCENARIOS.append(
+            Scenario(
+                name or f'{method} {path}',
+                method,
+                path,
+                anonymous,
+                http,
+                prepare,
+            )
+        )
+        return prepare
+
+    return decorator
+
+
+def schema_operations():
+    with open(SCHEMA_PATH, encoding='utf-8') as file:
+        schema = yaml.safe_load(file)
+    return {
+        (method.upper(), path)
+        for path, operations in schema['paths'].items()
+        for method in operations
+        if method in ('get', 'post', 'put', 'patch', 'delete')
+    }
+
+
+def missing_operations():
+    covered = {(item.method, item.path) for item in SCENARIOS}
+    return sorted(schema_operations() - covered)
+
+
+def _png_base64():
+    buffer = BytesIO()
+    Image.new('RGB', (8, 8), (200, 120, 40)).save(buffer, format='PNG')
+    encoded = base64.b64encode(buffer.getvalue()).decode()
+    return f'data:image/png;base64,{encoded}'
+
+
+class BenchContext:
+    def __init__(self):
+        self.user = User.objects.order_by('id')[0]
+        self.token = Token.objects.get(user=self.user).key
+        self.other = User.objects.exclude(id=self.user.id).order_by('id')[0]
+        self.login_user = User.objects.exclude(
+            id__in=(self.user.id, self.other.id)
+        ).order_by('id')[0]
+        self.recipe_id = (
+            Recipe.objects.exclude(author=self.user)
+            .order_by('id')
+            .values_list('id', flat=True)[0]
+        )
+        self.tag_id = Tag.objects.order_by('id').values_list('id', flat=True)[
+            0
+        ]
+        self.ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)[:5]
+        )
+        self.image = _png_base64()
+        self.counter = itertools.count()
+
+    def recipe_payload(self):
+        return {
+            'name': f'Бенчмарк {next(self.counter)}',
+            'text': 'Нарезать, перемешать и подавать.',
+            'cooking_time': 15,
+            'image': self.image,
+            'tags': [self.tag_id],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 10}
+                for ingredient_id in self.ingredient_ids
+            ],
+        }
+
+    def own_recipe(self):
+        recipe = Recipe.objects.create(
+            name=f'Свой рецепт {next(self.counter)}',
+            author=self.user,
+            text='Текст',
+            image='recipes/benchmark.png',
+            cooking_time=10,
+        )
+        recipe.tags.set([self.tag_id])
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(
+                recipe=recipe, ingredient_id=ingredient_id, amount=1
+            )
+            for ingredient_id in self.ingredient_ids
+        )
+        return recipe
+
+
+def _delete(queryset):
+    return lambda: queryset.delete()
+
+
+@scenario('GET', '/api/users/', anonymous=True, http=True)
+def users_list(ctx):
+    return Call('/api/users/')
+
+
+@scenario('POST', '/api/users/', anonymous=True)
+def users_create(ctx):
+    number = next(ctx.counter)
+    email = f'bench{number}@example.com'
+    return Call(
+        '/api/users/',
+        {
+            'email': email,
+            'username': f'bench{number}',
+            'first_name': 'Бенч',
+            'last_name': 'Марк',
+            'password': PASSWORD,
+        },
+        _delete(User.objects.filter(email=email)),
+    )
+
+
+@scenario('GET', '/api/users/{id}/', http=True)
+def users_detail(ctx):
+    return Call(f'/api/users/{ctx.other.id}/')
+
+
+@scenario('GET', '/api/users/me/', http=True)
+def users_me(ctx):
+    return Call('/api/users/me/')
+
+
+@scenario('GET', '/api/users/subscriptions/', http=True)
+def users_subscriptions(ctx):
+    return Call('/api/users/subscriptions/?recipes_limit=3')
+
+
+@scenario('POST', '/api/users/{id}/subscribe/')
+def users_subscribe(ctx):
+    follows = Follow.objects.filter(user=ctx.user, author=ctx.other)
+    follows.delete()
+    return Call(
+        f'/api/users/{ctx.other.id}/subscribe/', cleanup=_delete(follows)
+    )
+
+
+@scenario('DELETE', '/api/users/{id}/subscribe/')
+def users_unsubscribe(ctx):
+    Follow.objects.get_or_create(user=ctx.user, author=ctx.other)
+    return Call(f'/api/users/{ctx.other.id}/subscribe/')
+
+
+@scenario('POST', '/api/users/set_password/')
+def users_set_password(ctx):
+    def cleanup():
+        ctx.user.set_password(PASSWORD)
+        ctx.user.save(update_fields=['password'])
+
+    return Call(
+        '/api/users/set_password/',
+        {'current_password': PASSWORD, 'new_password': f'{PASSWORD}-new'},
+        cleanup,
+    )
+
+
+@scenario('POST', '/api/auth/token/login/', anonymous=True)
+def token_login(ctx):
+    return Call(
+        '/api/auth/token/login/',
+        {'email': ctx.login_user.email, 'password': PASSWORD},
+        _delete(Token.objects.filter(user=ctx.login_user)),
+    )
+
+
+@scenario('POST', '/api/auth/token/logout/')
+def token_logout(ctx):
+    token, _ = Token.objects.get_or_create(user=ctx.login_user)
+    return Call('/api/auth/token/logout/', token=token.key)
+
+
+@scenario('GET', '/api/tags/', anonymous=True, http=True)
+def tags_list(ctx):
+    return Call('/api/tags/')
+
+
+@scenario('GET', '/api/tags/{id}/', anonymous=True, http=True)
+def tags_detail(ctx):
+    return Call(f'/api/tags/{ctx.tag_id}/')
+
+
+@scenario('GET', '/api/ingredients/', anonymous=True, http=True)
+def ingredients_list(ctx):
+    return Call('/api/ingredients/')
+
+
+@scenario(
+    'GET',
+    '/api/ingredients/',
+    name='GET /api/ingredients/?name=',
+    anonymous=True,
+    http=True,
+)
+def ingredients_search(ctx):
+    return Call('/api/ingredients/?name=%D0%B0%D0%B1')
+
+
+@scenario('GET', '/api/ingredients/{id}/', anonymous=True, http=True)
+def ingredients_detail(ctx):
+    return Call(f'/api/ingredients/{ctx.ingredient_ids[0]}/')
+
+
+@scenario(
+    'GET',
+    '/api/recipes/',
+    name='GET /api/recipes/ (anonymous)',
+    anonymous=True,
+    http=True,
+)
+def recipes_list_anonymous(ctx):
+    return Call('/api/recipes/')
+
+
+@scenario('GET', '/api/recipes/', http=True)
+def recipes_list(ctx):
+    return Call('/api/recipes/?limit=6')
+
+
+@scenario(
+    'GET', '/api/recipes/', name='GET /api/recipes/ (not modified)', http=True
+)
+def recipes_list_not_modified(ctx):
+    return _not_modified(ctx, '/api/recipes/?limit=6')
+
+
+@scenario('GET', '/api/recipes/', name='GET /api/recipes/ (cold cards)')
+def recipes_list_cold(ctx):
+    cache.delete_many(
+        [
+            cards.card_key(recipe_id, updated_at)
+            for recipe_id, updated_at in Recipe.objects.values_list(
+                'id', 'updated_at'
+            )
+        ]
+    )
+    return Call('/api/recipes/?limit=6')
+
+
+@scenario('GET', '/api/recipes/', name='GET /api/recipes/?is_favorited=1')
+def recipes_list_favorited(ctx):
+    return Call('/api/recipes/?is_favorited=1')
+
+
+@scenario('GET', '/api/recipes/feed/', http=True)
+def recipes_feed(ctx):
+    return Call('/api/recipes/feed/?limit=6')
+
+
+@scenario('GET', '/api/recipes/feed/', name='GET /api/recipes/feed/?before=')
+def recipes_feed_next(ctx):
+    # Сразу за первой записью ленты: страница не пуста на любом объёме.
+    recipe_ids = timeline.feed(ctx.user, limit=1)
+    before = recipe_ids[0] + 1 if recipe_ids else ctx.recipe_id
+    return Call(f'/api/recipes/feed/?before={before}&limit=6')
+
+
+@scenario('GET', '/api/recipes/match/', http=True)
+def recipes_match(ctx):
+    # Продукты одного из рецептов: совпадения есть на любом объёме данных.
+    ingredients = ','.join(
+        str(ingredient_id)
+        for ingredient_id in IngredientInRecipe.objects.filter(
+            recipe_id=ctx.recipe_id
+        ).values_list('ingredient_id', flat=True)
+    )
+    return Call(f'/api/recipes/match/?ingredients={ingredients}&limit=10')
+
+
+@scenario('GET', '/api/recipes/', name='GET /api/recipes/?ordering=popular')
+def recipes_popular(ctx):
+    return Call('/api/recipes/?ordering=popular&limit=6')
+
+
+@scenario('GET', '/api/recipes/', name='GET /api/recipes/?ordering=trending')
+def recipes_trending(ctx):
+    return Call('/api/recipes/?ordering=trending&limit=6')
+
+
+@scenario('GET', '/api/recipes/', name='GET /api/recipes/?search=')
+def recipes_search(ctx):
+    return Call('/api/recipes/?search=чеснок+масло')
+
+
+@scenario('POST', '/api/recipes/')
+def recipes_create(ctx):
+    payload = ctx.recipe_payload()
+    return Call(
+        '/api/recipes/',
+        payload,
+        _delete(Recipe.objects.filter(name=payload['name'])),
+    )
+
+
+@scenario('POST', '/api/recipes/import/')
+def recipes_import(ctx):
+    admin, _ = User.objects.get_or_create(
+        username='bench-admin',
+        defaults={'email': 'bench-admin@example.com', 'is_staff': True},
+    )
+    token, _ = Token.objects.get_or_create(user=admin)
+    payloads = [ctx.recipe_payload() for _ in range(IMPORT_LINES)]
+    payloads[-1]['tags'] = []
+    return Call(
+        '/api/recipes/import/',
+        '\n'.join(json.dumps(payload) for payload in payloads),
+        _delete(
+            Recipe.objects.filter(
+                name__in=[payload['name'] for payload in payloads]
+            )
+        ),
+        token.key,
+        'application/x-ndjson',
+    )
+
+
+@scenario(
+    'GET',
+    '/api/recipes/{id}/',
+    name='GET /api/recipes/{id}/ (anonymous)',
+    anonymous=True,
+    http=True,
+)
+def recipes_detail_anonymous(ctx):
+    return Call(f'/api/recipes/{ctx.recipe_id}/')
+
+
+@scenario('GET', '/api/recipes/{id}/', http=True)
+def recipes_detail(ctx):
+    return Call(f'/api/recipes/{ctx.recipe_id}/')
+
+
+def _not_modified(ctx, url):
+    response = Client().get(url, HTTP_AUTHORIZATION=f'Token {ctx.token}')
+    return Call(url, headers={'If-None-Match': response['ETag']})
+
+
+@scenario(
+    'GET',
+    '/api/recipes/{id}/',
+    name='GET /api/recipes/{id}/ (not modified)',
+    http=True,
+)
+def recipes_detail_not_modified(ctx):
+    return _not_modified(ctx, f'/api/recipes/{ctx.recipe_id}/')
+
+
+@scenario('GET', '/api/recipes/{id}/similar/', http=True)
+def recipes_similar(ctx):
+    # Два одинаковых рецепта: похожий найдётся на любом объёме данных.
+    recipes = [ctx.own_recipe(), ctx.own_recipe()]
+    ids = [recipe.id for recipe in recipes]
+    send_recipes_changed(ids)
+    return Call(
+        f'/api/recipes/{ids[0]}/similar/?limit=6',
+        cleanup=_delete(Recipe.objects.filter(id__in=ids)),
+    )
+
+
+@scenario('PATCH', '/api/recipes/{id}/')
+def recipes_update(ctx):
+    recipe = ctx.own_recipe()
+    payload = ctx.recipe_payload()
+    del payload['image']
+    return Call(
+        f'/api/recipes/{recipe.id}/',
+        payload,
+        _delete(Recipe.objects.filter(id=recipe.id)),
+    )
+
+
+@scenario('DELETE', '/api/recipes/{id}/')
+def recipes_delete(ctx):
+    return Call(f'/api/recipes/{ctx.own_recipe().id}/')
+
+
+def _rendered_shopping_cart(user):
+    job = documents.shopping_cart_job(user)
+    with ThreadPoolExecutor(1) as executor:
+        while documents.run(executor, 1):
+            pass
+    return job.key
+
+
+@scenario('GET', '/api/recipes/download_shopping_cart/', http=True)
+def recipes_download_shopping_cart(ctx):
+    _rendered_shopping_cart(ctx.user)
+    return Call('/api/recipes/download_shopping_cart/')
+
+
+@scenario(
+    'GET',
+    '/api/recipes/download_shopping_cart/',
+    name='GET /api/recipes/download_shopping_cart/ (queued)',
+)
+def recipes_download_shopping_cart_queued(ctx):
+    jobs = DocumentJob.objects.filter(
+        key=documents.shopping_cart_job(ctx.user).key
+    )
+    jobs.delete()
+    return Call('/api/recipes/download_shopping_cart/', cleanup=_delete(jobs))
+
+
+@scenario('GET', '/api/recipes/download_shopping_cart/{key}/', http=True)
+def recipes_download_shopping_cart_job(ctx):
+    key = _rendered_shopping_cart(ctx.user)
+    return Call(f'/api/recipes/download_shopping_cart/{key}/')
+
+
+def _membership_scenarios(model, action):
+    @scenario('POST', f'/api/recipes/{{id}}/{action}/')
+    def add(ctx):
+        items = model.objects.filter(user=ctx.user, recipe_id=ctx.recipe_id)
+        items.delete()
+        return Call(
+            f'/api/recipes/{ctx.recipe_id}/{action}/', cleanup=_delete(items)
+        )
+
+    @scenario('DELETE', f'/api/recipes/{{id}}/{action}/')
+    def remove(ctx):
+        model.objects.get_or_create(user=ctx.user, recipe_id=ctx.recipe_id)
+        return Call(f'/api/recipes/{ctx.recipe_id}/{action}/')
+
+
+_membership_scenarios(Favourite, 'favorite')
+_membership_scenarios(ShoppingCart, 'shopping_cart')
@@ -0,0 +1,245 @@
+import csv
+import random
+from collections import defaultdict
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from recipe import rankings, timeline
+from recipe.models import (
+    Favourite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    RecipeActivity,
+    ShoppingCart,
+    Tag,
+)
+from recipe.signals import send_recipes_changed
+from users.models import Follow, User
+
+DATA_DIR = Path(__file__).resolve().parent.parent.parent / 'data'
+
+PASSWORD = 'benchmark-password'
+
+DEFAULT_VOLUMES = {
+    'users': 200,
+    'recipes': 1000,
+    'favorites_per_user': 20,
+    'carts_per_user': 5,
+    'follows_per_user': 10,
+    'ingredients_per_recipe': 8,
+    'tags_per_recipe': 2,
+}
+
+TAGS = (
+    ('завтрак', '#fcea3f', 'breakfast'),
+    ('обед', '#00ff22', 'lunch'),
+    ('ужин', '#3135f7', 'dinner'),
+    ('десерт', '#f00ee4', 'dessert'),
+)
+
+WORDS = (
+    'нарезать обжарить добавить перемешать посолить поперчить варить '
+    'запекать остудить подавать соус тесто духовка сковорода кастрюля '
+    'минут огонь масло луковица чеснок зелень'
+).split()
+
+BATCH_SIZE = 2000
+
+
+def _bulk_create(model, objects):
+    model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+
+
+def _reset_sequences(*models):
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def _sample_pairs(rng, owners, targets, per_owner, exclude_self=False):
+    pairs = []
+    for owner in owners:
+        chosen = rng.sample(targets, min(per_owner, len(targets)))
+        pairs.extend(
+            (owner, target)
+            for target in chosen
+            if not (exclude_self and owner == target)
+        )
+    return pairs
+
+
+def read_ingredients():
+    with open(DATA_DIR / 'ingredients.csv', encoding='utf-8') as file:
+        return [
+            (name, measurement_unit)
+            for name, measurement_unit in csv.reader(file)
+        ]
+
+
+def _activity(rng, favorites, carts):
+    """Дневные счётчики для рейтингов за последние RANKING_WINDOW_DAYS."""
+    today = timezone.now().date()
+    counters = defaultdict(lambda: [0, 0])
+    for column, pairs in enumerate((favorites, carts)):
+        for _, recipe_id in pairs:
+            days_ago = rng.randrange(settings.RANKING_WINDOW_DAYS)
+            counters[recipe_id, today - timedelta(days=days_ago)][column] += 1
+    return [
+        RecipeActivity(
+            recipe_id=recipe_id,
+            day=day,
+            favorites=favorite_count,
+            carts=cart_count,
+        )
+        for (recipe_id, day), (favorite_count, cart_count) in counters.items()
+    ]
+
+
+@transaction.atomic
+def seed(seed_value=0, **volumes):
+    """
+    Заполняет пустую базу детерминированным набором данных.
+
+    Возвращает словарь с идентификаторами, которые нужны сценариям.
+    """
+    volumes = dict(DEFAULT_VOLUMES, **volumes)
+    rng = random.Random(seed_value)
+
+    _bulk_create(
+        Tag,
+        [
+            Tag(id=index, name=name, color=color, slug=slug)
+            for index, (name, color, slug) in enumerate(TAGS, start=1)
+        ],
+    )
+    _bulk_create(
+        Ingredient,
+        [
+            Ingredient(id=index, name=name, measurement_unit=unit)
+            for index, (name, unit) in enumerate(read_ingredients(), 1)
+        ],
+    )
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+
+    password = make_password(PASSWORD)
+    user_ids = list(range(1, volumes['users'] + 1))
+    _bulk_create(
+        User,
+        [
+            User(
+                id=user_id,
+                username=f'user{user_id}',
+                email=f'user{user_id}@example.com',
+                first_name=f'Имя{user_id}',
+                last_name=f'Фамилия{user_id}',
+                password=password,
+            )
+            for user_id in user_ids
+        ],
+    )
+
+    recipe_ids = list(range(1, volumes['recipes'] + 1))
+    _bulk_create(
+        Recipe,
+        [
+            Recipe(
+                id=recipe_id,
+                name=f'Рецепт {recipe_id}',
+                author_id=rng.choice(user_ids),
+                text=' '.join(rng.choices(WORDS, k=rng.randint(20, 120))),
+                image='recipes/benchmark.png',
+                cooking_time=rng.randint(5, 180),
+            )
+            for recipe_id in recipe_ids
+        ],
+    )
+    _bulk_create(
+        IngredientInRecipe,
+        [
+            IngredientInRecipe(
+                recipe_id=recipe_id,
+                ingredient_id=ingredient_id,
+                amount=rng.randint(1, 500),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in rng.sample(
+                ingredient_ids, volumes['ingredients_per_recipe']
+            )
+        ],
+    )
+    Recipe.tags.through.objects.bulk_create(
+        [
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in rng.sample(tag_ids, volumes['tags_per_recipe'])
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    favorites = _sample_pairs(
+        rng, user_ids, recipe_ids, volumes['favorites_per_user']
+    )
+    carts = _sample_pairs(rng, user_ids, recipe_ids, volumes['carts_per_user'])
+    _bulk_create(
+        Favourite,
+        [
+            Favourite(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_id in favorites
+        ],
+    )
+    _bulk_create(
+        ShoppingCart,
+        [
+            ShoppingCart(user_id=user_id, recipe_id=recipe_id)
+            for user_id, recipe_id in carts
+        ],
+    )
+    # Отдельный генератор: остальные данные не зависят от активности.
+    _bulk_create(
+        RecipeActivity,
+        _activity(random.Random(seed_value), favorites, carts),
+    )
+    _bulk_create(
+        Follow,
+        [
+            Follow(user_id=user_id, author_id=author_id)
+            for user_id, author_id in _sample_pairs(
+                rng,
+                user_ids,
+                user_ids,
+                volumes['follows_per_user'],
+                exclude_self=True,
+            )
+        ],
+    )
+    _reset_sequences(Tag, Ingredient, User, Recipe)
+    send_recipes_changed()
+    timeline.rebuild()
+    rankings.refresh()
+
+    for user_id in user_ids[:2]:
+        Token.objects.get_or_create(user_id=user_id)
+    return volumes
+
+
+def reset_database():
+    call_command('flush', interactive=False, verbosity=0)
+    # flush не отправляет сигналы, поэтому кэш справочников чистим сами.
+    cache.clear()
+
+
+def prepare_database(seed_value=0, **volumes):
+    call_command('migrate', interactive=False, verbosity=0)
+    reset_database()
+    return seed(seed_value, **volumes)
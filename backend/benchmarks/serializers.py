@@ -0,0 +1,120 @@
+"""
+Ответы списков рецептов и подписок: сериализаторы DRF против словарей из
+строк values_list() (api/lean.py).
+
+Сравниваются JSON обоих вариантов с учётом порядка ключей и время сборки
+в пересчёте на один объект. Нужна заполненная база бенчмарков.
+"""
+import json
+
+from django.db.models import Count, Prefetch
+from rest_framework.test import APIRequestFactory
+
+from api import lean
+from api.serializers import (
+    FollowListSerializer,
+    RecipeCardSerializer,
+    recipes_by_author,
+)
+from recipe.models import IngredientInRecipe, Recipe
+from users.models import Follow
+
+from .json_codecs import _best_ms
+
+RECIPES = 100
+SUBSCRIPTIONS = 50
+RECIPES_LIMIT = 3
+
+
+def _drf_recipes(recipe_ids):
+    recipes = (
+        Recipe.objects.filter(id__in=recipe_ids)
+        .select_related('author')
+        .prefetch_related(
+            'tags',
+            Prefetch(
+                'ingredients_for_recipes',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient'
+                ),
+            ),
+        )
+    )
+    return {recipe.id: RecipeCardSerializer(recipe).data for recipe in recipes}
+
+
+def _drf_subscriptions(user_id, request):
+    follows = list(
+        Follow.objects.filter(user_id=user_id)
+        .select_related('author')
+        .annotate(recipes_count=Count('author__recipes'))
+        .order_by('author_id')[:SUBSCRIPTIONS]
+    )
+    author_recipes = recipes_by_author(
+        [follow.author_id for follow in follows], RECIPES_LIMIT
+    )
+    return FollowListSerializer(
+        follows,
+        many=True,
+        context={'request': request, 'author_recipes': author_recipes},
+    ).data
+
+
+def _lean_subscriptions(user_id):
+    rows = (
+        Follow.objects.filter(user_id=user_id)
+        .annotate(recipes_count=Count('author__recipes'))
+        .order_by('author_id')
+        .values_list(*lean.SUBSCRIPTION_FIELDS)[:SUBSCRIPTIONS]
+    )
+    return lean.subscriptions(rows, RECIPES_LIMIT)
+
+
+def _ordered(cards, recipe_ids):
+    return [cards[recipe_id] for recipe_id in recipe_ids]
+
+
+def _dumps(data):
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _result(drf, lean_, count, iterations):
+    drf_ms = _best_ms(drf, iterations)
+    lean_ms = _best_ms(lean_, iterations)
+    return {
+        'items': count,
+        'identical': _dumps(drf()) == _dumps(lean_()),
+        'drf_ms_per_item': round(drf_ms / count, 4) if count else None,
+        'lean_ms_per_item': round(lean_ms / count, 4) if count else None,
+        'speedup': round(drf_ms / lean_ms, 2) if lean_ms else None,
+    }
+
+
+def run(iterations=20):
+    recipe_ids = list(
+        Recipe.objects.order_by('-id').values_list('id', flat=True)[:RECIPES]
+    )
+    user_id = (
+        Follow.objects.values('user_id')
+        .annotate(follows=Count('id'))
+        .order_by('-follows', 'user_id')
+        .values_list('user_id', flat=True)
+        .first()
+    )
+    request = APIRequestFactory().get(
+        '/api/users/subscriptions/', {'recipes_limit': RECIPES_LIMIT}
+    )
+    return {
+        'recipes': _result(
+            lambda: _ordered(_drf_recipes(recipe_ids), recipe_ids),
+            lambda: _ordered(lean.recipe_cards(recipe_ids), recipe_ids),
+            len(recipe_ids),
+            iterations,
+        ),
+        'subscriptions': _result(
+            lambda: _drf_subscriptions(user_id, request),
+            lambda: _lean_subscriptions(user_id),
+            Follow.objects.filter(user_id=user_id)[:SUBSCRIPTIONS].count(),
+            iterations,
+        ),
+    }
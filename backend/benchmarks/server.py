@@ -0,0 +1,56 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+SERVERS = {
+    'wsgi': ['backend.wsgi:application'],
+    'asgi': [
+        '--worker-class',
+        'uvicorn.workers.UvicornWorker',
+        'backend.asgi:application',
+    ],
+}
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Сервер на порту {port} не запустился.')
+
+
+def start_server(kind, port, workers, env=None):
+    command = [
+        sys.executable,
+        '-m',
+        'gunicorn',
+        '--bind',
+        f'127.0.0.1:{port}',
+        '--workers',
+        str(workers),
+        '--access-logfile',
+        os.devnull,
+        *SERVERS[kind],
+    ]
+    process = subprocess.Popen(
+        command,
+        cwd=BACKEND_DIR,
+        env=dict(os.environ, **(env or {})),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_for_port(port)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process
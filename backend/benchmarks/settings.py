@@ -0,0 +1,50 @@
+"""
+Настройки Django для бенчмарков.
+
+По умолчанию используется отдельная база SQLite во временном каталоге.
+С ``BENCH_DB=postgresql`` берутся обычные настройки PostgreSQL из
+``backend.settings`` (переменные POSTGRES_DB, DB_HOST и т.д.).
+"""
+import os
+import tempfile
+
+from backend.settings import *  # noqa: F401,F403
+from backend.settings import ALLOWED_HOSTS, DATABASES
+
+BENCH_DIR = os.getenv(
+    'BENCH_DIR', os.path.join(tempfile.gettempdir(), 'foodgram-bench')
+)
+
+SECRET_KEY = os.getenv('SECRET_KEY') or 'benchmark'
+
+DEBUG = False
+
+ALLOWED_HOSTS = ALLOWED_HOSTS + ['testserver']
+
+if os.getenv('BENCH_DB', 'sqlite') == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(BENCH_DIR, 'db.sqlite3'),
+        }
+    }
+else:
+    DATABASES = {
+        'default': dict(
+            DATABASES['default'],
+            NAME=os.getenv('BENCH_POSTGRES_DB', 'foodgram_bench'),
+        )
+    }
+
+if os.getenv('BENCH_REPLICA', 'False').lower() == 'true':
+    # Вторая база на том же сервере: проверка чтения с реплик.
+    DATABASES['replica_1'] = dict(
+        DATABASES['default'], TEST={'MIRROR': 'default'}
+    )
+
+MEDIA_ROOT = os.path.join(BENCH_DIR, 'media')
+RECIPE_INDEX_DIR = os.path.join(BENCH_DIR, 'indexes')
+
+SLOW_REQUEST_THRESHOLD_MS = 10**6
+# Сценарии повторяют один запрос много раз подряд.
+THROTTLE_BUCKET_CAPACITY = 10**9
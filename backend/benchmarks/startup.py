@@ -0,0 +1,42 @@
+"""
+Порог запуска воркера: django.setup() и загрузка URLconf.
+
+Проверка не проходит, если запуск дольше или занимает больше памяти, чем
+указано ниже, или если импортирован пакет, который веб-воркерам не нужен.
+Пороги взяты с запасом к замеру, время — с большим: оно сильно зависит от
+машины и кэша файловой системы.
+"""
+from backend.startup import profile
+
+MB = 1024 * 1024
+
+MAX_SECONDS = 1.5
+MAX_RSS = 100 * MB
+# Нужны только админке (import_export и его форматы) и воркеру документов
+# (reportlab).
+LAZY_PACKAGES = (
+    'reportlab',
+    'import_export.admin',
+    'tablib',
+    'openpyxl',
+    'odf',
+)
+
+
+def check():
+    report = profile(memory=False)
+    failures = []
+    if report['seconds'] > MAX_SECONDS:
+        failures.append(
+            f'Запуск занял {report["seconds"]:.2f} с, порог {MAX_SECONDS} с.'
+        )
+    if report['rss'] > MAX_RSS:
+        failures.append(
+            f'RSS после запуска {report["rss"] / MB:.1f} МБ, '
+            f'порог {MAX_RSS / MB:.0f} МБ.'
+        )
+    modules = set(report['modules'])
+    for package in LAZY_PACKAGES:
+        if package in modules:
+            failures.append(f'При запуске импортирован {package}.')
+    return report, failures
@@ -0,0 +1,83 @@
+"""
+Настройки gunicorn для продакшена.
+
+Все значения можно переопределить переменными окружения GUNICORN_*.
+"""
+import os
+import shutil
+import tempfile
+
+# Каталог, через который воркеры делят метрики Prometheus. Должен быть
+# задан до первого импорта prometheus_client.
+os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR',
+    os.path.join(tempfile.gettempdir(), 'foodgram-metrics'),
+)
+
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+wsgi_app = os.getenv('GUNICORN_APP', 'backend.wsgi:application')
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+workers = int(os.getenv('GUNICORN_WORKERS', _cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', 1))
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync'
+)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+
+# Приложение (Django, кэш справочников, индексы) загружается один
+# раз в мастере, воркеры получают его после fork через copy-on-write.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() == 'true'
+
+# Перезапуск воркеров с разбросом, чтобы они не рестартовали одновременно.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+
+
+def on_starting(server):
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir, exist_ok=True)
+
+
+def _warm_up():
+    from api.warmup import warm_up
+
+    warm_up()
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        _warm_up()
+
+
+def post_fork(server, worker):
+    if server.cfg.preload_app:
+        from django.db import connections
+
+        # Соединения мастера не должны использоваться в нескольких
+        # процессах.
+        for connection in connections.all():
+            connection.connection = None
+
+
+def post_worker_init(worker):
+    if not worker.cfg.preload_app:
+        _warm_up()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
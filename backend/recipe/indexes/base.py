@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from .journal import journal
+
+logger = logging.getLogger(__name__)
+
+
+class RecipeIndex:
+    """
+    Индекс по рецептам в памяти процесса.
+
+    Состояние индекса неизменяемо: обновление строит новое и подменяет
+    ссылку, поэтому читатели работают без блокировок. Перед чтением версия
+    сверяется с журналом изменений: изменённые рецепты дочитываются через
+    ``update``, а если журнал не помогает — индекс строится заново через
+    ``build``. Раз в RECIPE_INDEX_MAX_AGE секунд индекс перестраивается в
+    любом случае — на случай кэша, не общего для воркеров; эта перестройка
+    идёт в фоновом потоке, а запросы тем временем читают прежнее состояние.
+
+    Индекс, сохранённый на диск, загружается через ``load`` вместо
+    построения, если он моложе RECIPE_INDEX_MAX_AGE, и догоняет базу по
+    журналу.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = None
+        self._version = None
+        self._built_at = 0.0
+
+    def build(self):
+        raise NotImplementedError
+
+    def update(self, state, recipe_ids):
+        raise NotImplementedError
+
+    def load(self):
+        """(состояние, версия журнала, возраст в секундах) или None."""
+        return None
+
+    def get(self):
+        """Актуальное состояние индекса."""
+        version = journal.version()
+        state = self._state
+        if state is not None and self._expired():
+            self._rebuild_in_background()
+        if state is not None and version == self._version:
+            return state
+        # Пока другой поток обновляет индекс, отдаём предыдущее состояние.
+        if not self._lock.acquire(blocking=state is None):
+            return state
+        try:
+            if self._state is None:
+                self._reload(version)
+            elif version != self._version:
+                self._catch_up(version)
+            return self._state
+        finally:
+            self._lock.release()
+
+    def _expired(self):
+        return (
+            time.monotonic() - self._built_at > settings.RECIPE_INDEX_MAX_AGE
+        )
+
+    def _catch_up(self, version):
+        changed = journal.changes_since(self._version, version)
+        if changed is None:
+            self._reload(version)
+            return
+        if changed:
+            self._state = self.update(self._state, changed)
+        self._version = version
+
+    def _reload(self, version):
+        if not self._load(version):
+            self._state = self.build()
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        if not self._lock.acquire(blocking=False):
+            return
+        if not self._expired():
+            # Другой поток только что перестроил индекс.
+            self._lock.release()
+            return
+        try:
+            threading.Thread(target=self._rebuild_expired, daemon=True).start()
+        except BaseException:
+            self._lock.release()
+            raise
+
+    def _rebuild_expired(self):
+        try:
+            self._reload(journal.version())
+        except Exception:
+            logger.exception('Не удалось перестроить индекс рецептов.')
+        finally:
+            self._lock.release()
+            # Соединение с базой открыто в этом потоке, и закрыть его некому.
+            connection.close()
+
+    def _load(self, version):
+        loaded = self.load()
+        if loaded is None:
+            return False
+        state, saved_version, age = loaded
+        self._built_at = time.monotonic() - age
+        if self._expired():
+            return False
+        changed = set()
+        if saved_version != version:
+            # Журнал не помогает (кэш очищен, не общий или была массовая
+            # загрузка) — файл устарел неизвестно насколько.
+            changed = journal.changes_since(saved_version, version)
+            if changed is None:
+                return False
+        self._state = self.update(state, changed) if changed else state
+        self._version = version
+        return True
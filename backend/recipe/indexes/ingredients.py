@@ -0,0 +1,168 @@
+"""
+Инвертированный индекс «ингредиент -> рецепты» для подбора рецептов по
+имеющимся продуктам.
+
+Рецептам присвоены плотные номера по возрастанию id; для каждого
+ингредиента хранится отсортированный массив номеров рецептов (формат CSR:
+ingredient_ids, offsets, postings). Совпадения считаются одним bincount по
+спискам запрошенных ингредиентов. Рецепты, изменённые после построения,
+помечаются в маске alive и лежат в небольшом словаре extra до следующей
+полной перестройки.
+"""
+import itertools
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+from ..models import IngredientInRecipe
+from .base import RecipeIndex
+
+Match = namedtuple('Match', 'recipe_id matched missing')
+
+MATCH_LIMIT = 10
+MAX_MATCH_LIMIT = 100
+# Сколько изменённых рецептов держать в extra до полной перестройки.
+MAX_PENDING = 1000
+FETCH_CHUNK = 10000
+
+
+def _order(match):
+    """Меньше недостающих, больше совпавших, новее."""
+    return (match.missing, -match.matched, -match.recipe_id)
+
+
+class IngredientIndexState:
+    def __init__(self, recipe_ids, sizes, ingredient_ids, offsets, postings):
+        self.recipe_ids = recipe_ids
+        self.sizes = sizes
+        self.ingredient_ids = ingredient_ids
+        self.offsets = offsets
+        self.postings = postings
+        self.alive = np.ones(len(recipe_ids), dtype=bool)
+        self.extra = {}
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        recipes, ingredients = pairs[:, 0], pairs[:, 1]
+        recipe_ids, positions, sizes = np.unique(
+            recipes, return_inverse=True, return_counts=True
+        )
+        ingredient_ids, counts = np.unique(ingredients, return_counts=True)
+        offsets = np.zeros(len(ingredient_ids) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        order = np.lexsort((positions, ingredients))
+        return cls(
+            recipe_ids,
+            sizes.astype(np.int32),
+            ingredient_ids,
+            offsets,
+            positions[order].astype(np.int32),
+        )
+
+    def replace(self, alive, extra):
+        state = object.__new__(type(self))
+        state.__dict__.update(self.__dict__, alive=alive, extra=extra)
+        return state
+
+    def match(self, ingredient_ids, limit):
+        return self._match_built(ingredient_ids, limit) + self._match_extra(
+            set(ingredient_ids.tolist())
+        )
+
+    def _match_built(self, query, limit):
+        keys = self.ingredient_ids
+        slots = np.searchsorted(keys, query)
+        inside = slots < len(keys)
+        slots = slots[inside]
+        slots = slots[keys[slots] == query[inside]]
+        if not len(slots):
+            return []
+        matched = np.bincount(
+            np.concatenate(
+                [
+                    self.postings[self.offsets[slot] : self.offsets[slot + 1]]
+                    for slot in slots
+                ]
+            ),
+            minlength=len(self.recipe_ids),
+        )
+        matched[~self.alive] = 0
+        candidates = np.flatnonzero(matched)
+        if len(candidates) > limit:
+            # Порядок _order одним числом: недостающие, совпавшие, id.
+            found = matched[candidates].astype(np.int64)
+            missing = self.sizes[candidates] - found
+            ids = np.minimum(self.recipe_ids[candidates], 0xFFFFFFFF)
+            key = (
+                (missing << 48) | ((0xFFFF - found) << 32) | (0xFFFFFFFF - ids)
+            )
+            candidates = candidates[np.argpartition(key, limit - 1)[:limit]]
+        return [
+            Match(
+                int(self.recipe_ids[position]),
+                int(matched[position]),
+                int(self.sizes[position] - matched[position]),
+            )
+            for position in candidates
+        ]
+
+    def _match_extra(self, query):
+        matches = []
+        for recipe_id, ingredients in self.extra.items():
+            found = len(query.intersection(ingredients))
+            if found:
+                matches.append(
+                    Match(recipe_id, found, len(ingredients) - found)
+                )
+        return matches
+
+
+class IngredientIndex(RecipeIndex):
+    def build(self):
+        rows = (
+            IngredientInRecipe.objects.order_by()
+            .values_list('recipe_id', 'ingredient_id')
+            .iterator(chunk_size=FETCH_CHUNK)
+        )
+        pairs = np.fromiter(
+            itertools.chain.from_iterable(rows), dtype=np.int64
+        ).reshape(-1, 2)
+        return IngredientIndexState.from_pairs(pairs)
+
+    def update(self, state, recipe_ids):
+        if len(recipe_ids) + len(state.extra) > MAX_PENDING:
+            return self.build()
+        fresh = defaultdict(set)
+        rows = (
+            IngredientInRecipe.objects.filter(recipe_id__in=recipe_ids)
+            .order_by()
+            .values_list('recipe_id', 'ingredient_id')
+        )
+        for recipe_id, ingredient_id in rows:
+            fresh[recipe_id].add(ingredient_id)
+
+        alive = state.alive.copy()
+        changed = np.fromiter(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(state.recipe_ids, changed)
+        inside = positions < len(state.recipe_ids)
+        positions = positions[inside]
+        alive[
+            positions[state.recipe_ids[positions] == changed[inside]]
+        ] = False
+
+        extra = {
+            recipe_id: ingredients
+            for recipe_id, ingredients in state.extra.items()
+            if recipe_id not in recipe_ids
+        }
+        extra.update((key, frozenset(value)) for key, value in fresh.items())
+        return state.replace(alive, extra)
+
+    def match(self, ingredient_ids, limit):
+        """До limit рецептов, лучше всего покрывающих ingredient_ids."""
+        query = np.unique(np.fromiter(ingredient_ids, dtype=np.int64))
+        matches = self.get().match(query, limit)
+        return sorted(matches, key=_order)[:limit]
+
+
+ingredient_index = IngredientIndex()
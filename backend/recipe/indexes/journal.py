@@ -0,0 +1,70 @@
+"""
+Журнал изменений рецептов в общем кэше.
+
+Индексы в памяти процессов сверяют свою версию с версией журнала и
+дочитывают из базы только изменённые рецепты. Если записей не хватает
+(истекли, кэш очищен), индекс перестраивается целиком.
+"""
+import secrets
+
+from django.core.cache import cache
+
+JOURNAL_TIMEOUT = 24 * 60 * 60
+# Запись «изменилось всё»: None в кэше неотличим от промаха.
+EVERYTHING = '*'
+# При большем отставании дешевле перестроить индекс целиком.
+MAX_CHANGES = 1000
+
+
+class ChangeJournal:
+    def __init__(self, prefix):
+        self.version_key = f'{prefix}:version'
+        self.prefix = prefix
+
+    def version(self):
+        version = cache.get(self.version_key)
+        if version is None:
+            # Случайное начало: после очистки кэша версия не совпадёт ни с
+            # одной из тех, что уже видели индексы.
+            cache.add(self.version_key, secrets.randbits(48), JOURNAL_TIMEOUT)
+            version = cache.get(self.version_key)
+        return version
+
+    def append(self, recipe_ids):
+        """Записывает изменение; recipe_ids=None — изменилось всё."""
+        self.version()
+        try:
+            version = cache.incr(self.version_key)
+        except ValueError:
+            # Ключ истёк между чтением и инкрементом.
+            version = self.version()
+        cache.set(
+            f'{self.prefix}:{version}',
+            EVERYTHING if recipe_ids is None else list(recipe_ids),
+            JOURNAL_TIMEOUT,
+        )
+        cache.touch(self.version_key, JOURNAL_TIMEOUT)
+        return version
+
+    def changes_since(self, old, new):
+        """
+        id рецептов, изменённых между версиями old и new, или None, если
+        это нельзя восстановить по журналу.
+        """
+        if old is None or not 0 <= new - old <= MAX_CHANGES:
+            return None
+        keys = [
+            f'{self.prefix}:{version}' for version in range(old + 1, new + 1)
+        ]
+        entries = cache.get_many(keys)
+        if len(entries) != len(keys):
+            return None
+        changed = set()
+        for recipe_ids in entries.values():
+            if recipe_ids == EVERYTHING:
+                return None
+            changed.update(recipe_ids)
+        return changed
+
+
+journal = ChangeJournal('recipes:journal')
@@ -0,0 +1,257 @@
+"""
+Похожие рецепты: MinHash по множествам ингредиентов и тегов и LSH по
+полосам сигнатуры.
+
+Сигнатура рецепта — NUM_PERM минимумов хэшей его признаков (ингредиентов
+и тегов); доля совпавших позиций двух сигнатур оценивает коэффициент
+Жаккара. Сигнатура делится на BANDS полос по ROWS значений; рецепты с
+совпавшей хотя бы одной полосой становятся кандидатами, и только для них
+считается оценка сходства. При 16 полосах по 4 строки рецепт со
+сходством 0.5 становится кандидатом с вероятностью ~0.64, 0.6 — ~0.89,
+0.7 — ~0.99.
+
+Индекс сохраняется на диск командой rebuild_similar_recipes и
+загружается воркерами при первом обращении.
+"""
+import itertools
+import logging
+import os
+import tempfile
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from ..models import IngredientInRecipe, Recipe
+from .base import RecipeIndex
+from .journal import journal
+
+logger = logging.getLogger(__name__)
+
+Similar = namedtuple('Similar', 'recipe_id similarity')
+
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+# Рецепты с одинаковой полосой сверх этого числа не рассматриваются:
+# огромные корзины — это популярные сочетания, а не сходство.
+MAX_BUCKET = 500
+SIMILAR_LIMIT = 6
+MAX_SIMILAR_LIMIT = 50
+MAX_PENDING = 1000
+CHUNK = 100000
+FETCH_CHUNK = 10000
+FILE_NAME = 'similar.npz'
+
+_random = np.random.default_rng(20231009)
+# Хэширование умножением со сдвигом: нечётный множитель, старшие 32 бита.
+HASH_A = _random.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+HASH_B = _random.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+BAND_MIX = _random.integers(1, 2**63, ROWS, dtype=np.uint64) | np.uint64(1)
+
+
+def _features(recipe_ids=None):
+    """Пары (id рецепта, признак): ингредиент 2*id, тег 2*id + 1."""
+    ingredients = IngredientInRecipe.objects.order_by().values_list(
+        'recipe_id', 'ingredient_id'
+    )
+    tags = Recipe.tags.through.objects.order_by().values_list(
+        'recipe_id', 'tag_id'
+    )
+    if recipe_ids is not None:
+        ingredients = ingredients.filter(recipe_id__in=recipe_ids)
+        tags = tags.filter(recipe_id__in=recipe_ids)
+    arrays = []
+    for queryset, kind in ((ingredients, 0), (tags, 1)):
+        pairs = np.fromiter(
+            itertools.chain.from_iterable(
+                queryset.iterator(chunk_size=FETCH_CHUNK)
+            ),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        pairs[:, 1] = pairs[:, 1] * 2 + kind
+        arrays.append(pairs)
+    return np.concatenate(arrays)
+
+
+def signatures(pairs):
+    """id рецептов по возрастанию и их сигнатуры (uint32, NUM_PERM)."""
+    recipe_ids, positions = np.unique(pairs[:, 0], return_inverse=True)
+    order = np.argsort(positions, kind='stable')
+    positions, features = positions[order], pairs[order, 1]
+    result = np.full(
+        (len(recipe_ids), NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32
+    )
+    for start in range(0, len(features), CHUNK):
+        chunk = features[start : start + CHUNK].astype(np.uint64)
+        owners = positions[start : start + CHUNK]
+        hashes = ((chunk[:, None] * HASH_A + HASH_B) >> np.uint64(32)).astype(
+            np.uint32
+        )
+        starts = np.flatnonzero(np.r_[True, owners[1:] != owners[:-1]])
+        rows = owners[starts]
+        result[rows] = np.minimum(
+            result[rows], np.minimum.reduceat(hashes, starts, axis=0)
+        )
+    return recipe_ids, result
+
+
+def band_keys(signature_rows):
+    """Ключ каждой полосы: (N, NUM_PERM) -> (N, BANDS) uint64."""
+    bands = signature_rows.reshape(len(signature_rows), BANDS, ROWS)
+    return (bands.astype(np.uint64) * BAND_MIX).sum(axis=2, dtype=np.uint64)
+
+
+class SimilarIndexState:
+    def __init__(self, recipe_ids, signature_rows):
+        self.recipe_ids = recipe_ids
+        self.signatures = signature_rows
+        keys = band_keys(signature_rows)
+        self.band_positions = np.argsort(keys, axis=0, kind='stable').T.astype(
+            np.int32
+        )
+        self.band_keys = np.take_along_axis(keys.T, self.band_positions, 1)
+        self.alive = np.ones(len(recipe_ids), dtype=bool)
+        self.extra = {}
+
+    def replace(self, alive, extra):
+        state = object.__new__(type(self))
+        state.__dict__.update(self.__dict__, alive=alive, extra=extra)
+        return state
+
+    def signature(self, recipe_id):
+        if recipe_id in self.extra:
+            return self.extra[recipe_id]
+        position = np.searchsorted(self.recipe_ids, recipe_id)
+        if (
+            position < len(self.recipe_ids)
+            and self.recipe_ids[position] == recipe_id
+            and self.alive[position]
+        ):
+            return self.signatures[position]
+        return None
+
+    def similar(self, recipe_id, signature, limit):
+        keys = band_keys(signature[None, :])[0]
+        candidates = []
+        for band in range(BANDS):
+            row = self.band_keys[band]
+            start = np.searchsorted(row, keys[band], 'left')
+            stop = np.searchsorted(row, keys[band], 'right')
+            candidates.append(
+                self.band_positions[
+                    band, start : min(stop, start + MAX_BUCKET)
+                ]
+            )
+        positions = np.unique(np.concatenate(candidates))
+        positions = positions[self.alive[positions]]
+        positions = positions[self.recipe_ids[positions] != recipe_id]
+        found = [
+            Similar(int(self.recipe_ids[position]), float(similarity))
+            for position, similarity in zip(
+                positions,
+                (self.signatures[positions] == signature).mean(axis=1),
+            )
+        ]
+        for other_id, other in self.extra.items():
+            if (
+                other_id != recipe_id
+                and (band_keys(other[None, :])[0] == keys).any()
+            ):
+                found.append(
+                    Similar(other_id, float((other == signature).mean()))
+                )
+        found.sort(key=lambda item: (-item.similarity, -item.recipe_id))
+        return found[:limit]
+
+
+class SimilarIndex(RecipeIndex):
+    def build(self):
+        return SimilarIndexState(*signatures(_features()))
+
+    def update(self, state, recipe_ids):
+        if len(recipe_ids) + len(state.extra) > MAX_PENDING:
+            return self.build()
+        alive = state.alive.copy()
+        changed = np.fromiter(recipe_ids, dtype=np.int64)
+        positions = np.searchsorted(state.recipe_ids, changed)
+        inside = positions < len(state.recipe_ids)
+        positions = positions[inside]
+        alive[
+            positions[state.recipe_ids[positions] == changed[inside]]
+        ] = False
+
+        extra = {
+            recipe_id: signature
+            for recipe_id, signature in state.extra.items()
+            if recipe_id not in recipe_ids
+        }
+        fresh_ids, fresh = signatures(_features(recipe_ids))
+        extra.update(zip(fresh_ids.tolist(), fresh))
+        return state.replace(alive, extra)
+
+    def similar(self, recipe_id, limit):
+        """До limit рецептов, похожих на рецепт recipe_id."""
+        state = self.get()
+        signature = state.signature(recipe_id)
+        if signature is None:
+            # Рецепт создан только что и ещё не попал в индекс.
+            fresh_ids, fresh = signatures(_features([recipe_id]))
+            if not len(fresh_ids):
+                return []
+            signature = fresh[0]
+        return state.similar(recipe_id, signature, limit)
+
+    @staticmethod
+    def path():
+        return Path(settings.RECIPE_INDEX_DIR) / FILE_NAME
+
+    def save(self, state, version):
+        """Атомарно сохраняет состояние на диск."""
+        path = self.path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=path.parent, suffix='.npz', delete=False
+        ) as file:
+            np.savez(
+                file,
+                recipe_ids=state.recipe_ids,
+                signatures=state.signatures,
+                version=np.int64(version),
+                saved_at=np.float64(time.time()),
+            )
+        os.replace(file.name, path)
+
+    def load(self):
+        try:
+            with np.load(self.path(), allow_pickle=False) as data:
+                signature_rows = data['signatures']
+                if signature_rows.shape[1:] != (NUM_PERM,):
+                    return None
+                state = SimilarIndexState(data['recipe_ids'], signature_rows)
+                version = int(data['version'])
+                age = max(time.time() - float(data['saved_at']), 0.0)
+        except FileNotFoundError:
+            return None
+        except (OSError, KeyError, ValueError):
+            logger.warning(
+                'Не удалось загрузить %s.', self.path(), exc_info=True
+            )
+            return None
+        return state, version, age
+
+    def rebuild(self):
+        """Строит индекс из базы, сохраняет на диск и подменяет текущий."""
+        version = journal.version()
+        state = self.build()
+        self.save(state, version)
+        with self._lock:
+            self._state = state
+            self._version = version
+            self._built_at = time.monotonic()
+        return state
+
+
+similar_index = SimilarIndex()
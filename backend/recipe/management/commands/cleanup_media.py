@@ -0,0 +1,102 @@
+import os
+import time
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import FileField
+
+FETCH_CHUNK = 10000
+
+
+def _file_fields():
+    for model in apps.get_models():
+        for field in model._meta.get_fields():
+            if isinstance(field, FileField):
+                yield model, field
+
+
+def _referenced():
+    names = set()
+    for model, field in _file_fields():
+        names.update(
+            model._default_manager.exclude(**{field.name: ''})
+            .order_by()
+            .values_list(field.name, flat=True)
+            .iterator(chunk_size=FETCH_CHUNK)
+        )
+    return names
+
+
+def _walk(path):
+    """Файлы каталога и подкаталогов без построения полного списка."""
+    try:
+        entries = os.scandir(path)
+    except FileNotFoundError:
+        return
+    with entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из MEDIA_ROOT файлы, на которые не ссылается ни одна '
+        'запись: картинки удалённых рецептов и заменённые при '
+        'редактировании. Просматриваются только каталоги upload_to полей '
+        'FileField.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет удалено.',
+        )
+        parser.add_argument(
+            '--min-age',
+            type=int,
+            default=settings.MEDIA_CLEANUP_MIN_AGE,
+            help='Не трогать файлы моложе этого числа секунд.',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        referenced = _referenced()
+        directories = {
+            field.upload_to.split('/')[0]
+            for _, field in _file_fields()
+            if isinstance(field.upload_to, str) and field.upload_to
+        }
+        deadline = time.time() - options['min_age']
+        root = settings.MEDIA_ROOT
+        checked = removed = freed = 0
+        for directory in sorted(directories):
+            for entry in _walk(os.path.join(root, directory)):
+                checked += 1
+                name = os.path.relpath(entry.path, root).replace(os.sep, '/')
+                if name in referenced:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > deadline:
+                    continue
+                removed += 1
+                freed += stat.st_size
+                if options['dry_run']:
+                    self.stdout.write(name)
+                    continue
+                try:
+                    os.remove(entry.path)
+                except FileNotFoundError:
+                    pass
+        elapsed = time.monotonic() - started
+        action = 'К удалению' if options['dry_run'] else 'Удалено'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Проверено файлов: {checked}. {action}: {removed} '
+                f'({freed / 2**20:.1f} МБ) за {elapsed:.1f} с.'
+            )
+        )
@@ -0,0 +1,370 @@
+import csv
+import io
+import time
+from datetime import timedelta
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from recipe import rankings, timeline
+from recipe.models import (
+    Favourite,
+    Ingredient,
+    IngredientInRecipe,
+    Recipe,
+    RecipeActivity,
+    ShoppingCart,
+    Tag,
+)
+from recipe.signals import send_recipes_changed
+from users.models import Follow, User
+
+WORDS = np.array(
+    (
+        'нарезать обжарить добавить перемешать посолить поперчить варить '
+        'запекать остудить подавать соус тесто духовка сковорода кастрюля '
+        'минут огонь масло луковица чеснок зелень сливки сыр мука яйцо'
+    ).split()
+)
+
+
+def zipf_sampler(rng, size, exponent):
+    """
+    Возвращает функцию, выбирающую индексы из ``range(size)`` по закону
+    Ципфа. Какие именно индексы окажутся популярными, решает случайная
+    перестановка.
+    """
+    weights = 1.0 / np.arange(1, size + 1) ** exponent
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    ranks = rng.permutation(size)
+
+    def sample(count):
+        return ranks[np.searchsorted(cdf, rng.random(count), side='right')]
+
+    return sample
+
+
+def skewed_counts(rng, count, mean, sigma, maximum):
+    """Логнормальное число элементов на владельца с заданным средним."""
+    if mean <= 0:
+        return np.zeros(count, dtype=np.int64)
+    mu = np.log(mean) - sigma**2 / 2
+    values = np.rint(rng.lognormal(mu, sigma, count)).astype(np.int64)
+    return np.clip(values, 0, maximum)
+
+
+def unique_pairs(owners, targets, width):
+    keys = np.unique(owners.astype(np.int64) * width + targets)
+    return keys // width, keys % width
+
+
+class RowWriter:
+    """
+    Пишет строки пачками: через COPY в PostgreSQL и через bulk_create в
+    остальных базах.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql'
+        self.rows = 0
+
+    def write(self, model, columns):
+        length = max(
+            len(values)
+            for values in columns.values()
+            if isinstance(values, np.ndarray)
+        )
+        for start in range(0, length, self.batch_size):
+            stop = min(start + self.batch_size, length)
+            batch = {
+                name: (
+                    values[start:stop].tolist()
+                    if isinstance(values, np.ndarray)
+                    else [values] * (stop - start)
+                )
+                for name, values in columns.items()
+            }
+            if self.use_copy:
+                self._copy(model, batch)
+            else:
+                self._bulk_create(model, batch)
+            self.rows += stop - start
+
+    @staticmethod
+    def _copy(model, batch):
+        fields = [model._meta.get_field(name) for name in batch]
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(zip(*batch.values()))
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        table = connection.ops.quote_name(model._meta.db_table)
+        # По умолчанию в csv пустое поле без кавычек — NULL, а пустые строки
+        # (например, image) должны остаться строками.
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                f'COPY {table} ({columns}) FROM STDIN '
+                "WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+
+    def _bulk_create(self, model, batch):
+        names = list(batch)
+        model.objects.bulk_create(
+            [model(**dict(zip(names, row))) for row in zip(*batch.values())],
+            batch_size=self.batch_size,
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        'Генерирует синтетических пользователей, рецепты, избранное, '
+        'корзины и подписки с реалистичным перекосом популярности.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=50000)
+        parser.add_argument('--ingredients-per-recipe', type=float, default=8)
+        parser.add_argument('--favorites-per-user', type=float, default=30)
+        parser.add_argument('--carts-per-user', type=float, default=5)
+        parser.add_argument('--follows-per-user', type=float, default=10)
+        parser.add_argument(
+            '--zipf-exponent',
+            type=float,
+            default=1.1,
+            help='Показатель закона Ципфа для популярности авторов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=20000)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=10000,
+            help='Сколько пользователей или рецептов обрабатывать за раз.',
+        )
+
+    def handle(self, *args, **options):
+        ingredient_ids = np.array(
+            Ingredient.objects.order_by('id').values_list('id', flat=True)
+        )
+        tag_ids = np.array(
+            Tag.objects.order_by('id').values_list('id', flat=True)
+        )
+        if not len(ingredient_ids) or not len(tag_ids):
+            raise CommandError('Сначала загрузите ингредиенты и теги.')
+
+        self.rng = np.random.default_rng(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.writer = RowWriter(options['batch_size'])
+        started = time.monotonic()
+
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, options['zipf_exponent']
+        )
+        self.create_recipe_ingredients(
+            recipe_ids, ingredient_ids, options['ingredients_per_recipe']
+        )
+        self.create_recipe_tags(recipe_ids, tag_ids)
+
+        recipe_popularity = zipf_sampler(
+            self.rng, len(recipe_ids), options['zipf_exponent']
+        )
+        favorited = self.create_memberships(
+            Favourite,
+            user_ids,
+            recipe_ids,
+            recipe_popularity,
+            options['favorites_per_user'],
+            sigma=1.0,
+        )
+        # Корзины: большинство пользователей держит пару рецептов, а
+        # немногие «активные» — сотни.
+        carted = self.create_memberships(
+            ShoppingCart,
+            user_ids,
+            recipe_ids,
+            recipe_popularity,
+            options['carts_per_user'],
+            sigma=1.5,
+        )
+        self.create_activity(recipe_ids, favorited, carted)
+        self.create_follows(
+            user_ids, options['follows_per_user'], options['zipf_exponent']
+        )
+        self.reset_sequences()
+        send_recipes_changed()
+        timeline.rebuild()
+        rankings.refresh()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Создано строк: {self.writer.rows} за {elapsed:.1f} с '
+                f'({self.writer.rows / elapsed * 60:,.0f} строк/мин).'
+            )
+        )
+
+    def _next_ids(self, model, count):
+        start = (model.objects.aggregate(Max('id'))['id__max'] or 0) + 1
+        return np.arange(start, start + count, dtype=np.int64)
+
+    def _chunks(self, ids):
+        for start in range(0, len(ids), self.chunk_size):
+            yield ids[start : start + self.chunk_size]
+
+    def create_users(self, count):
+        user_ids = self._next_ids(User, count)
+        names = np.char.add('fake', user_ids.astype(str))
+        self.writer.write(
+            User,
+            {
+                'id': user_ids,
+                'username': names,
+                'email': np.char.add(names, '@example.com'),
+                'first_name': names,
+                'last_name': names,
+                'password': '!',
+                'is_superuser': False,
+                'is_staff': False,
+                'is_active': True,
+                'date_joined': timezone.now(),
+            },
+        )
+        return user_ids
+
+    def create_recipes(self, count, user_ids, exponent):
+        recipe_ids = self._next_ids(Recipe, count)
+        authors = zipf_sampler(self.rng, len(user_ids), exponent)
+        for chunk in self._chunks(recipe_ids):
+            lengths = self.rng.integers(20, 120, len(chunk))
+            words = WORDS[self.rng.integers(0, len(WORDS), lengths.sum())]
+            texts = [
+                ' '.join(part)
+                for part in np.split(words, np.cumsum(lengths)[:-1])
+            ]
+            self.writer.write(
+                Recipe,
+                {
+                    'id': chunk,
+                    'name': np.char.add('Рецепт ', chunk.astype(str)),
+                    'author_id': user_ids[authors(len(chunk))],
+                    'text': np.array(texts),
+                    'image': '',
+                    'cooking_time': self.rng.integers(5, 180, len(chunk)),
+                    'updated_at': timezone.now(),
+                },
+            )
+        return recipe_ids
+
+    def create_recipe_ingredients(self, recipe_ids, ingredient_ids, mean):
+        popularity = zipf_sampler(self.rng, len(ingredient_ids), 0.8)
+        for chunk in self._chunks(recipe_ids):
+            counts = self.rng.poisson(max(mean - 1, 0), len(chunk)) + 1
+            recipes, ingredients = unique_pairs(
+                np.repeat(chunk, counts),
+                popularity(counts.sum()),
+                len(ingredient_ids),
+            )
+            self.writer.write(
+                IngredientInRecipe,
+                {
+                    'recipe_id': recipes,
+                    'ingredient_id': ingredient_ids[ingredients],
+                    'amount': self.rng.integers(1, 500, len(recipes)),
+                },
+            )
+
+    def create_recipe_tags(self, recipe_ids, tag_ids):
+        for chunk in self._chunks(recipe_ids):
+            counts = self.rng.integers(1, min(3, len(tag_ids)) + 1, len(chunk))
+            recipes, tags = unique_pairs(
+                np.repeat(chunk, counts),
+                self.rng.integers(0, len(tag_ids), counts.sum()),
+                len(tag_ids),
+            )
+            self.writer.write(
+                Recipe.tags.through,
+                {'recipe_id': recipes, 'tag_id': tag_ids[tags]},
+            )
+
+    def create_memberships(
+        self, model, user_ids, recipe_ids, popularity, mean, sigma
+    ):
+        """Возвращает, сколько пар создано для каждого рецепта."""
+        per_recipe = np.zeros(len(recipe_ids), dtype=np.int64)
+        for chunk in self._chunks(user_ids):
+            counts = skewed_counts(
+                self.rng, len(chunk), mean, sigma, len(recipe_ids)
+            )
+            users, recipes = unique_pairs(
+                np.repeat(chunk, counts),
+                popularity(counts.sum()),
+                len(recipe_ids),
+            )
+            self.writer.write(
+                model, {'user_id': users, 'recipe_id': recipe_ids[recipes]}
+            )
+            per_recipe += np.bincount(recipes, minlength=len(recipe_ids))
+        return per_recipe
+
+    def create_activity(self, recipe_ids, favorited, carted):
+        """
+        Дневные счётчики для рейтингов: добавления в избранное и корзину
+        равномерно распределены по окну RANKING_WINDOW_DAYS.
+        """
+        window = settings.RANKING_WINDOW_DAYS
+        today = timezone.now().date()
+        days = np.array(
+            [today - timedelta(days=offset) for offset in range(window)]
+        )
+        uniform = np.full(window, 1 / window)
+        for positions in self._chunks(np.arange(len(recipe_ids))):
+            # Добавления каждого рецепта пачки по дням окна.
+            favorites = self.rng.multinomial(favorited[positions], uniform)
+            carts = self.rng.multinomial(carted[positions], uniform)
+            rows, offsets = np.nonzero(favorites + carts)
+            self.writer.write(
+                RecipeActivity,
+                {
+                    'recipe_id': recipe_ids[positions][rows],
+                    'day': days[offsets],
+                    'favorites': favorites[rows, offsets],
+                    'carts': carts[rows, offsets],
+                },
+            )
+
+    def create_follows(self, user_ids, mean, exponent):
+        popularity = zipf_sampler(self.rng, len(user_ids), exponent)
+        for chunk in self._chunks(user_ids):
+            counts = skewed_counts(
+                self.rng, len(chunk), mean, 1.2, len(user_ids) - 1
+            )
+            users, authors = unique_pairs(
+                np.repeat(chunk, counts),
+                popularity(counts.sum()),
+                len(user_ids),
+            )
+            authors = user_ids[authors]
+            not_self = users != authors
+            self.writer.write(
+                Follow,
+                {'user_id': users[not_self], 'author_id': authors[not_self]},
+            )
+
+    def reset_sequences(self):
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Recipe]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
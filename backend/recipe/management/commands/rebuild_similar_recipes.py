@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe.indexes.similar import similar_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Перестраивает индекс похожих рецептов и сохраняет его на диск, '
+        'чтобы воркеры не строили его сами. Удобно запускать по расписанию '
+        'чаще, чем RECIPE_INDEX_MAX_AGE.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        state = similar_index.rebuild()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рецептов в индексе: {len(state.recipe_ids)}, '
+                f'построен за {elapsed:.1f} с: {similar_index.path()}.'
+            )
+        )
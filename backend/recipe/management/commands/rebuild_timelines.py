@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe import timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново раскладывает рецепты по лентам подписок, например после '
+        'загрузки данных в обход API. С --trim только удаляет из лент '
+        'рецепты сверх FEED_TIMELINE_LENGTH последних, например после '
+        'уменьшения FEED_TIMELINE_LENGTH.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--trim', action='store_true')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        if options['trim']:
+            message = f'Удалено записей: {timeline.trim()}'
+        else:
+            message = f'Записей в лентах: {timeline.rebuild()}'
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f'{message} за {elapsed:.1f} с.'))
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipe import rankings
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги рецептов (ordering=popular и '
+        'ordering=trending). Запускается по расписанию, например раз в '
+        'несколько минут.'
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        count = rankings.refresh()
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Рецептов в рейтингах: {count} за {elapsed:.1f} с.'
+            )
+        )
@@ -0,0 +1,100 @@
+"""
+Полнотекстовый поиск рецептов.
+
+PostgreSQL: вычисляемый столбец search_vector (конфигурация russian,
+название с весом A, описание с весом B) и GIN-индекс по нему.
+SQLite: таблица FTS5 recipe_recipe_fts, которую поддерживают триггеры.
+На других СУБД миграция ничего не делает.
+"""
+from django.db import migrations
+
+POSTGRESQL_FORWARDS = (
+    """
+    ALTER TABLE recipe_recipe ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('russian', coalesce(name, '')), 'A')
+        || setweight(to_tsvector('russian', coalesce(text, '')), 'B')
+    ) STORED
+    """,
+    """
+    CREATE INDEX recipe_recipe_search_vector_idx
+    ON recipe_recipe USING GIN (search_vector)
+    """,
+)
+
+POSTGRESQL_BACKWARDS = (
+    'DROP INDEX IF EXISTS recipe_recipe_search_vector_idx',
+    'ALTER TABLE recipe_recipe DROP COLUMN IF EXISTS search_vector',
+)
+
+SQLITE_FORWARDS = (
+    """
+    CREATE VIRTUAL TABLE recipe_recipe_fts USING fts5(
+        name, text, content='recipe_recipe', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_insert AFTER INSERT ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts (rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_delete AFTER DELETE ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts (recipe_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+    END
+    """,
+    """
+    CREATE TRIGGER recipe_recipe_fts_update
+    AFTER UPDATE OF name, text ON recipe_recipe
+    BEGIN
+        INSERT INTO recipe_recipe_fts (recipe_recipe_fts, rowid, name, text)
+        VALUES ('delete', old.id, old.name, old.text);
+        INSERT INTO recipe_recipe_fts (rowid, name, text)
+        VALUES (new.id, new.name, new.text);
+    END
+    """,
+    "INSERT INTO recipe_recipe_fts (recipe_recipe_fts) VALUES ('rebuild')",
+)
+
+SQLITE_BACKWARDS = (
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_insert',
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_delete',
+    'DROP TRIGGER IF EXISTS recipe_recipe_fts_update',
+    'DROP TABLE IF EXISTS recipe_recipe_fts',
+)
+
+STATEMENTS = {
+    'postgresql': (POSTGRESQL_FORWARDS, POSTGRESQL_BACKWARDS),
+    'sqlite': (SQLITE_FORWARDS, SQLITE_BACKWARDS),
+}
+
+
+def _execute(schema_editor, direction):
+    statements = STATEMENTS.get(schema_editor.connection.vendor)
+    if statements is None:
+        return
+    for statement in statements[direction]:
+        schema_editor.execute(statement)
+
+
+def forwards(apps, schema_editor):
+    _execute(schema_editor, 0)
+
+
+def backwards(apps, schema_editor):
+    _execute(schema_editor, 1)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipe', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -0,0 +1,108 @@
+# Generated by Django 3.2 on 2026-10-19 11:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipe', '0004_timeline'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeRanking',
+            fields=[
+                (
+                    'recipe',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='ranking',
+                        serialize=False,
+                        to='recipe.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+                (
+                    'favorites',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='В избранном'
+                    ),
+                ),
+                (
+                    'trending',
+                    models.FloatField(
+                        default=0, verbose_name='Оценка роста популярности'
+                    ),
+                ),
+                (
+                    'popular_rank',
+                    models.PositiveIntegerField(
+                        null=True,
+                        unique=True,
+                        verbose_name='Место среди популярных',
+                    ),
+                ),
+                (
+                    'trending_rank',
+                    models.PositiveIntegerField(
+                        null=True,
+                        unique=True,
+                        verbose_name='Место среди набирающих популярность',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RecipeActivity',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                ('day', models.DateField(db_index=True, verbose_name='День')),
+                (
+                    'favorites',
+                    models.IntegerField(
+                        default=0, verbose_name='Добавлений в избранное'
+                    ),
+                ),
+                (
+                    'carts',
+                    models.IntegerField(
+                        default=0, verbose_name='Добавлений в корзину'
+                    ),
+                ),
+                (
+                    'recipe',
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='recipe.recipe',
+                        verbose_name='Рецепт',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Активность по рецепту',
+                'verbose_name_plural': 'Активность по рецептам',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipeactivity',
+            constraint=models.UniqueConstraint(
+                fields=('recipe', 'day'), name='unique_recipe_activity_day'
+            ),
+        ),
+    ]
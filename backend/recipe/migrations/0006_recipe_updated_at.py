@@ -0,0 +1,56 @@
+"""
+Дата изменения рецепта.
+
+SQLite добавляет и удаляет столбец, пересоздавая таблицу recipe_recipe, и
+теряет триггеры полнотекстового поиска из 0003_recipe_search; после этого
+они создаются заново.
+"""
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+search = import_module('recipe.migrations.0003_recipe_search')
+
+# Триггеры — все CREATE TRIGGER из 0003_recipe_search.
+SQLITE_TRIGGERS = [
+    statement
+    for statement in search.SQLITE_FORWARDS
+    if 'CREATE TRIGGER' in statement
+]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in search.SQLITE_BACKWARDS:
+        if statement.startswith('DROP TRIGGER'):
+            schema_editor.execute(statement)
+    for statement in SQLITE_TRIGGERS:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('recipe', '0005_rankings'),
+    ]
+
+    operations = [
+        # При откате — после удаления столбца.
+        migrations.RunPython(
+            migrations.RunPython.noop, restore_search_triggers
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(
+                auto_now=True,
+                default=django.utils.timezone.now,
+                verbose_name='Дата изменения',
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(
+            restore_search_triggers, migrations.RunPython.noop
+        ),
+    ]
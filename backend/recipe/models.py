@@ -87,10 +87,21 @@ class Recipe(models.Model):
         related_name='recipes',
     )
 
+    # Меняется вместе с карточкой рецепта: при сохранении рецепта, а также
+    # при правке его тегов, ингредиентов и автора (см. recipe/signals.py).
+    updated_at = models.DateTimeField('Дата изменения', auto_now=True)
+
     class Meta:
         ordering = ['-id']
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            # Новые рецепты авторов: лента подписок, рецепты на странице
+            # подписок.
+            models.Index(
+                fields=['author', '-id'], name='recipe_author_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -187,3 +198,95 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user} будет готовить "{self.recipe}"'
+
+
+class TimelineEntry(models.Model):
+    """Рецепт в ленте подписчика; см. recipe/timeline.py."""
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик',
+        # Покрыт уникальным индексом (user, recipe).
+        db_index=False,
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи лент'
+        constraints = [
+            UniqueConstraint(
+                fields=['user', 'recipe'], name='unique_timeline_entry'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class RecipeActivity(models.Model):
+    """Сколько раз рецепт добавили в избранное и в корзину за день."""
+
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рецепт',
+        # Покрыт уникальным индексом (recipe, day).
+        db_index=False,
+    )
+    day = models.DateField('День', db_index=True)
+    favorites = models.IntegerField('Добавлений в избранное', default=0)
+    carts = models.IntegerField('Добавлений в корзину', default=0)
+
+    class Meta:
+        verbose_name = 'Активность по рецепту'
+        verbose_name_plural = 'Активность по рецептам'
+        constraints = [
+            UniqueConstraint(
+                fields=['recipe', 'day'], name='unique_recipe_activity_day'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} за {self.day}'
+
+
+class RecipeRanking(models.Model):
+    """Места рецепта в рейтингах; пересчитывает refresh_rankings."""
+
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Рецепт',
+    )
+    favorites = models.PositiveIntegerField('В избранном', default=0)
+    trending = models.FloatField('Оценка роста популярности', default=0)
+    popular_rank = models.PositiveIntegerField(
+        'Место среди популярных', null=True, unique=True
+    )
+    trending_rank = models.PositiveIntegerField(
+        'Место среди набирающих популярность', null=True, unique=True
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+
+    def __str__(self):
+        return f'{self.recipe}: {self.popular_rank}, {self.trending_rank}'
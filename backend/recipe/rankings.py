@@ -0,0 +1,114 @@
+"""
+Рейтинги рецептов: популярные за всё время и набирающие популярность.
+
+Добавления в избранное и в корзину копятся в дневных счётчиках
+RecipeActivity. Воркер документов (render_documents) раз в
+RANKING_REFRESH_INTERVAL секунд пересчитывает таблицу RecipeRanking: место по числу добавлений в избранное и место по
+оценке trending — сумме дневных счётчиков, вклад которых уменьшается
+вдвое каждые RANKING_HALF_LIFE_DAYS дней. Сортировка ordering=popular и
+ordering=trending читает готовые места по индексу.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Favourite, RecipeActivity, RecipeRanking, ShoppingCart
+
+ORDERINGS = {
+    'popular': 'ranking__popular_rank',
+    'trending': 'ranking__trending_rank',
+}
+ORDERING_CHOICES = (
+    ('popular', 'Популярные'),
+    ('trending', 'Набирающие популярность'),
+)
+COUNTERS = {Favourite: 'favorites', ShoppingCart: 'carts'}
+FAVORITE_WEIGHT = 1.0
+CART_WEIGHT = 0.5
+BATCH_SIZE = 2000
+
+
+def record(recipe_id, model, delta, using=DEFAULT_DB_ALIAS):
+    """
+    Учитывает добавление (delta=1) или удаление (delta=-1) рецепта в
+    избранное или корзину (model) в счётчике за сегодня.
+    """
+    connection = connections[using]
+    table = connection.ops.quote_name(RecipeActivity._meta.db_table)
+    counters = dict.fromkeys(COUNTERS.values(), 0)
+    counters[COUNTERS[model]] = delta
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} (recipe_id, day, favorites, carts) '
+            'VALUES (%s, %s, %s, %s) '
+            'ON CONFLICT (recipe_id, day) DO UPDATE SET '
+            f'favorites = {table}.favorites + excluded.favorites, '
+            f'carts = {table}.carts + excluded.carts',
+            [
+                recipe_id,
+                timezone.now().date(),
+                counters['favorites'],
+                counters['carts'],
+            ],
+        )
+
+
+def order_by_ranking(queryset, ordering):
+    """
+    Рецепты в порядке мест в рейтинге. Рецепты без места (без добавлений
+    в избранное, новые или ещё не попавшие в пересчёт) идут после них,
+    от новых к старым.
+    """
+    field = ORDERINGS[ordering]
+    return queryset.order_by(F(field).asc(nulls_last=True), '-id')
+
+
+def _places(scores):
+    """Место каждого рецепта с положительной оценкой: больше — выше."""
+    ranked = sorted(
+        (item for item in scores.items() if item[1] > 0),
+        key=lambda item: (-item[1], -item[0]),
+    )
+    return {recipe_id: place for place, (recipe_id, _) in enumerate(ranked, 1)}
+
+
+def refresh(now=None):
+    """Пересчитывает RecipeRanking и возвращает число рецептов в нём."""
+    today = (now or timezone.now()).date()
+    since = today - timedelta(days=settings.RANKING_WINDOW_DAYS - 1)
+    favorites = dict(
+        Favourite.objects.order_by()
+        .values('recipe_id')
+        .annotate(total=Count('id'))
+        .values_list('recipe_id', 'total')
+    )
+    trending = defaultdict(float)
+    activity = RecipeActivity.objects.filter(day__gte=since).values_list(
+        'recipe_id', 'day', 'favorites', 'carts'
+    )
+    for recipe_id, day, favorite_count, cart_count in activity.iterator():
+        decay = 0.5 ** ((today - day).days / settings.RANKING_HALF_LIFE_DAYS)
+        trending[recipe_id] += decay * (
+            favorite_count * FAVORITE_WEIGHT + cart_count * CART_WEIGHT
+        )
+    popular_places = _places(favorites)
+    trending_places = _places(trending)
+    rankings = [
+        RecipeRanking(
+            recipe_id=recipe_id,
+            favorites=favorites.get(recipe_id, 0),
+            trending=trending.get(recipe_id, 0.0),
+            popular_rank=popular_places.get(recipe_id),
+            trending_rank=trending_places.get(recipe_id),
+        )
+        for recipe_id in popular_places.keys() | trending_places.keys()
+    ]
+    with transaction.atomic():
+        RecipeRanking.objects.all().delete()
+        RecipeRanking.objects.bulk_create(rankings, batch_size=BATCH_SIZE)
+        RecipeActivity.objects.filter(day__lt=since).delete()
+    return len(rankings)
@@ -0,0 +1,140 @@
+"""
+Полнотекстовый поиск рецептов по названию и описанию.
+
+В PostgreSQL запрос разбирается websearch_to_tsquery с конфигурацией
+russian и ищется по GIN-индексу столбца search_vector, в SQLite — по
+таблице FTS5 (каждое слово ищется как префикс). Столбец и таблицу создаёт
+миграция recipe.0003_recipe_search.
+"""
+import re
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import FloatField, Q, TextField
+from django.db.models.expressions import RawSQL
+from django.utils.html import escape
+
+from .models import Recipe
+
+# Границы найденных слов во фрагменте: их нет в тексте рецептов, поэтому
+# фрагмент можно безопасно экранировать и только потом расставить <mark>.
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_STOP = '\x03'
+
+HEADLINE_OPTIONS = (
+    f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, '
+    'MaxWords=30, MinWords=10'
+)
+SNIPPET_TOKENS = 24
+
+WORD = re.compile(r'\w+')
+
+
+def search_recipes(queryset, query):
+    """Рецепты, подходящие под запрос, от более релевантных к менее."""
+    if not WORD.search(query):
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        queryset = _search_postgresql(queryset, query)
+    elif vendor == 'sqlite':
+        queryset = _search_sqlite(queryset, query)
+    else:
+        return queryset.filter(
+            Q(name__icontains=query) | Q(text__icontains=query)
+        )
+    return queryset.order_by('-search_rank', '-id')
+
+
+def _search_postgresql(queryset, query):
+    table = Recipe._meta.db_table
+    tsquery = "websearch_to_tsquery('russian', %s)"
+    return queryset.filter(
+        id__in=RawSQL(
+            f'SELECT id FROM {table} WHERE search_vector @@ {tsquery}',
+            [query],
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'ts_rank({table}.search_vector, {tsquery})',
+            [query],
+            output_field=FloatField(),
+        ),
+    )
+
+
+def _snippet_postgresql(query):
+    table = Recipe._meta.db_table
+    return RawSQL(
+        f"ts_headline('russian', {table}.text, "
+        "websearch_to_tsquery('russian', %s), %s)",
+        [query, HEADLINE_OPTIONS],
+        output_field=TextField(),
+    )
+
+
+def fts5_query(query):
+    """Запрос FTS5: все слова обязательны, каждое ищется как префикс."""
+    return ' '.join(f'"{word}"*' for word in WORD.findall(query.lower()))
+
+
+def _search_sqlite(queryset, query):
+    table = Recipe._meta.db_table
+    fts = f'{table}_fts'
+    match = fts5_query(query)
+    matching_row = f'FROM {fts} WHERE {fts} MATCH %s AND rowid = {table}.id'
+    return queryset.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match])
+    ).annotate(
+        # bm25 тем меньше, чем запись релевантнее; название весит больше.
+        search_rank=RawSQL(
+            f'(SELECT -bm25({fts}, 10.0, 1.0) {matching_row})',
+            [match],
+            output_field=FloatField(),
+        ),
+    )
+
+
+def _snippet_sqlite(query):
+    table = Recipe._meta.db_table
+    fts = f'{table}_fts'
+    return RawSQL(
+        f"(SELECT snippet({fts}, 1, %s, %s, '…', {SNIPPET_TOKENS}) "
+        f'FROM {fts} WHERE {fts} MATCH %s AND rowid = {table}.id)',
+        [HIGHLIGHT_START, HIGHLIGHT_STOP, fts5_query(query)],
+        output_field=TextField(),
+    )
+
+
+SNIPPETS = {
+    'postgresql': _snippet_postgresql,
+    'sqlite': _snippet_sqlite,
+}
+
+
+def search_snippets(recipe_ids, query, using=DEFAULT_DB_ALIAS):
+    """
+    Фрагменты описания с найденными словами: {id рецепта: фрагмент}.
+
+    Строить фрагмент дорого, поэтому он считается отдельно и только для
+    рецептов текущей страницы, а не в search_recipes(): иначе он попал бы
+    в подзапрос COUNT(*) пагинатора и строился для всех найденных рецептов.
+    """
+    vendor = connections[using].vendor
+    if not recipe_ids or not WORD.search(query) or vendor not in SNIPPETS:
+        return {}
+    return dict(
+        Recipe.objects.using(using)
+        .filter(id__in=recipe_ids)
+        .order_by()
+        .annotate(search_snippet=SNIPPETS[vendor](query))
+        .values_list('id', 'search_snippet')
+    )
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и выделяет найденные слова тегом <mark>."""
+    return (
+        escape(snippet)
+        .replace(HIGHLIGHT_START, '<mark>')
+        .replace(HIGHLIGHT_STOP, '</mark>')
+    )
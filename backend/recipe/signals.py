@@ -0,0 +1,81 @@
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from users.models import Follow
+
+from . import timeline
+from .indexes.journal import journal
+from .models import Ingredient, IngredientInRecipe, Recipe, Tag
+
+# Рецепты или их ингредиенты изменились. recipe_ids — id изменённых
+# рецептов, None — изменилось неизвестно что (массовая загрузка).
+recipes_changed = Signal()
+
+
+def send_recipes_changed(recipe_ids=None, using=DEFAULT_DB_ALIAS):
+    """Отправляет recipes_changed после фиксации текущей транзакции."""
+    if recipe_ids is not None:
+        recipe_ids = list(recipe_ids)
+    transaction.on_commit(
+        lambda: recipes_changed.send(sender=Recipe, recipe_ids=recipe_ids),
+        using=using,
+    )
+
+
+def touch(recipes):
+    """Отмечает рецепты из queryset recipes изменёнными."""
+    recipes.update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, using, **kwargs):
+    send_recipes_changed([instance.pk], using)
+
+
+@receiver(recipes_changed)
+def record_changes(sender, recipe_ids, **kwargs):
+    journal.append(recipe_ids)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, using, raw=False, **kwargs):
+    if created and not raw:
+        timeline.fan_out(instance.pk, instance.author_id, using)
+
+
+@receiver(post_save, sender=Follow)
+def follow_saved(sender, instance, created, using, raw=False, **kwargs):
+    if created and not raw:
+        timeline.follow(instance.user_id, instance.author_id, using)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, using, **kwargs):
+    timeline.unfollow(instance.user_id, instance.author_id, using)
+
+
+# Название, цвет или единица измерения видны в рецепте. Сам рецепт при
+# правке его тегов и ингредиентов сохраняется и отмечается через auto_now;
+# здесь — правки справочников и строк ингредиентов в обход рецепта.
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def tag_changed(sender, instance, using, created=False, raw=False, **kwargs):
+    if not created and not raw:
+        touch(Recipe.objects.using(using).filter(tags=instance))
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(pre_delete, sender=Ingredient)
+def ingredient_changed(
+    sender, instance, using, created=False, raw=False, **kwargs
+):
+    if not created and not raw:
+        touch(Recipe.objects.using(using).filter(ingredients=instance))
+
+
+@receiver(post_save, sender=IngredientInRecipe)
+def recipe_ingredient_saved(sender, instance, using, raw=False, **kwargs):
+    if not raw:
+        touch(Recipe.objects.using(using).filter(pk=instance.recipe_id))
@@ -0,0 +1,249 @@
+"""
+Лента новых рецептов авторов, на которых подписан пользователь.
+
+Опубликованный рецепт сразу раскладывается по лентам подписчиков автора
+(TimelineEntry), и чтение ленты — проход по индексу (user, recipe) вместо
+соединения Recipe с Follow. Рецепты авторов, у которых подписчиков больше
+FEED_FANOUT_MAX_FOLLOWERS, по лентам не раскладываются: это слишком много
+записей на один рецепт. Такие рецепты подмешиваются при чтении запросом по
+индексу (author, -id).
+
+Лента хранит последние FEED_TIMELINE_LENGTH рецептов: лишнее удаляется
+следующим запросом сразу после записи, только у тех, чьи ленты пополнились.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Count
+
+from users.models import Follow
+
+from .models import Recipe, TimelineEntry
+
+FEED_LIMIT = 6
+MAX_FEED_LIMIT = 100
+POPULAR_AUTHORS_KEY = 'feed:popular-authors'
+POPULAR_AUTHORS_TIMEOUT = 5 * 60
+
+
+def _tables(connection):
+    return {
+        name: connection.ops.quote_name(model._meta.db_table)
+        for name, model in (
+            ('entries', TimelineEntry),
+            ('follows', Follow),
+            ('recipes', Recipe),
+        )
+    }
+
+
+def _fan_out_allowed(tables):
+    # Подписчиков считаем не дальше порога: у популярного автора их
+    # может быть очень много.
+    return (
+        '(SELECT COUNT(*) FROM (SELECT 1 FROM {follows} '
+        'WHERE author_id = %s LIMIT %s) AS capped) <= %s'
+    ).format(**tables)
+
+
+def _execute(sql, params, using):
+    with connections[using].cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def _trim_readers(readers, params, using):
+    """
+    Оставляет FEED_TIMELINE_LENGTH последних рецептов в лентах
+    пользователей из подзапроса readers (столбец user_id).
+
+    Первый лишний рецепт каждой ленты находится проходом по индексу
+    (user, recipe), и удаляются только записи начиная с него.
+    """
+    tables = _tables(connections[using])
+    return _execute(
+        'DELETE FROM {entries} WHERE id IN ('
+        'SELECT entry.id FROM {entries} AS entry JOIN ('
+        'SELECT reader.user_id, ('
+        'SELECT kept.recipe_id FROM {entries} AS kept '
+        'WHERE kept.user_id = reader.user_id '
+        'ORDER BY kept.recipe_id DESC LIMIT 1 OFFSET %s'
+        ') AS boundary FROM ('.format(**tables)
+        + readers
+        + ') AS reader) AS bound ON entry.user_id = bound.user_id '
+        'WHERE entry.recipe_id <= bound.boundary)',
+        [settings.FEED_TIMELINE_LENGTH, *params],
+        using,
+    )
+
+
+def fan_out(recipe_id, author_id, using=DEFAULT_DB_ALIAS):
+    """Добавляет рецепт в ленты подписчиков автора."""
+    tables = _tables(connections[using])
+    limit = settings.FEED_FANOUT_MAX_FOLLOWERS
+    followers = 'FROM {follows} WHERE author_id = %s AND '.format(
+        **tables
+    ) + _fan_out_allowed(tables)
+    params = [author_id, author_id, limit + 1, limit]
+    _execute(
+        'INSERT INTO {entries} (user_id, author_id, recipe_id) '
+        'SELECT user_id, author_id, %s '.format(**tables)
+        + followers
+        + ' ON CONFLICT DO NOTHING',
+        [recipe_id, *params],
+        using,
+    )
+    _trim_readers('SELECT user_id ' + followers, params, using)
+
+
+def fan_out_many(recipe_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Добавляет пачку новых рецептов в ленты подписчиков их авторов одним
+    запросом; для массовой загрузки.
+    """
+    if not recipe_ids:
+        return 0
+    tables = _tables(connections[using])
+    placeholders = ', '.join(['%s'] * len(recipe_ids))
+    created = _execute(
+        'INSERT INTO {entries} (user_id, author_id, recipe_id) '
+        'SELECT follow.user_id, recipe.author_id, recipe.id '
+        'FROM {recipes} AS recipe '
+        'JOIN {follows} AS follow ON follow.author_id = recipe.author_id '
+        'WHERE recipe.id IN ({ids}) AND recipe.author_id IN ('
+        'SELECT author_id FROM {follows} WHERE author_id IN ('
+        'SELECT author_id FROM {recipes} WHERE id IN ({ids})) '
+        'GROUP BY author_id HAVING COUNT(*) <= %s) '
+        'ON CONFLICT DO NOTHING'.format(ids=placeholders, **tables),
+        [*recipe_ids, *recipe_ids, settings.FEED_FANOUT_MAX_FOLLOWERS],
+        using,
+    )
+    _trim_readers(
+        'SELECT DISTINCT user_id FROM {follows} WHERE author_id IN ('
+        'SELECT author_id FROM {recipes} WHERE id IN ({ids}))'.format(
+            ids=placeholders, **tables
+        ),
+        recipe_ids,
+        using,
+    )
+    return created
+
+
+def follow(user_id, author_id, using=DEFAULT_DB_ALIAS):
+    """Добавляет в ленту пользователя последние рецепты нового автора."""
+    tables = _tables(connections[using])
+    limit = settings.FEED_FANOUT_MAX_FOLLOWERS
+    _execute(
+        'INSERT INTO {entries} (user_id, author_id, recipe_id) '
+        'SELECT %s, author_id, id FROM {recipes} '
+        'WHERE author_id = %s AND '.format(**tables)
+        + _fan_out_allowed(tables)
+        + ' ORDER BY id DESC LIMIT %s ON CONFLICT DO NOTHING',
+        [
+            user_id,
+            author_id,
+            author_id,
+            limit + 1,
+            limit,
+            settings.FEED_TIMELINE_LENGTH,
+        ],
+        using,
+    )
+    _trim_readers('SELECT %s AS user_id', [user_id], using)
+
+
+def unfollow(user_id, author_id, using=DEFAULT_DB_ALIAS):
+    TimelineEntry.objects.using(using).filter(
+        user_id=user_id, author_id=author_id
+    ).delete()
+
+
+def popular_authors():
+    """
+    Авторы, чьи рецепты подмешиваются при чтении.
+
+    Порог вдвое ниже порога раскладки: автор, у которого подписчиков
+    стало меньше FEED_FANOUT_MAX_FOLLOWERS, не пропадает из лент, пока
+    кэш не обновится, а рецепты из обоих источников склеиваются по id.
+    """
+    authors = cache.get(POPULAR_AUTHORS_KEY)
+    if authors is None:
+        authors = list(
+            Follow.objects.order_by()
+            .values('author_id')
+            .annotate(followers=Count('id'))
+            .filter(followers__gt=settings.FEED_FANOUT_MAX_FOLLOWERS // 2)
+            .values_list('author_id', flat=True)
+        )
+        cache.set(POPULAR_AUTHORS_KEY, authors, POPULAR_AUTHORS_TIMEOUT)
+    return authors
+
+
+def feed(user, before=None, limit=FEED_LIMIT):
+    """id рецептов ленты пользователя от новых к старым, меньше before."""
+    entries = TimelineEntry.objects.filter(user=user)
+    if before is not None:
+        entries = entries.filter(recipe_id__lt=before)
+    recipe_ids = set(
+        entries.order_by('-recipe_id').values_list('recipe_id', flat=True)[
+            :limit
+        ]
+    )
+    popular = popular_authors()
+    if popular:
+        recipes = Recipe.objects.filter(
+            author_id__in=Follow.objects.filter(
+                user=user, author_id__in=popular
+            ).values('author_id')
+        )
+        if before is not None:
+            recipes = recipes.filter(id__lt=before)
+        recipe_ids.update(
+            recipes.order_by('-id').values_list('id', flat=True)[:limit]
+        )
+    return sorted(recipe_ids, reverse=True)[:limit]
+
+
+def rebuild(using=DEFAULT_DB_ALIAS):
+    """
+    Заново раскладывает рецепты по лентам всех пользователей и возвращает
+    число записей.
+    """
+    tables = _tables(connections[using])
+    with transaction.atomic(using=using):
+        TimelineEntry.objects.using(using).all().delete()
+        created = _execute(
+            'INSERT INTO {entries} (user_id, author_id, recipe_id) '
+            'SELECT user_id, author_id, recipe_id FROM ('
+            'SELECT follow.user_id, recipe.author_id, recipe.id AS recipe_id, '
+            'ROW_NUMBER() OVER (PARTITION BY follow.user_id '
+            'ORDER BY recipe.id DESC) AS ordinal '
+            'FROM {follows} AS follow '
+            'JOIN {recipes} AS recipe ON recipe.author_id = follow.author_id '
+            'WHERE follow.author_id IN (SELECT author_id FROM {follows} '
+            'GROUP BY author_id HAVING COUNT(*) <= %s)'
+            ') AS ranked WHERE ordinal <= %s'.format(**tables),
+            [
+                settings.FEED_FANOUT_MAX_FOLLOWERS,
+                settings.FEED_TIMELINE_LENGTH,
+            ],
+            using,
+        )
+    cache.delete(POPULAR_AUTHORS_KEY)
+    return created
+
+
+def trim(using=DEFAULT_DB_ALIAS):
+    """
+    Удаляет из всех лент всё, кроме FEED_TIMELINE_LENGTH последних
+    рецептов, например после уменьшения FEED_TIMELINE_LENGTH.
+    """
+    tables = _tables(connections[using])
+    return _execute(
+        'DELETE FROM {entries} WHERE id IN ('
+        'SELECT id FROM (SELECT id, ROW_NUMBER() OVER ('
+        'PARTITION BY user_id ORDER BY recipe_id DESC) AS ordinal '
+        'FROM {entries}) AS ranked WHERE ordinal > %s)'.format(**tables),
+        [settings.FEED_TIMELINE_LENGTH],
+        using,
+    )
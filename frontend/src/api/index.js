@@ -385,10 +385,10 @@ class Api {
     ).then(this.checkResponse)
   }
 
-  downloadFile () {
+  downloadFile (url = `/api/recipes/download_shopping_cart/`) {
     const token = localStorage.getItem('token')
     return fetch(
-      `/api/recipes/download_shopping_cart/`,
+      url,
       {
         method: 'GET',
         headers: {
@@ -396,7 +396,15 @@ class Api {
           'authorization': `Token ${token}`
         }
       }
-    ).then(this.checkFileDownloadResponse)
+    ).then(res => {
+      if (res.status === 202) {
+        // the document is rendered in background: poll the returned url
+        return res.json().then(({ url }) => new Promise(resolve => {
+          setTimeout(() => resolve(this.downloadFile(url)), 1000)
+        }))
+      }
+      return this.checkFileDownloadResponse(res)
+    })
   }
 }
 